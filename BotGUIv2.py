@@ -1,13 +1,18 @@
 import discord
 import asyncio
+import os
+import sys
 import threading
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
+from tkinter import ttk, scrolledtext, messagebox, simpledialog
 from datetime import datetime, timedelta, timezone
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from credentials import STORE_FILE, CredentialStore, token_user_id # Mismo almacén que src/main.py
+
 # --- CONFIGURACIÓN ---
-# Pega tu token aquí dentro de las comillas. 
-# Al ser un .exe personal, es aceptable tenerlo aquí.
+# Opcional: pega tu token aquí dentro de las comillas. Si lo dejas así, se usa
+# el guardado en credenciales.dat (el mismo que src/main.py) o se pide al arrancar.
 DISCORD_TOKEN = "TU_TOKEN_AQUI_PEGALO_DENTRO" 
 
 class DiscordBotThread(threading.Thread):
@@ -34,10 +39,15 @@ class DiscordBotThread(threading.Thread):
         asyncio.set_event_loop(self.loop)
         try:
             self.loop.run_until_complete(self.bot.start(self.token))
+        except discord.LoginFailure:
+            # Se olvida el token guardado para que el próximo arranque lo pida
+            CredentialStore().clear()
+            self.gui_callback("❌ Error: Token de Discord inválido. Vuelve a ejecutar para ingresar el token.")
         except Exception as e:
             self.gui_callback(f"❌ Error de conexión: {e}")
 
     async def on_ready(self):
+        CredentialStore().save_identity(self.bot.user.id, str(self.bot.user))
         self.gui_callback(f"✅ Bot conectado como: {self.bot.user}")
         self.ready_event.set() # Avisar a la GUI que ya puede buscar servidores
 
@@ -117,7 +127,7 @@ class BotApp(tk.Tk):
         self.guild_map = {} # Diccionario para mapear "Nombre Servidor" -> ID
 
         self._create_widgets()
-        self._start_bot_thread()
+        self.load_or_ask_token()
 
     def _create_widgets(self):
         # Frame Principal
@@ -169,12 +179,56 @@ class BotApp(tk.Tk):
         self.log_area.see(tk.END) # Auto-scroll
         self.log_area.config(state='disabled')
 
-    def _start_bot_thread(self):
-        if "TU_TOKEN" in DISCORD_TOKEN:
-            messagebox.showerror("Error", "Edita el archivo y coloca tu TOKEN real en la variable DISCORD_TOKEN")
+    def load_or_ask_token(self):
+        """Token del código si se pegó; si no, el guardado (leído fuera del hilo de Tk) o se pide."""
+        if "TU_TOKEN" not in DISCORD_TOKEN:
+            self._start_bot_thread(DISCORD_TOKEN)
+            return
+        threading.Thread(target=self._load_credentials, daemon=True).start()
+
+    def _load_credentials(self):
+        try:
+            credentials = CredentialStore().load()
+        except Exception as e:
+            self.log(f"⚠️ Error al leer el token: {e}. Solicitando nuevamente.")
+            credentials = None
+        self.after(0, self._on_credentials, credentials)
+
+    def _on_credentials(self, credentials):
+        if credentials and credentials.token:
+            self.log(f"✅ Token encontrado en {STORE_FILE}. Iniciando conexión.")
+            self._start_bot_thread(credentials.token)
+            if credentials.identity_matches:
+                # Mismo bot que en la última conexión: se muestra sin esperar al gateway
+                self.lbl_status.config(text=f"🔌 Conectando como {credentials.bot_name}...", foreground="orange")
             return
+        self.lbl_status.config(text="⚠️ Token no encontrado. Ingresa el token de Discord.", foreground="red")
+        self.after(0, self._show_token_dialog)
+
+    def _show_token_dialog(self):
+        token = simpledialog.askstring(
+            "Autenticación del Bot",
+            f"Ingresa tu token de Bot de Discord:\n(Será guardado en '{STORE_FILE}' para uso futuro)",
+            parent=self,
+            show='*'
+        )
+        if not token:
+            messagebox.showinfo("Cancelado", "No se ingresó el token. Cerrando programa.")
+            self.destroy()
+            return
+        if token_user_id(token) is None:
+            messagebox.showerror("Token inválido", "Eso no parece un token de bot de Discord. Revisa que esté completo.")
+            self.after(0, self._show_token_dialog)
+            return
+        try:
+            CredentialStore().save_token(token)
+        except Exception as e:
+            self.log(f"⚠️ No se pudo guardar el token: {e}")
+        self._start_bot_thread(token.strip())
 
-        self.bot_thread = DiscordBotThread(DISCORD_TOKEN, self.log)
+    def _start_bot_thread(self, token):
+        self.lbl_status.config(text="🔌 Conectando bot...", foreground="orange")
+        self.bot_thread = DiscordBotThread(token, self.log)
         self.bot_thread.daemon = True # El hilo muere si cierras la ventana
         self.bot_thread.start()
         
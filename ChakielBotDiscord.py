@@ -5,27 +5,63 @@ Bot que elimina todos los mensajes de un usuario específico en los últimos 7 d
 SOLUCIÓN APLICADA: Implementación de inputs no bloqueantes para evitar errores de Heartbeat.
 """
 
+BANNER = """
+    ╔══════════════════════════════════════════════════════════╗
+    ║     🤖 DISCORD MESSAGE DELETER BOT v1.0 (FIXED)         ║
+    ║                                                          ║
+    ║  Elimina mensajes de usuarios específicos en 7 días     ║
+    ╚══════════════════════════════════════════════════════════╝
+    """
+
+if __name__ == "__main__":
+    # El banner se muestra antes de importar discord.py, que tarda en cargar
+    print(BANNER)
+
 import discord
 import asyncio
 import logging
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 import os
-from dotenv import load_dotenv
+import re
+import sys
+import threading
+
+# Los módulos compartidos con la GUI viven en src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from archive import MessageArchiver, default_archive_path
+from credentials import CredentialStore, token_user_id
+from history_cache import DEFAULT_PATH as HISTORY_CACHE_PATH, HistoryCache
+from jobs import DeletionJob, JobGroup, JobRegistry
+from log_pipeline import LOG_FILE, LogPipeline
+from loop_watchdog import LoopWatchdog
+from matcher import ContentMatcher, MessageFilter
+from memory_budget import budget_from_env, client_options
+from multi_guild import GuildReport, report_lines, run_guilds
+from preflight import READ_PERMISSIONS, PermissionPlanner, describe_skipped
+from purge import DeleteBatcher, RequestStats, purge_authors_cached, purge_channel
+from retention import RetentionStore
+from retention_scheduler import RetentionScheduler
+from run_report import REPORT_DIR, ChannelReport, RunReport, default_report_path
+from session_resume import ResumableClient
+from spam_clusters import SpamAnalyzer, scan_window
+from sweep import ThreadCache, collect_targets, run_sweep, target_label
 
-# Configuración de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('bot_deletion.log', encoding='utf-8')
-    ]
-)
 logger = logging.getLogger(__name__)
+log_pipeline = None  # Se crea en setup_logging()
+
+
+def setup_logging():
+    """
+    Configuración de logging (se llama al arrancar, no al importar el módulo).
+    Consola y archivo JSON se escriben en un hilo aparte: el event loop solo encola.
+    """
+    global log_pipeline
+    log_pipeline = LogPipeline(LOG_FILE).install()
 
 
-class MessageDeleterBot(discord.Client):
+class MessageDeleterBot(ResumableClient):
     """Bot especializado en eliminación masiva de mensajes por usuario"""
     
     def __init__(self):
@@ -35,11 +71,35 @@ class MessageDeleterBot(discord.Client):
         intents.guilds = True
         intents.members = True  # Para buscar por nombre de usuario
         
-        super().__init__(intents=intents)
+        # Modo de poca memoria (DELETE_MEMORY_BUDGET_MB): caches mínimas y aviso si se supera el presupuesto
+        self.memory_budget = budget_from_env()
+        super().__init__(intents=intents, **client_options(self.memory_budget))
+        if self.memory_budget:
+            self.memory_budget.report = logger.warning
         
         self.total_deleted = 0
         self.channels_processed = 0
         self.errors_count = 0
+        self.thread_cache = ThreadCache()
+        self.jobs = JobRegistry()  # Un trabajo activo por servidor
+        # Techo de peticiones por segundo (0 = sin límite), ajustable durante el trabajo
+        self.max_rate = float(os.getenv('DELETE_MAX_RATE', '0')) or None
+        # Carpeta para guardar copia de los mensajes eliminados (vacío = no archivar)
+        self.archive_dir = os.getenv('DELETE_ARCHIVE_DIR', '')
+        self.archivers = []  # Uno por servidor barrido
+        # Recuento de peticiones compartido por todo el barrido (todos los servidores)
+        self.request_stats = RequestStats()
+        self.guild_reports = None  # (informes, segundos) del barrido en todos los servidores
+        # Informe por canal de cada trabajo (formato: jsonl o csv)
+        self.report_dir = os.getenv('DELETE_REPORT_DIR', REPORT_DIR)
+        self.report_format = os.getenv('DELETE_REPORT_FORMAT', 'jsonl')
+        self.run_report = None
+        # Cache local de autores/fechas por canal (vacío = desactivada)
+        cache_path = os.getenv('DELETE_HISTORY_CACHE', HISTORY_CACHE_PATH)
+        self.history_cache = HistoryCache(cache_path) if cache_path else None
+        self.credential_store = None  # Si el token vino del almacén local, se actualiza la identidad
+        # Lag del loop, callbacks que lo bloquean (con su pila) y latencia del heartbeat
+        self.watchdog = LoopWatchdog(logger.warning, client=self)
     
     async def async_input(self, prompt: str) -> str:
         """
@@ -48,17 +108,34 @@ class MessageDeleterBot(discord.Client):
         """
         return await asyncio.to_thread(input, prompt)
 
+    async def on_raw_message_delete(self, payload):
+        if self.history_cache:
+            self.history_cache.forget([payload.message_id])
+    
+    async def on_raw_bulk_message_delete(self, payload):
+        if self.history_cache:
+            self.history_cache.forget(payload.message_ids)
+    
     async def on_ready(self):
         """Ejecuta el proceso de eliminación cuando el bot está listo"""
         logger.info(f'✅ Bot conectado como {self.user} (ID: {self.user.id})')
+        self.watchdog.start()
+        if self.credential_store:
+            self.credential_store.save_identity(self.user.id, str(self.user))
         logger.info(f'📊 Conectado a {len(self.guilds)} servidor(es)')
+        if self.memory_budget:
+            logger.info(f'🪶 Modo de poca memoria: presupuesto de {self.memory_budget.megabytes:.0f} MB, '
+                        f'sin cache de mensajes ni de miembros')
+        if self.resumed_session:
+            logger.info('♻️  Sesión anterior reanudada (sin IDENTIFY)')
         
         try:
             await self.start_deletion_process()
         except Exception as e:
             logger.error(f'❌ Error crítico: {e}', exc_info=True)
         finally:
-            await self.close()
+            # Guarda la sesión: un nuevo arranque en menos de un minuto la reanuda
+            await self.close_resumable()
     
     async def start_deletion_process(self):
         """Proceso principal de eliminación"""
@@ -66,29 +143,56 @@ class MessageDeleterBot(discord.Client):
         print("🤖 BOT DE ELIMINACIÓN MASIVA DE MENSAJES")
         print("="*60 + "\n")
         
-        # Paso 1: Seleccionar servidor
-        guild = await self.select_guild()
-        if not guild:
+        # Paso 1: Seleccionar servidor (o todos)
+        guilds = await self.select_guilds()
+        if not guilds:
             return
+        guild = guilds[0]
+        everywhere = len(guilds) > 1
         
-        # Paso 2: Obtener usuario objetivo
-        target_user_id = await self.get_target_user(guild)
-        if not target_user_id:
+        # Paso 2: Obtener usuario objetivo y/o patrones de contenido
+        mode = await self.select_mode()
+        user_ids, matcher = None, None
+        if mode == "5":
+            await self.run_retention_policies()
             return
+        if mode == "4":
+            if everywhere:
+                print("⚠️  La detección de spam analiza un solo servidor. Elige uno concreto.")
+                return
+            user_ids = await self.detect_spam_accounts(guild)
+            if not user_ids:
+                return
+        if mode in ("1", "3"):
+            if everywhere:
+                # El nombre o el nickname dependen del servidor: en todos, solo por ID
+                target_user_id = await self.get_user_by_id()
+            else:
+                target_user_id = await self.get_target_user(guild)
+            if not target_user_id:
+                return
+            user_ids = [target_user_id]
+        if mode in ("2", "3"):
+            matcher = await self.get_content_matcher()
+            if not matcher:
+                return
         
         # Paso 3: Confirmación de seguridad
-        if not await self.confirm_deletion(target_user_id, guild):
+        if not await self.confirm_deletion(user_ids, guilds, matcher):
             print("❌ Operación cancelada por el usuario.")
             return
         
         # Paso 4: Ejecutar eliminación
-        await self.delete_messages_from_user(guild, target_user_id)
+        if everywhere:
+            await self.delete_messages_everywhere(guilds, user_ids, matcher)
+        else:
+            await self.delete_messages_from_user(guild, user_ids, matcher)
         
         # Paso 5: Mostrar resumen
         self.show_summary()
     
-    async def select_guild(self) -> Optional[discord.Guild]:
-        """Permite seleccionar el servidor donde eliminar mensajes"""
+    async def select_guilds(self) -> Optional[list]:
+        """Permite seleccionar el servidor donde eliminar mensajes, o todos a la vez"""
         if len(self.guilds) == 0:
             logger.error("❌ El bot no está en ningún servidor.")
             return None
@@ -96,11 +200,12 @@ class MessageDeleterBot(discord.Client):
         if len(self.guilds) == 1:
             guild = self.guilds[0]
             print(f"📍 Servidor seleccionado: {guild.name}")
-            return guild
+            return [guild]
         
         print("\n📋 Servidores disponibles:")
         for idx, g in enumerate(self.guilds, 1):
             print(f"  {idx}. {g.name} (ID: {g.id})")
+        print(f"  0. 🌐 Todos los servidores a la vez ({len(self.guilds)})")
         
         while True:
             try:
@@ -108,13 +213,101 @@ class MessageDeleterBot(discord.Client):
                 choice = await self.async_input("\n🔢 Selecciona el número del servidor: ")
                 choice = choice.strip()
                 idx = int(choice) - 1
+                if idx == -1:
+                    return list(self.guilds)
                 if 0 <= idx < len(self.guilds):
-                    return self.guilds[idx]
+                    return [self.guilds[idx]]
                 print("⚠️  Número inválido. Intenta de nuevo.")
             except (ValueError, KeyboardInterrupt):
                 print("\n❌ Entrada inválida.")
                 return None
     
+    async def select_mode(self) -> str:
+        """Elige qué mensajes borrar: por usuario, por contenido o ambos"""
+        print("\n📋 Modo de eliminación:")
+        print("  1. Mensajes de un usuario")
+        print("  2. Mensajes con contenido concreto (palabras, regex, dominios)")
+        print("  3. Mensajes de un usuario que además coincidan con el contenido")
+        print("  4. Detectar cuentas de spam automáticamente (mensajes casi duplicados)")
+        print("  5. Aplicar las políticas de retención por canal (queda en marcha hasta Ctrl+C)")
+        
+        while True:
+            choice = (await self.async_input("\n🔢 Selecciona el modo (1/2/3/4/5): ")).strip()
+            if choice in ("1", "2", "3", "4", "5"):
+                return choice
+            print("⚠️  Opción inválida. Usa 1, 2, 3, 4 o 5.")
+    
+    async def detect_spam_accounts(self, guild: discord.Guild) -> Optional[list]:
+        """Escanea los últimos 7 días sin borrar y propone las cuentas con contenido casi duplicado"""
+        print("\n🔎 Analizando mensajes de los últimos 7 días (no se borra nada)...")
+        seven_days_ago = datetime.now(timezone.utc) - timedelta(days=7)
+        planner = PermissionPlanner(guild, READ_PERMISSIONS)
+        targets, _ = planner.split(await collect_targets(guild, seven_days_ago, self.thread_cache, planner))
+        analyzer = SpamAnalyzer()
+        elapsed = await scan_window(targets, seven_days_ago, analyzer)
+        print(f"📥 {len(analyzer)} mensajes leídos de {len(targets)} canales en {elapsed:.1f}s")
+        
+        suspects = await asyncio.to_thread(analyzer.rank_authors)
+        if not suspects:
+            print("✅ No se encontraron cuentas con mensajes casi duplicados.")
+            return None
+        
+        print("\n🚩 Cuentas sospechosas (de más a menos puntuación):")
+        for idx, s in enumerate(suspects, 1):
+            member = guild.get_member(s.author_id)
+            name = member.name if member else "desconocido"
+            print(f"  {idx}. {s.author_id} ({name}) - puntuación {s.score:.0f}, "
+                  f"{s.messages} mensajes en {len(s.channels)} canales")
+        
+        answer = (await self.async_input(f"\n🔢 ¿Cuántas incluir en la eliminación? (1-{len(suspects)}, Enter = todas): ")).strip()
+        try:
+            count = int(answer) if answer else len(suspects)
+        except ValueError:
+            print("❌ Número inválido.")
+            return None
+        if count <= 0:
+            return None
+        return [s.author_id for s in suspects[:count]]
+    
+    async def run_retention_policies(self):
+        """Modo 5: aplica las reglas de retención de todos los servidores hasta Ctrl+C"""
+        rules = RetentionStore().load()
+        if not rules:
+            print("⚠️  No hay reglas de retención. Añádelas con: python src/retention.py add <canal_id> 24h")
+            return
+        print("\n🕒 Políticas de retención:")
+        for rule in rules:
+            channel = self.get_channel(rule.channel_id)
+            name = f"#{channel.name} ({channel.guild.name})" if channel else f"canal {rule.channel_id} (no visible)"
+            print(f"  • {name}: conserva {rule.keep}, revisión cada {rule.period / 60:.0f} min")
+        print("\n▶️  Aplicando a ritmo bajo y constante. Ctrl+C para salir.\n")
+        
+        scheduler = RetentionScheduler(self, logger.info, jobs=self.jobs, history_cache=self.history_cache)
+        try:
+            await scheduler.run_forever()
+        finally:
+            if scheduler.stats.requests:
+                print(f"📈 Peticiones: {scheduler.stats.summary()}")
+    
+    async def get_content_matcher(self) -> Optional[ContentMatcher]:
+        """Pide los patrones de contenido (archivo de texto o lista separada por ';')"""
+        print("\n📝 Patrones: texto libre, 're:<regex>' o 'dominio:<dominio>'")
+        user_input = (await self.async_input("📂 Ruta a un archivo de patrones (uno por línea) o patrones separados por ';': ")).strip()
+        
+        if os.path.isfile(user_input):
+            with open(user_input, encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        else:
+            lines = user_input.split(';')
+        
+        try:
+            matcher = ContentMatcher.from_lines(lines)
+        except (ValueError, re.error) as e:
+            print(f"❌ Patrones inválidos: {e}")
+            return None
+        print(f"✅ {len(matcher)} patrón(es) compilados")
+        return matcher
+    
     async def get_target_user(self, guild: discord.Guild) -> Optional[int]:
         """Obtiene el ID del usuario objetivo mediante input"""
         print("\n" + "-"*60)
@@ -167,6 +360,18 @@ class MessageDeleterBot(discord.Client):
                 logger.error(f"Error al buscar usuario: {e}")
                 return None
     
+    async def find_members(self, guild: discord.Guild, query: str) -> list:
+        """
+        Miembros entre los que buscar por nombre. Tras reanudar la sesión la lista no está
+        descargada: se pide entera. En modo de poca memoria no se guarda: se pregunta al
+        gateway solo por los que empiezan por `query` (nombre o apodo).
+        """
+        if self.memory_budget:
+            return await guild.query_members(query, limit=100, cache=False)
+        if not guild.chunked:
+            await guild.chunk()
+        return guild.members
+    
     async def get_user_by_username(self, guild: discord.Guild) -> Optional[int]:
         """Busca usuario por nombre de usuario"""
         # CORRECCIÓN: Usar async_input
@@ -174,7 +379,7 @@ class MessageDeleterBot(discord.Client):
         username = username.strip()
         
         # Buscar en miembros del servidor
-        member = discord.utils.get(guild.members, name=username)
+        member = discord.utils.get(await self.find_members(guild, username), name=username)
         
         if member:
             print(f"✅ Usuario encontrado: {member.name}#{member.discriminator} (ID: {member.id})")
@@ -192,7 +397,7 @@ class MessageDeleterBot(discord.Client):
         # Buscar por display_name (nickname o username)
         member = discord.utils.find(
             lambda m: m.display_name.lower() == nickname.lower(),
-            guild.members
+            await self.find_members(guild, nickname)
         )
         
         if member:
@@ -202,92 +407,274 @@ class MessageDeleterBot(discord.Client):
             print(f"❌ No se encontró usuario con nickname '{nickname}' en este servidor.")
             return None
     
-    async def confirm_deletion(self, user_id: int, guild: discord.Guild) -> bool:
+    async def confirm_deletion(self, user_ids: Optional[list], guilds: list,
+                               matcher: Optional[ContentMatcher] = None) -> bool:
         """Confirmación de seguridad antes de eliminar"""
         print("\n" + "⚠️ "*20)
         print("⚠️  ADVERTENCIA: OPERACIÓN IRREVERSIBLE")
         print("⚠️ "*20)
         print(f"\n📋 Detalles de la operación:")
-        print(f"   • Servidor: {guild.name}")
-        print(f"   • Usuario ID: {user_id}")
+        if len(guilds) == 1:
+            print(f"   • Servidor: {guilds[0].name}")
+        else:
+            print(f"   • Servidores: TODOS ({len(guilds)}), a la vez")
+        if user_ids:
+            print(f"   • Usuario ID: {', '.join(str(u) for u in user_ids)}")
+        if matcher:
+            print(f"   • Contenido: {len(matcher)} patrón(es)")
         print(f"   • Periodo: Últimos 7 días")
-        print(f"   • Canales: Todos los canales de texto accesibles")
+        print(f"   • Canales: Texto, voz, hilos y posts de foros accesibles")
         
         # CORRECCIÓN: Usar async_input
         confirmation = await self.async_input("\n❓ ¿Confirmas esta eliminación? Escribe 'ELIMINAR' para continuar: ")
         
         return confirmation.strip() == "ELIMINAR"
     
-    async def delete_messages_from_user(self, guild: discord.Guild, user_id: int):
-        """Elimina todos los mensajes del usuario en el servidor"""
+    async def delete_messages_from_user(self, guild: discord.Guild, user_ids: Optional[list],
+                                        matcher: Optional[ContentMatcher] = None):
+        """Elimina los mensajes de los usuarios (y/o con el contenido indicado) en el servidor"""
         print("\n" + "="*60)
         print("🚀 INICIANDO PROCESO DE ELIMINACIÓN")
         print("="*60 + "\n")
         
         # Calcular fecha límite (7 días atrás)
         seven_days_ago = datetime.now(timezone.utc) - timedelta(days=7)
+        message_filter = MessageFilter(seven_days_ago, user_ids, matcher)
         
-        # Obtener canales de texto
-        text_channels = [ch for ch in guild.text_channels if isinstance(ch, discord.TextChannel)]
-        
-        print(f"📊 Total de canales a procesar: {len(text_channels)}\n")
+        job = DeletionJob(guild.id, asyncio.get_running_loop(), self.max_rate, budget=self.memory_budget)
+        if not self.jobs.acquire(job):
+            print("⚠️  Ya hay una eliminación en curso en este servidor.")
+            return
         
-        for idx, channel in enumerate(text_channels, 1):
-            await self.process_channel(channel, user_id, seven_days_ago, idx, len(text_channels))
+        self.start_job_controls(job)
+        self.run_report = self.open_run_report(str(guild.id))
+        job.state = "running"
+        job.future = asyncio.ensure_future(self.sweep_guild(guild, job, message_filter))
+        try:
+            await job.future
+        except asyncio.CancelledError:
+            if job.state != "cancelled":
+                raise
+            print("\n⏹️  Eliminación cancelada por el usuario.")
+            logger.info(f"Trabajo cancelado en {guild.name}")
+        finally:
+            if job.state != "cancelled":
+                job.state = "finished"
+            self.jobs.release(job)
+            self.run_report.close()
+    
+    def open_run_report(self, label: str) -> RunReport:
+        """Informe por canal del trabajo: se escribe según termina cada canal"""
+        return RunReport(default_report_path(label, self.report_dir, self.report_format))
     
-    async def process_channel(self, channel: discord.TextChannel, user_id: int, 
-                             after_date: datetime, current: int, total: int):
-        """Procesa un canal individual"""
-        # Verificar permisos
-        permissions = channel.permissions_for(channel.guild.me)
-        if not permissions.manage_messages or not permissions.read_message_history:
-            logger.warning(f"⚠️  Sin permisos en #{channel.name}")
+    async def delete_messages_everywhere(self, guilds: list, user_ids: Optional[list],
+                                         matcher: Optional[ContentMatcher] = None):
+        """Como delete_messages_from_user, pero en todos los servidores a la vez (un trabajo por servidor)"""
+        print("\n" + "="*60)
+        print(f"🌐 INICIANDO ELIMINACIÓN EN {len(guilds)} SERVIDORES A LA VEZ")
+        print("="*60 + "\n")
+        
+        seven_days_ago = datetime.now(timezone.utc) - timedelta(days=7)
+        message_filter = MessageFilter(seven_days_ago, user_ids, matcher)
+        
+        group = JobGroup(asyncio.get_running_loop(), self.max_rate, budget=self.memory_budget)
+        plan = []
+        for guild in guilds:
+            job = group.add(guild.id, self.jobs)
+            if job is None:
+                print(f"⚠️  {guild.name}: ya hay una eliminación en curso, se omite.")
+            else:
+                plan.append((guild, job))
+        if not plan:
             return
         
-        print(f"[{current}/{total}] 🔍 Procesando #{channel.name}...", end=" ")
+        async def run_one(guild, job, report):
+            try:
+                await self.sweep_guild(guild, job, message_filter, report, tag=f"[{guild.name}] ")
+            finally:
+                self.jobs.release(job)
         
+        self.start_job_controls(group)
+        self.run_report = self.open_run_report("todos")
         try:
-            # Definir función de check para purge
-            def check_message(msg):
-                return (msg.author.id == user_id and 
-                       msg.created_at.replace(tzinfo=timezone.utc) > after_date)
-            
-            # Ejecutar purge con manejo robusto
-            deleted = await channel.purge(
-                limit=None,  # Sin límite, buscará todos
-                check=check_message,
-                after=after_date,
-                bulk=True,
-                reason=f"Eliminación masiva de mensajes del usuario ID: {user_id}"
-            )
+            self.guild_reports = await run_guilds(plan, run_one)
+        finally:
+            self.run_report.close()
+        if group.state == "cancelled":
+            print("\n⏹️  Eliminación cancelada por el usuario.")
+            logger.info("Trabajo en todos los servidores cancelado")
+    
+    async def sweep_guild(self, guild: discord.Guild, job: DeletionJob, message_filter: MessageFilter,
+                          report: Optional[GuildReport] = None, tag: str = ""):
+        """Barre los canales e hilos de un servidor con el pipeline concurrente"""
+        # Obtener canales e hilos (activos, archivados y posts de foros) y apartar,
+        # antes de ninguna petición, aquellos en los que el bot no tiene permisos
+        planner = PermissionPlanner(guild)
+        targets = await collect_targets(guild, message_filter.after, self.thread_cache, planner)
+        targets, skipped = planner.split(targets)
+        if skipped:
+            logger.warning(f"⚠️  {tag}{describe_skipped(skipped, target_label)}")
+            for reason, blocked in skipped.items():
+                for channel in blocked:
+                    self.write_report_row(ChannelReport(guild.id, channel.id, tag + target_label(channel),
+                                                        error=reason))
+        print(f"📊 {tag}Total de canales e hilos a procesar: {len(targets)}\n")
+        
+        archiver = None
+        if self.archive_dir:
+            archiver = MessageArchiver(default_archive_path(self.archive_dir, guild.id))
+            self.archivers.append(archiver)
+        forget = ((lambda batch: self.history_cache.forget([m.id for m in batch]))
+                  if self.history_cache else None)
+        batcher = DeleteBatcher(job, f"Eliminación masiva de mensajes ({message_filter.describe()})",
+                                archiver, self.request_stats, on_deleted=forget)
+        use_cache = self.uses_history_cache(message_filter, archiver)
+        if use_cache:
+            print(f"🗄️  {tag}Usando la cache local de historial (solo se descarga lo nuevo)\n")
+        
+        async def worker(channel, idx, total):
+            await self.process_channel(channel, message_filter, idx, total, job,
+                                       batcher, use_cache, report, tag)
+        
+        try:
+            await run_sweep(targets, worker)
+        finally:
+            if archiver:
+                await asyncio.to_thread(archiver.close)
+    
+    def start_job_controls(self, job: DeletionJob):
+        """
+        Lee comandos de control desde la consola mientras corre el trabajo.
+        Usa un hilo daemon (no asyncio.to_thread) para no bloquear el cierre del loop.
+        """
+        print("🎛️  Controles: [p] pausar · [r] reanudar · [c] cancelar · [l N] límite de peticiones/s (0 = sin límite)"
+              " · [f N] perfil del event loop durante N s\n")
+        
+        def read_commands():
+            while not job.done:
+                line = sys.stdin.readline()
+                if not line:
+                    return
+                cmd = line.strip().lower().split()
+                if not cmd or job.done:
+                    continue
+                if cmd[0] == 'p':
+                    job.pause()
+                    print("⏸️  En pausa. Escribe 'r' para reanudar.")
+                elif cmd[0] == 'r':
+                    job.resume()
+                    print("▶️  Reanudado.")
+                elif cmd[0] == 'c':
+                    job.cancel()
+                elif cmd[0] == 'l' and len(cmd) == 2:
+                    try:
+                        job.set_rate(float(cmd[1]))
+                        print(f"🎚️  Límite: {job.max_rate or 'sin límite'} peticiones/s")
+                    except ValueError:
+                        print("⚠️  Uso: l <peticiones por segundo>")
+                elif cmd[0] == 'f':
+                    try:
+                        self.watchdog.profile(float(cmd[1]) if len(cmd) == 2 else 10.0)
+                    except ValueError:
+                        print("⚠️  Uso: f <segundos>")
+                else:
+                    print("⚠️  Comando no reconocido (p/r/c/l N/f N).")
+        
+        threading.Thread(target=read_commands, daemon=True).start()
+    
+    def uses_history_cache(self, message_filter: MessageFilter, archiver=None) -> bool:
+        """Solo por autor y sin archivo: la cache local basta (el archivo necesita el contenido)"""
+        return (self.history_cache is not None and message_filter.matcher is None
+                and archiver is None)
+    
+    async def process_channel(self, channel: discord.abc.Messageable, message_filter: MessageFilter,
+                             current: int, total: int, job: Optional[DeletionJob] = None,
+                             batcher: Optional[DeleteBatcher] = None, use_cache: bool = False,
+                             report: Optional[GuildReport] = None, tag: str = ""):
+        """Procesa un canal o hilo individual (`report` acumula las cifras de su servidor)"""
+        label = tag + target_label(channel)
+        progress = f"[{current}/{total}] 🔍 {label}"
+        # Campos estructurados del registro JSON (log_pipeline.py)
+        fields = {"event": "channel_done", "job": job.guild_id if job else None,
+                  "channel": label, "channel_id": channel.id}
+        # Fila del informe por canal (run_report.py)
+        row = ChannelReport(channel.guild.id, channel.id, label)
+        start = time.perf_counter()
+        
+        # Los permisos ya se comprobaron para todo el servidor (preflight.py)
+        try:
+            reason = f"Eliminación masiva de mensajes ({message_filter.describe()})"
+            # Ejecutar purge con manejo robusto (pausable y con límite de ritmo)
+            if use_cache:
+                deleted_count = await purge_authors_cached(
+                    channel,
+                    self.history_cache,
+                    message_filter.author_ids,
+                    message_filter.after,
+                    job=job,
+                    reason=reason,
+                    batcher=batcher,
+                    report=row
+                )
+            else:
+                deleted_count = await purge_channel(
+                    channel,
+                    message_filter,
+                    message_filter.after,
+                    job=job,
+                    reason=reason,
+                    batcher=batcher,
+                    report=row
+                )
             
-            deleted_count = len(deleted)
             self.total_deleted += deleted_count
             self.channels_processed += 1
+            if report is not None:
+                report.deleted += deleted_count
+                report.channels += 1
             
+            # Los canales se procesan en paralelo: un solo registro completo por canal.
+            # Los canales sin mensajes van en DEBUG (solo al archivo, muestreados)
+            row.elapsed = time.perf_counter() - start  # Sin la pausa de después
+            fields.update(deleted=deleted_count, latency_ms=round(row.elapsed * 1000))
             if deleted_count > 0:
-                print(f"✅ {deleted_count} mensajes eliminados")
-                logger.info(f"Canal #{channel.name}: {deleted_count} mensajes eliminados")
+                logger.info(f"{progress}: ✅ {deleted_count} mensajes eliminados", extra=fields)
             else:
-                print("⚪ Sin mensajes")
+                logger.debug(f"{progress}: ⚪ Sin mensajes", extra=fields)
             
             # Pequeña pausa para evitar rate limits agresivos
             await asyncio.sleep(0.5)
             
         except discord.Forbidden:
-            print("❌ Sin permisos")
             self.errors_count += 1
-            logger.error(f"Sin permisos en #{channel.name}")
+            if report is not None:
+                report.errors += 1
+            row.error = "sin permisos"
+            logger.error(f"{progress}: ❌ Sin permisos", extra=fields)
         
         except discord.HTTPException as e:
-            print(f"⚠️  Error: {e}")
             self.errors_count += 1
-            logger.error(f"Error HTTP en #{channel.name}: {e}")
+            if report is not None:
+                report.errors += 1
+            row.error = f"HTTP {e.status}: {e.text}"
+            logger.error(f"{progress}: ⚠️  Error HTTP: {e}", extra=fields)
         
         except Exception as e:
-            print(f"❌ Error inesperado")
             self.errors_count += 1
-            logger.error(f"Error inesperado en #{channel.name}: {e}", exc_info=True)
+            if report is not None:
+                report.errors += 1
+            row.error = repr(e)
+            logger.error(f"{progress}: ❌ Error inesperado: {e}", exc_info=True, extra=fields)
+        
+        finally:
+            # También si el trabajo se cancela a mitad del canal: queda lo que se hizo
+            if not row.elapsed:
+                row.elapsed = time.perf_counter() - start
+            self.write_report_row(row)
+    
+    def write_report_row(self, row: ChannelReport):
+        if self.run_report is not None:
+            self.run_report.write(row)
     
     def show_summary(self):
         """Muestra resumen final de la operación"""
@@ -297,15 +684,42 @@ class MessageDeleterBot(discord.Client):
         print(f"\n✅ Mensajes eliminados: {self.total_deleted}")
         print(f"📁 Canales procesados: {self.channels_processed}")
         print(f"⚠️  Errores encontrados: {self.errors_count}")
-        print(f"\n📝 Log detallado guardado en: bot_deletion.log")
+        if self.request_stats.requests:
+            print(f"📈 Peticiones: {self.request_stats.summary()}")
+        for archiver in self.archivers:
+            print(f"📦 Mensajes archivados: {archiver.count} en {archiver.path}")
+        if self.guild_reports:
+            print()
+            for line in report_lines(*self.guild_reports):
+                print(line)
+        if self.run_report is not None and self.run_report.rows:
+            print(f"🧾 Informe por canal: {self.run_report.path} "
+                  f"(compara ejecuciones con: python src/run_report.py <antes> <después>)")
+        print(f"\n📝 Log detallado (JSON) guardado en: {LOG_FILE}")
+        if log_pipeline:
+            print(f"🪵 Logging: {log_pipeline.summary()}")
+        print(f"🩺 Event loop: {self.watchdog.summary()}")
+        if self.memory_budget:
+            print(f"🪶 Memoria: {self.memory_budget.summary()}")
         print("="*60 + "\n")
 
 
 async def main():
     """Función principal"""
-    # Cargar token
+    from dotenv import load_dotenv
+    
+    # Cargar token: .env / entorno, luego el almacén local, y solo si no hay, preguntar
     load_dotenv()
     token = os.getenv('DISCORD_TOKEN')
+    store = CredentialStore()
+    from_store = False
+    
+    if not token:
+        credentials = store.load()
+        if credentials:
+            token, from_store = credentials.token, True
+            if credentials.identity_matches:
+                print(f"🔑 Token guardado de {credentials.bot_name}")
     
     if not token:
         print("❌ ERROR: No se encontró DISCORD_TOKEN")
@@ -318,14 +732,23 @@ async def main():
         token = input("\nO ingresa el token ahora (Enter para cancelar): ").strip()
         if not token:
             return
+        if token_user_id(token) is None:
+            print("❌ Eso no parece un token de bot de Discord. Revisa que esté completo.")
+            return
+        if input("💾 ¿Guardar el token para próximos arranques? (s/n): ").strip().lower() == 's':
+            store.save_token(token)
+            from_store = True
     
     # Crear e iniciar bot
     bot = MessageDeleterBot()
+    bot.credential_store = store if from_store else None
     
     try:
         await bot.start(token)
     except discord.LoginFailure:
         logger.error("❌ Token inválido. Verifica tu DISCORD_TOKEN.")
+        if from_store:
+            store.clear()
     except KeyboardInterrupt:
         logger.info("⚠️  Proceso interrumpido por el usuario.")
     except Exception as e:
@@ -333,13 +756,7 @@ async def main():
 
 
 if __name__ == "__main__":
-    print("""
-    ╔══════════════════════════════════════════════════════════╗
-    ║     🤖 DISCORD MESSAGE DELETER BOT v1.0 (FIXED)         ║
-    ║                                                          ║
-    ║  Elimina mensajes de usuarios específicos en 7 días     ║
-    ╚══════════════════════════════════════════════════════════╝
-    """)
+    setup_logging()
     
     try:
         asyncio.run(main())
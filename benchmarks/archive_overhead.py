@@ -0,0 +1,97 @@
+"""
+Benchmark: coste del archivo de auditoría sobre la purga
+========================================================
+Ejecuta purge_channel sobre un canal sintético con y sin MessageArchiver
+y compara el throughput. Objetivo: menos de un 5% de pérdida.
+
+Uso:
+    python benchmarks/archive_overhead.py [--messages 100000] [--latency-ms 20]
+`--latency-ms` simula la latencia de cada petición a la API (0 = solo CPU).
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from archive import MessageArchiver, iter_records
+from purge import purge_channel
+
+
+class FakeObject:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+    def __str__(self):
+        return self.__dict__.get("name", "")
+
+
+class FakeChannel:
+    def __init__(self, messages, latency):
+        self.id = 42
+        self.latency = latency
+        guild = FakeObject(id=1)
+        authors = [FakeObject(id=1000 + i, name=f"spammer{i}") for i in range(10)]
+        base = datetime.now(timezone.utc) - timedelta(days=6)
+        self.messages = [
+            FakeObject(
+                id=10**17 + i, guild=guild, channel=self, author=authors[i % 10],
+                created_at=base + timedelta(seconds=i),
+                content=f"mensaje de prueba número {i} con un enlace https://spam.example/{i % 97}",
+                attachments=[],
+            )
+            for i in range(messages)
+        ]
+
+    def get_partial_message(self, message_id):
+        return self.messages[message_id - 10**17]
+
+    async def history(self, limit=None, after=None):
+        for i, msg in enumerate(self.messages):
+            if self.latency and i % 100 == 0:
+                await asyncio.sleep(self.latency)
+            yield msg
+
+    async def delete_messages(self, batch, reason=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+
+async def run(channel, archiver):
+    start = time.perf_counter()
+    deleted = await purge_channel(channel, lambda m: True, None, archiver=archiver)
+    if archiver is not None:
+        await asyncio.to_thread(archiver.close)
+    return deleted, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    channel = FakeChannel(args.messages, args.latency_ms / 1000)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.jsonl.gz")
+        base_count, base_time = asyncio.run(run(channel, None))
+        arch_count, arch_time = asyncio.run(run(channel, MessageArchiver(path)))
+
+        size = os.path.getsize(path)
+        start = time.perf_counter()
+        found = sum(1 for _ in iter_records(path, author_id=1003, text="spam.example/5"))
+        query_time = time.perf_counter() - start
+
+    overhead = (arch_time - base_time) / base_time * 100
+    print(f"sin archivo : {base_count} mensajes en {base_time:6.2f}s ({base_count / base_time:9.0f} msg/s)")
+    print(f"con archivo : {arch_count} mensajes en {arch_time:6.2f}s ({arch_count / arch_time:9.0f} msg/s)")
+    print(f"sobrecoste  : {overhead:+.1f}%   tamaño: {size / 1024:.0f} KiB ({size / arch_count:.1f} B/msg)")
+    print(f"consulta    : {found} coincidencias en {query_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
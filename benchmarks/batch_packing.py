@@ -0,0 +1,174 @@
+"""
+Benchmark: peticiones por mensaje eliminado en un barrido completo
+=================================================================
+Servidor sintético con canales de tres tipos:
+  - sin actividad en la ventana (su último mensaje es anterior),
+  - con pocos mensajes del objetivo,
+  - con mucho tráfico y muchos mensajes del objetivo,
+y algunos mensajes de más de 14 días si la ventana es mayor (Discord rechaza
+el bulk delete de esos).
+
+Compara la purga anterior (un historial por canal siempre, bulk de todo y, si
+Discord rechaza el lote, reintento uno a uno) con purge_channel y un
+DeleteBatcher compartido. Cuenta peticiones a la API, no tiempo.
+
+Uso:
+    python benchmarks/batch_packing.py [--channels 300] [--quiet-ratio 0.6] [--window-days 7 21]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from discord.utils import time_snowflake
+from purge import BULK_LIMIT, BULK_MAX_AGE, PAGE_SIZE, DeleteBatcher, RequestStats, purge_channel
+
+TARGET = 1000
+
+
+class BulkRejected(Exception):
+    """Como el 400 de Discord al pedir bulk delete de mensajes de más de 14 días"""
+
+
+class FakeObject:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class FakeChannel:
+    def __init__(self, channel_id, messages, counter):
+        self.id = channel_id
+        self.messages = messages
+        self.counter = counter
+        self.last_message_id = messages[-1].id if messages else None
+        self.by_id = {m.id: m for m in messages}
+
+    def get_partial_message(self, message_id):
+        return self.by_id[message_id]
+
+    async def history(self, limit=None, after=None):
+        visible = [m for m in self.messages if m.created_at > after]
+        self.counter["history"] += 1  # Primera página (vacía o no)
+        for i, msg in enumerate(visible, 1):
+            yield msg
+            if i % PAGE_SIZE == 0:
+                self.counter["history"] += 1
+
+    async def delete_messages(self, messages, reason=None):
+        self.counter["bulk"] += 1
+        limit = datetime.now(timezone.utc) - BULK_MAX_AGE
+        if any(m.created_at <= limit for m in messages):
+            raise BulkRejected()
+        self.counter["deleted"] += len(messages)
+
+
+def make_message(channel_id, author_id, created_at, counter):
+    msg = FakeObject(id=time_snowflake(created_at) + random.randrange(1 << 22), created_at=created_at,
+                     author=FakeObject(id=author_id))
+
+    async def delete():
+        counter["single"] += 1
+        counter["deleted"] += 1
+
+    msg.delete = delete
+    return msg
+
+
+def build_guild(args, window, counter):
+    random.seed(args.seed)
+    now = datetime.now(timezone.utc)
+    channels = []
+    for c in range(args.channels):
+        roll = random.random()
+        if roll < args.quiet_ratio:
+            # Último mensaje antes de la ventana
+            count, span = random.randint(1, 20), (window + timedelta(days=5), window + timedelta(days=1))
+        elif roll < args.quiet_ratio + (1 - args.quiet_ratio) * 0.7:
+            count, span = random.randint(1, 30), (window, timedelta(0))
+        else:
+            count, span = random.randint(300, 2000), (window, timedelta(0))
+        start, end = span
+        messages = []
+        for _ in range(count):
+            age = end + (start - end) * random.random()
+            author = TARGET if random.random() < 0.3 else random.randint(1, 500)
+            messages.append(make_message(c, author, now - age, counter))
+        messages.sort(key=lambda m: m.id)
+        channels.append(FakeChannel(c, messages, counter))
+    return channels
+
+
+async def baseline_purge(channel, check, after):
+    """purge_channel anterior: siempre pide historial y manda todo por bulk"""
+    batch = []
+
+    async def send(batch):
+        if len(batch) == 1:
+            await batch[0].delete()
+            return
+        try:
+            await channel.delete_messages(batch)
+        except BulkRejected:
+            for msg in batch:
+                await msg.delete()
+
+    async for msg in channel.history(limit=None, after=after):
+        if check(msg):
+            batch.append(msg)
+            if len(batch) == BULK_LIMIT:
+                await send(batch)
+                batch = []
+    if batch:
+        await send(batch)
+
+
+async def sweep(args, window_days, optimised):
+    counter = dict(history=0, bulk=0, single=0, deleted=0)
+    window = timedelta(days=window_days)
+    channels = build_guild(args, window, counter)
+    after = datetime.now(timezone.utc) - window
+    check = lambda msg: msg.author.id == TARGET
+    stats = RequestStats()
+    batcher = DeleteBatcher(stats=stats)
+    for channel in channels:
+        if optimised:
+            await purge_channel(channel, check, after, batcher=batcher)
+        else:
+            await baseline_purge(channel, check, after)
+    if optimised:
+        # Lo contado por RequestStats debe cuadrar con las peticiones que vio el servidor falso
+        assert (stats.history, stats.bulk, stats.single) == (counter["history"], counter["bulk"], counter["single"])
+    return counter
+
+
+def report(label, counter):
+    requests = counter["history"] + counter["bulk"] + counter["single"]
+    per = requests / counter["deleted"] if counter["deleted"] else float(requests)
+    print(f"  {label:<10}: {requests:6d} peticiones ({counter['history']} historial, {counter['bulk']} bulk, "
+          f"{counter['single']} individuales) · {counter['deleted']} eliminados · {per:.3f} pet./msg")
+    return requests
+
+
+async def run(args):
+    for window_days in args.window_days:
+        print(f"ventana {window_days} días, {args.channels} canales ({args.quiet_ratio:.0%} sin actividad):")
+        before = report("anterior", await sweep(args, window_days, False))
+        after = report("batcher", await sweep(args, window_days, True))
+        print(f"  ahorro    : {1 - after / before:.1%} de las peticiones\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--channels", type=int, default=300)
+    parser.add_argument("--quiet-ratio", type=float, default=0.6)
+    parser.add_argument("--window-days", type=int, nargs="+", default=[7, 21])
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Benchmark: tiempo de reinicio hasta "listo" con IDENTIFY y con RESUME
+====================================================================
+Levanta un gateway falso local (aiohttp: login HTTP + websocket) que se
+comporta como Discord en lo que importa para el arranque:
+  - IDENTIFY -> READY + un GUILD_CREATE por servidor, más las respuestas
+    a la descarga de miembros (op 8),
+  - RESUME de una sesión conocida -> RESUMED,
+y mide cuánto tarda un ResumableClient en disparar on_ready en un arranque en
+frío frente a un reinicio que reanuda la sesión guardada al cerrar.
+
+Uso:
+    python benchmarks/gateway_resume.py [--guilds 100] [--channels 30] [--latency-ms 40] [--runs 3]
+`--latency-ms` simula la latencia de red de cada mensaje del gateway.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import discord
+import yarl
+from discord.gateway import DiscordWebSocket
+from session_resume import ResumableClient
+
+BOT_ID = 555000000000000001
+TOKEN = base64.b64encode(str(BOT_ID).encode()).decode().rstrip("=") + ".Gabcde.fake-token-for-benchmark"
+JOINED = "2024-01-01T00:00:00+00:00"
+
+
+def user_payload(user_id, name):
+    return {"id": str(user_id), "username": name, "discriminator": "0", "avatar": None, "global_name": None}
+
+
+def guild_payload(guild_id, channels, members):
+    return {
+        "id": str(guild_id), "name": f"servidor-{guild_id}", "owner_id": "1", "unavailable": False,
+        "member_count": members + 1, "large": False, "features": [], "emojis": [], "stickers": [],
+        "roles": [{"id": str(guild_id), "name": "@everyone", "permissions": "1024", "position": 0,
+                   "color": 0, "hoist": False, "managed": False, "mentionable": False}],
+        "channels": [{"id": str(guild_id * 1000 + c), "name": f"canal-{c}", "type": 0, "position": c,
+                      "permission_overwrites": [], "guild_id": str(guild_id)} for c in range(channels)],
+        "members": [{"user": user_payload(BOT_ID, "bot"), "roles": [], "joined_at": JOINED,
+                     "deaf": False, "mute": False, "flags": 0}],
+        "presences": [], "voice_states": [], "threads": [], "stage_instances": [],
+        "guild_scheduled_events": [], "premium_tier": 0,
+    }
+
+
+def json_response(data):
+    # discord.py solo decodifica si el content-type es exactamente application/json (sin charset)
+    return web.Response(body=json.dumps(data).encode(), content_type="application/json")
+
+
+class FakeGateway:
+    def __init__(self, guilds, channels, members, latency):
+        self.guilds = [guild_payload(1000 + g, channels, members) for g in range(guilds)]
+        self.members = members
+        self.latency = latency
+        self.sessions = {}
+        self.identifies = 0
+        self.resumes = 0
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/api/v10/users/@me", self.users_me)
+        app.router.add_get("/api/v10/oauth2/applications/@me", self.application)
+        app.router.add_get("/ws", self.websocket)
+        return app
+
+    async def users_me(self, request):
+        return json_response(dict(user_payload(BOT_ID, "bot"), bot=True))
+
+    async def application(self, request):
+        return json_response({
+            "id": str(BOT_ID), "name": "bot", "icon": None, "description": "", "rpc_origins": [],
+            "bot_public": True, "bot_require_code_grant": False, "verify_key": "", "flags": 0,
+            "owner": user_payload(1, "owner"), "team": None,
+        })
+
+    async def websocket(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        state = {"seq": 0, "session": None}
+
+        async def send(op, data=None, event=None):
+            await asyncio.sleep(self.latency)
+            payload = {"op": op, "d": data, "s": None, "t": event}
+            if op == 0:
+                state["seq"] += 1
+                payload["s"] = state["seq"]
+                self.sessions[state["session"]] = state["seq"]
+            await ws.send_str(json.dumps(payload))
+
+        await send(10, {"heartbeat_interval": 45000})
+        async for msg in ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                break
+            payload = json.loads(msg.data)
+            op, data = payload["op"], payload["d"]
+            if op == 1:
+                await send(11)
+            elif op == 2:
+                self.identifies += 1
+                state["session"] = f"s{len(self.sessions)}"
+                self.sessions[state["session"]] = 0
+                await send(0, {
+                    "v": 10, "user": user_payload(BOT_ID, "bot"), "session_id": state["session"],
+                    "resume_gateway_url": str(request.url.with_query(None)),
+                    "guilds": [{"id": g["id"], "unavailable": True} for g in self.guilds],
+                    "application": {"id": str(BOT_ID), "flags": 0},
+                }, "READY")
+                for guild in self.guilds:
+                    await send(0, guild, "GUILD_CREATE")
+            elif op == 6:
+                if data["session_id"] in self.sessions:
+                    self.resumes += 1
+                    state["session"] = data["session_id"]
+                    state["seq"] = self.sessions[state["session"]]
+                    await send(0, {}, "RESUMED")
+                else:
+                    await send(9, False)
+            elif op == 8:
+                members = [{"user": user_payload(2000 + m, f"user{m}"), "roles": [], "joined_at": JOINED,
+                            "deaf": False, "mute": False, "flags": 0} for m in range(self.members)]
+                await send(0, {"guild_id": str(data["guild_id"]), "members": members, "chunk_index": 0,
+                               "chunk_count": 1, "nonce": data.get("nonce")}, "GUILD_MEMBERS_CHUNK")
+        return ws
+
+
+async def launch(session_path):
+    """Arranca un cliente, devuelve (segundos hasta on_ready, ¿reanudó?, nº de servidores) y lo cierra guardando la sesión"""
+    intents = discord.Intents.default()
+    intents.message_content = True
+    intents.members = True
+    client = ResumableClient(intents=intents, session_path=session_path)
+    ready = asyncio.Event()
+
+    @client.event
+    async def on_ready():
+        ready.set()
+
+    start = time.perf_counter()
+    task = asyncio.create_task(client.start(TOKEN))
+    waiter = asyncio.create_task(ready.wait())
+    await asyncio.wait([task, waiter], return_when=asyncio.FIRST_COMPLETED)
+    if task.done():
+        waiter.cancel()
+        task.result()  # Propaga el error del cliente
+        raise RuntimeError("El cliente se cerró sin llegar a on_ready")
+    elapsed = time.perf_counter() - start
+    result = (elapsed, client.resumed_session, len(client.guilds))
+    await client.close_resumable()
+    await task
+    return result
+
+
+async def run(args):
+    gateway = FakeGateway(args.guilds, args.channels, args.members, args.latency_ms / 1000)
+    runner = web.AppRunner(gateway.app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    discord.http.Route.BASE = f"http://127.0.0.1:{port}/api/v10"
+    DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(f"ws://127.0.0.1:{port}/ws")
+
+    cold, warm = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sesion.json.gz")
+        for _ in range(args.runs):
+            if os.path.exists(path):
+                os.remove(path)
+            elapsed, resumed, guilds = await launch(path)
+            assert not resumed and guilds == args.guilds
+            cold.append(elapsed)
+            elapsed, resumed, guilds = await launch(path)
+            assert resumed and guilds == args.guilds, "el reinicio no reanudó la sesión"
+            warm.append(elapsed)
+    await runner.cleanup()
+
+    print(f"servidores  : {args.guilds} × {args.channels} canales, {args.members} miembros, "
+          f"latencia {args.latency_ms:.0f} ms")
+    print(f"IDENTIFY    : mediana {statistics.median(cold):6.2f}s   ({gateway.identifies} identifies)")
+    print(f"RESUME      : mediana {statistics.median(warm):6.2f}s   ({gateway.resumes} resumes)")
+    print(f"aceleración : x{statistics.median(cold) / statistics.median(warm):.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--guilds", type=int, default=100)
+    parser.add_argument("--channels", type=int, default=30)
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--runs", type=int, default=3)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark: bloqueo del event loop por logging durante una purga grande
+=====================================================================
+Simula el ritmo de registros de una purga con muchos canales en paralelo
+(un registro por canal y uno de DEBUG por lote borrado) y mide, dentro del
+event loop:
+  - el tiempo total pasado dentro de las llamadas a logging,
+  - el retraso máximo de un temporizador de 1 ms (lo que nota el heartbeat).
+Compara la configuración anterior (basicConfig: consola + archivo síncronos)
+con LogPipeline (QueueHandler + QueueListener, JSON con rotación y muestreo).
+
+`--console-us` simula una terminal lenta (microsegundos por escritura;
+la consola de Windows suele rondar 100-500).
+
+Uso:
+    python benchmarks/log_blocking.py [--records 50000] [--console-us 200]
+"""
+
+import argparse
+import asyncio
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from log_pipeline import LogPipeline
+
+logger = logging.getLogger("benchmark")
+
+
+class SlowConsole(io.TextIOBase):
+    """Terminal falsa: cada escritura bloquea `delay` segundos (E/S síncrona, suelta el GIL)"""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def write(self, text):
+        time.sleep(self.delay)
+        return len(text)
+
+
+def install_basic(path, console):
+    """Lo que hacía ChakielBotDiscord.setup_logging antes"""
+    root = logging.getLogger()
+    root.handlers[:] = []
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s",
+                        handlers=[logging.StreamHandler(console), logging.FileHandler(path, encoding="utf-8")],
+                        force=True)
+
+
+def install_pipeline(path, console):
+    pipeline = LogPipeline(path)
+    # Misma terminal lenta para comparar en igualdad
+    pipeline.listener.handlers[1].setStream(console)
+    return pipeline.install()
+
+
+async def purge_like(records):
+    """Emite registros como una purga: por cada canal, varios lotes en DEBUG y un resumen en INFO"""
+    in_logging = 0.0
+    for i in range(records):
+        channel = i // 5
+        start = time.perf_counter()
+        if i % 5 == 4:
+            logger.info(f"[{channel}/?] 🔍 #canal-{channel}: ✅ 100 mensajes eliminados",
+                        extra={"event": "channel_done", "job": 1, "channel": f"#canal-{channel}",
+                               "deleted": 100, "latency_ms": 850})
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Lote borrado", extra={"event": "delete_request", "job": 1, "channel_id": channel,
+                                                "count": 100, "latency_ms": 120.0})
+        in_logging += time.perf_counter() - start
+        if i % 50 == 0:
+            await asyncio.sleep(0)  # Otras tareas del loop (red, heartbeat)
+    return in_logging
+
+
+async def measure(records):
+    lags = []
+
+    async def ticker():
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - start - 0.001)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    in_logging = await purge_like(records)
+    elapsed = time.perf_counter() - start
+    tick.cancel()
+    return in_logging, max(lags, default=0.0), elapsed
+
+
+def run(label, install, args, tmp):
+    console = SlowConsole(args.console_us / 1e6)
+    path = os.path.join(tmp, f"{label}.log")
+    pipeline = install(path, console)
+    in_logging, max_lag, elapsed = asyncio.run(measure(args.records))
+    drain = time.perf_counter()
+    if pipeline is not None:
+        pipeline.stop()  # Vaciar la cola (fuera del loop)
+    drain = time.perf_counter() - drain
+    size = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp) if f.startswith(label))
+    print(f"{label:<9}: {in_logging * 1000:8.1f} ms dentro de logging en el loop "
+          f"({in_logging / args.records * 1e6:6.1f} µs/registro), retraso máx. {max_lag * 1000:6.1f} ms, "
+          f"purga {elapsed:5.2f}s, vaciado posterior {drain:5.2f}s, {size / 1024:.0f} KB en disco")
+    return in_logging
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=50000)
+    parser.add_argument("--console-us", type=float, default=200.0)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        before = run("basic", install_basic, args, tmp)
+        after = run("pipeline", install_pipeline, args, tmp)
+    print(f"bloqueo del loop: x{before / after:.0f} menos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: throughput del matcher de contenido
+==============================================
+Compila miles de palabras clave, dominios y algunas regex en un ContentMatcher
+y lo pasa sobre millones de mensajes sintéticos. Como referencia se mide
+también la comprobación ingenua (un patrón tras otro) sobre una muestra.
+
+Uso:
+    python benchmarks/matcher_throughput.py [--patterns 5000] [--messages 1000000]
+"""
+
+import argparse
+import os
+import random
+import re
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from matcher import ContentMatcher
+
+WORDS = ["hola", "que", "tal", "el", "server", "juego", "mañana", "partida", "gracias", "jaja",
+         "alguien", "sabe", "como", "canal", "voz", "imagen", "link", "mira", "esto", "bueno"]
+
+
+def random_token(rng, length):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(length))
+
+
+def build_patterns(rng, count):
+    keywords = [f"{random_token(rng, 5)} {random_token(rng, 6)}" for _ in range(count // 2)]
+    domains = [f"{random_token(rng, 8)}.{rng.choice(['com', 'net', 'xyz', 'gg'])}" for _ in range(count // 2 - 10)]
+    regexes = [rf"disc[o0]rd-?{random_token(rng, 4)}\.gift/\w+" for _ in range(10)]
+    return keywords, regexes, domains
+
+
+def build_messages(rng, count, keywords, domains, spam_ratio=0.02):
+    base = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 25))) for _ in range(5000)]
+    messages = []
+    for i in range(count):
+        text = base[i % len(base)]
+        if rng.random() < spam_ratio:
+            text += " " + (rng.choice(keywords) if rng.random() < 0.5 else f"https://{rng.choice(domains)}/x")
+        messages.append(text)
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patterns", type=int, default=5000)
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--naive-sample", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = random.Random(1234)
+    keywords, regexes, domains = build_patterns(rng, args.patterns)
+    messages = build_messages(rng, args.messages, keywords, domains)
+
+    start = time.perf_counter()
+    matcher = ContentMatcher(keywords, regexes, domains)
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    hits = sum(1 for text in messages if matcher.search(text))
+    elapsed = time.perf_counter() - start
+
+    # Referencia ingenua: cada patrón por separado (muestra pequeña)
+    compiled = [re.compile(re.escape(k), re.IGNORECASE) for k in keywords + domains]
+    compiled += [re.compile(r, re.IGNORECASE) for r in regexes]
+    sample = messages[:args.naive_sample]
+    start = time.perf_counter()
+    naive_hits = sum(1 for text in sample if any(p.search(text) for p in compiled))
+    naive_elapsed = time.perf_counter() - start
+
+    print(f"patrones    : {len(matcher)} (compilados en {compile_time * 1000:.0f} ms)")
+    print(f"matcher     : {args.messages} mensajes en {elapsed:6.2f}s -> {args.messages / elapsed:10.0f} msg/s ({hits} coincidencias)")
+    print(f"ingenuo     : {len(sample)} mensajes en {naive_elapsed:6.2f}s -> {len(sample) / naive_elapsed:10.0f} msg/s ({naive_hits} coincidencias)")
+    print(f"aceleración : x{(args.messages / elapsed) / (len(sample) / naive_elapsed):.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Benchmark: memoria máxima (RSS) de una purga sintética de un millón de mensajes
+==============================================================================
+Un servidor grande (--members miembros, --channels canales) con objetos reales
+de discord.py (Guild, Member, TextChannel, Message) y la purga real
+(purge_channel + DeleteBatcher, 4 canales a la vez), sin red: el historial se
+genera al vuelo y los borrados no esperan. Cada página del historial llega
+también un mensaje nuevo por el gateway (un servidor con actividad), que
+entra en la cache de mensajes del cliente si la hay.
+
+Cada modo corre en un proceso aparte y mide su RSS máximo:
+  - normal: opciones por defecto del cliente (cache de 1000 mensajes y lista
+    de miembros completa, descargada al conectar),
+  - poca memoria: client_options() + MemoryBudget (DELETE_MEMORY_BUDGET_MB).
+Además compara, con tracemalloc, leer de la HistoryCache los IDs de un
+millón de mensajes de golpe (lista) o por páginas (HistoryCache.authored).
+
+Uso:
+    python benchmarks/memory_budget.py [--messages 1000000] [--members 200000] [--budget 256]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import discord
+from discord.utils import time_snowflake
+from history_cache import HistoryCache
+from jobs import DeletionJob
+from memory_budget import MemoryBudget, client_options, current_rss
+from purge import PAGE_SIZE, DeleteBatcher, purge_channel
+from sweep import run_sweep
+
+GUILD_ID = 1 << 40
+TARGET = 4242
+BOT_ID = 99
+CONTENT = "mensaje de prueba con algo de texto, un enlace https://example.com/ruta y una mención <@4242> " * 2
+
+
+def user_payload(user_id):
+    return {"id": str(user_id), "username": f"usuario{user_id}", "discriminator": "0",
+            "global_name": None, "avatar": None}
+
+
+def member_payload(user_id):
+    return {"user": user_payload(user_id), "roles": [], "joined_at": "2024-01-01T00:00:00+00:00",
+            "deaf": False, "mute": False, "nick": None, "flags": 0}
+
+
+def build_guild(state, args, chunk):
+    state.user = discord.ClientUser(state=state, data={**user_payload(BOT_ID), "bot": True,
+                                                       "verified": True, "mfa_enabled": False})
+    guild = discord.Guild(state=state, data={
+        "id": str(GUILD_ID), "name": "servidor-grande", "member_count": args.members,
+        "roles": [{"id": str(GUILD_ID), "name": "@everyone", "permissions": str(0x2000 | 0x10000 | 0x400),
+                   "position": 0, "color": 0, "hoist": False, "managed": False, "mentionable": False}],
+        "members": [member_payload(BOT_ID)], "channels": [],
+    })
+    state._add_guild(guild)
+    if chunk:
+        # Lo que hace el cliente al conectar con intents.members (chunk_guilds_at_startup)
+        for user_id in range(1000, 1000 + args.members):
+            guild._add_member(discord.Member(data=member_payload(user_id), guild=guild, state=state))
+    return guild
+
+
+class SyntheticPartialMessage(discord.PartialMessage):
+    """PartialMessage real cuyo borrado individual no va a la red"""
+
+    async def delete(self, *, delay=None):
+        await asyncio.sleep(0)
+
+
+class SyntheticChannel:
+    """TextChannel real con historial generado al vuelo y borrados sin red"""
+
+    def __init__(self, channel, state, start, count, live):
+        self.channel = channel
+        self.id = channel.id
+        self.guild = channel.guild
+        self.state = state
+        self.start = start
+        self.count = count
+        self.live = live
+        self.last_message_id = start + count
+
+    def message(self, message_id, author_id):
+        return discord.Message(state=self.state, channel=self.channel, data={
+            "id": str(message_id), "channel_id": str(self.id), "guild_id": str(GUILD_ID),
+            "author": user_payload(author_id), "content": CONTENT, "timestamp": "2024-01-01T00:00:00+00:00",
+            "edited_timestamp": None, "tts": False, "mention_everyone": False, "mentions": [],
+            "mention_roles": [], "attachments": [], "embeds": [], "pinned": False, "type": 0,
+        })
+
+    async def history(self, limit=None, after=None):
+        for i in range(self.count):
+            # Relleno con IDs de 5000 en adelante: nunca coinciden con TARGET
+            yield self.message(self.start + i, TARGET if i % 2 else 5000 + i % 5000)
+            if (i + 1) % PAGE_SIZE == 0:
+                # Mientras tanto llega un mensaje nuevo por el gateway
+                if self.state._messages is not None:
+                    self.state._messages.append(self.message(self.start + self.count + i, 1000))
+                self.live[0] += 1
+                await asyncio.sleep(0)
+
+    def get_partial_message(self, message_id):
+        return SyntheticPartialMessage(channel=self.channel, id=message_id)
+
+    async def delete_messages(self, messages, reason=None):
+        await asyncio.sleep(0)
+
+
+async def purge(args, low_memory):
+    budget = MemoryBudget(args.budget, report=print) if low_memory else None
+    intents = discord.Intents.default()
+    intents.members = True
+    intents.message_content = True
+    client = discord.Client(intents=intents, **client_options(budget))
+    state = client._connection
+    guild = build_guild(state, args, chunk=not low_memory)
+
+    now = datetime.now(timezone.utc)
+    per_channel = args.messages // args.channels
+    live = [0]
+    targets = []
+    for c in range(args.channels):
+        channel = discord.TextChannel(state=state, guild=guild, data={
+            "id": str(GUILD_ID + 1 + c), "type": 0, "name": f"canal-{c}", "position": c,
+            "guild_id": str(GUILD_ID), "permission_overwrites": [], "nsfw": False, "parent_id": None,
+        })
+        guild._add_channel(channel)
+        start = time_snowflake(now - timedelta(days=6)) + c * (per_channel * 2 + 1)
+        targets.append(SyntheticChannel(channel, state, start, per_channel, live))
+
+    job = DeletionJob(guild.id, asyncio.get_running_loop(), budget=budget)
+    batcher = DeleteBatcher(job)
+    check = lambda msg: msg.author.id == TARGET
+    after = now - timedelta(days=7)
+
+    async def worker(channel, idx, total):
+        await purge_channel(channel, check, after, job=job, batcher=batcher)
+
+    samples = []
+
+    async def sampler():
+        while True:
+            samples.append(current_rss() or 0)
+            await asyncio.sleep(0.25)
+
+    watch = asyncio.ensure_future(sampler())
+    start = time.perf_counter()
+    await run_sweep(targets, worker, 4)
+    elapsed = time.perf_counter() - start
+    watch.cancel()
+    return {
+        "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "end_mb": (current_rss() or 0) / (1024 * 1024),
+        "elapsed": elapsed,
+        "deleted": batcher.stats.deleted,
+        "members": len(guild._members),
+        "cached_messages": len(state._messages or ()),
+        "episodes": budget.episodes if budget else 0,
+        "samples": [round(s / (1024 * 1024)) for s in samples[::max(1, len(samples) // 12)]],
+    }
+
+
+def cache_ids(args):
+    """IDs de un millón de mensajes de la cache: lista completa frente a páginas"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = HistoryCache(os.path.join(tmp, "cache.sqlite3"))
+        after = datetime.now(timezone.utc) - timedelta(days=7)
+        first = time_snowflake(after) + 1
+        with cache._db:
+            cache._db.executemany("INSERT INTO messages VALUES (?, 1, ?, 0)",
+                                  ((first + i, TARGET) for i in range(args.messages)))
+        query = "SELECT message_id FROM messages WHERE channel_id = 1 AND author_id IN (?) AND message_id > ? ORDER BY message_id"
+
+        tracemalloc.start()
+        ids = [row[0] for row in cache._db.execute(query, (TARGET, time_snowflake(after)))]  # Lo que se hacía antes
+        for _ in ids:
+            pass
+        listed = tracemalloc.get_traced_memory()[1]
+        del ids
+        tracemalloc.reset_peak()
+        for _ in cache.authored(1, [TARGET], after):
+            pass
+        streamed = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        cache.close()
+    return {"list_mb": listed / (1024 * 1024), "stream_mb": streamed / (1024 * 1024)}
+
+
+def child(args):
+    if args.child == "cache":
+        result = cache_ids(args)
+    else:
+        result = asyncio.run(purge(args, args.child == "low"))
+    print(json.dumps(result))
+
+
+def run_child(mode, args):
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", mode, "--messages", str(args.messages),
+           "--members", str(args.members), "--channels", str(args.channels), "--budget", str(args.budget)]
+    out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--members", type=int, default=200_000)
+    parser.add_argument("--channels", type=int, default=40)
+    parser.add_argument("--budget", type=float, default=256, help="Presupuesto del modo de poca memoria (MB)")
+    parser.add_argument("--child", choices=["normal", "low", "cache"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args)
+
+    print(f"{args.messages} mensajes en {args.channels} canales, {args.members} miembros\n")
+    for mode, label in (("normal", "normal"), ("low", "poca memoria")):
+        r = run_child(mode, args)
+        print(f"{label:<13}: RSS máx. {r['peak_mb']:6.0f} MB (al final {r['end_mb']:4.0f} MB), "
+              f"{r['deleted']} borrados en {r['elapsed']:5.1f}s, {r['members']} miembros y "
+              f"{r['cached_messages']} mensajes en cache, {r['episodes']} veces sobre el presupuesto")
+        print(f"{'':<13}  RSS durante la purga (MB): {' '.join(map(str, r['samples']))}")
+    r = run_child("cache", args)
+    print(f"\nIDs de la cache de historial: lista {r['list_mb']:.1f} MB, por páginas {r['stream_mb']:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
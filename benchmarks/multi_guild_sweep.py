@@ -0,0 +1,161 @@
+"""
+Benchmark: barrido de todos los servidores, uno tras otro frente a la vez
+========================================================================
+Servidores sintéticos de tamaño desigual (canales y mensajes del objetivo)
+con latencia simulada por petición. Compara:
+  - secuencial: un servidor detrás de otro (lo que había que hacer antes),
+  - paralelo: run_guilds con un JobGroup.
+Los dos respetan el mismo techo global de peticiones/s. El paralelo debería
+tardar cerca del servidor más lento (o de peticiones / techo global, si eso
+es mayor) y no la suma.
+
+Uso:
+    python benchmarks/multi_guild_sweep.py [--guilds 12] [--latency-ms 150] [--global-rate 40]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from discord.utils import time_snowflake
+from jobs import DeletionJob, JobGroup, JobRegistry, RateLimiter
+from multi_guild import report_lines, run_guilds
+from purge import PAGE_SIZE, DeleteBatcher, RequestStats, purge_channel
+from sweep import run_sweep
+
+TARGET = 1000
+
+
+class FakeObject:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class FakeChannel:
+    def __init__(self, channel_id, messages, latency, log):
+        self.id = channel_id
+        self.messages = messages
+        self.latency = latency
+        self.log = log  # Momentos de cada petición (para medir el ritmo global)
+        self.last_message_id = messages[-1].id if messages else None
+        self.by_id = {m.id: m for m in messages}
+
+    def get_partial_message(self, message_id):
+        return self.by_id[message_id]
+
+    async def _request(self):
+        self.log.append(time.perf_counter())
+        await asyncio.sleep(self.latency)
+
+    async def history(self, limit=None, after=None):
+        await self._request()
+        for i, msg in enumerate(self.messages, 1):
+            yield msg
+            if i % PAGE_SIZE == 0:
+                await self._request()
+
+    async def delete_messages(self, messages, reason=None):
+        await self._request()
+
+
+def build_guilds(args, log):
+    random.seed(args.seed)
+    now = datetime.now(timezone.utc)
+    guilds = []
+    for g in range(args.guilds):
+        # Tamaños muy distintos: unos pocos servidores grandes y muchos pequeños
+        channels = []
+        for c in range(random.choice([4, 8, 16, 40])):
+            messages = []
+            for _ in range(random.randint(50, 600)):
+                created = now - timedelta(days=6) * random.random()
+                msg = FakeObject(id=time_snowflake(created) + random.randrange(1 << 22), created_at=created,
+                                 author=FakeObject(id=TARGET if random.random() < 0.4 else 1))
+                messages.append(msg)
+            messages.sort(key=lambda m: m.id)
+            channels.append(FakeChannel(g * 1000 + c, messages, args.latency_ms / 1000, log))
+        guilds.append(FakeObject(id=g + 1, name=f"servidor-{g + 1}", channels=channels))
+    return guilds
+
+
+async def sweep_guild(guild, job, stats, report=None):
+    after = datetime.now(timezone.utc) - timedelta(days=7)
+    batcher = DeleteBatcher(job, stats=stats)
+    check = lambda msg: msg.author.id == TARGET
+
+    async def worker(channel, idx, total):
+        deleted = await purge_channel(channel, check, after, job=job, batcher=batcher)
+        if report is not None:
+            report.channels += 1
+            report.deleted += deleted
+
+    await run_sweep(guild.channels, worker)
+
+
+async def sequential(args):
+    log = []
+    guilds = build_guilds(args, log)
+    loop = asyncio.get_running_loop()
+    stats = RequestStats()
+    start = time.perf_counter()
+    limiter = RateLimiter(args.global_rate)
+    for guild in guilds:
+        await sweep_guild(guild, DeletionJob(guild.id, loop, shared_limit=limiter), stats)
+    return time.perf_counter() - start, stats, log
+
+
+async def parallel(args):
+    log = []
+    guilds = build_guilds(args, log)
+    stats = RequestStats()
+    group = JobGroup(asyncio.get_running_loop(), global_rate=args.global_rate)
+    registry = JobRegistry()
+    plan = [(guild, group.add(guild.id, registry)) for guild in guilds]
+
+    async def run_one(guild, job, report):
+        await sweep_guild(guild, job, stats, report)
+
+    reports, elapsed = await run_guilds(plan, run_one)
+    return elapsed, stats, log, reports
+
+
+def peak_rate(log, window=1.0):
+    """Máximo de peticiones en cualquier ventana de `window` segundos"""
+    log.sort()
+    peak, lo = 0, 0
+    for hi, t in enumerate(log):
+        while t - log[lo] > window:
+            lo += 1
+        peak = max(peak, hi - lo + 1)
+    return peak / window
+
+
+async def run(args):
+    seq_time, seq_stats, seq_log = await sequential(args)
+    par_time, par_stats, par_log, reports = await parallel(args)
+    for line in report_lines(reports, par_time):
+        print(line)
+    print()
+    print(f"secuencial : {seq_time:6.1f}s  ({seq_stats.requests} peticiones, pico {peak_rate(seq_log):.0f}/s)")
+    print(f"paralelo   : {par_time:6.1f}s  ({par_stats.requests} peticiones, pico {peak_rate(par_log):.0f}/s, "
+          f"techo {args.global_rate:.0f}/s)")
+    print(f"aceleración: x{seq_time / par_time:.1f}  (mínimo por techo global: "
+          f"{par_stats.requests / args.global_rate:.1f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--guilds", type=int, default=12)
+    parser.add_argument("--latency-ms", type=float, default=150.0)
+    parser.add_argument("--global-rate", type=float, default=40.0)
+    parser.add_argument("--seed", type=int, default=3)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Benchmark: peticiones perdidas en canales prohibidos y coste de resolver permisos
+================================================================================
+Servidor sintético con objetos reales de discord.py y overwrites complejos:
+categorías con overwrites de muchos roles (los canales sincronizados las
+heredan), canales con overwrites propios, categorías que ocultan o quitan
+"gestionar mensajes" al rol del bot, y hilos activos y archivados, algunos
+privados sin el bot como miembro. Las llamadas de listado de hilos se
+contestan en local y se cuentan.
+
+Compara:
+  - antes: collect_targets sin planificador y la comprobación canal por canal
+    (permissions_for en cada uno) que hacían process_channel / el worker,
+  - preflight: PermissionPlanner (una resolución por combinación de overwrites).
+Una petición es inútil si va a un canal donde el trabajo no puede borrar:
+listar hilos archivados bajo un canal sin "gestionar mensajes" o pedir el
+historial de un hilo privado al que el bot no tiene acceso (Forbidden).
+Las decisiones del planificador se contrastan con discord.py canal a canal.
+
+Uso:
+    python benchmarks/permission_preflight.py [--categories 25] [--per-category 12] [--archived 150]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import discord
+from discord.utils import time_snowflake
+from preflight import PermissionPlanner, describe_skipped
+from sweep import ThreadCache, collect_targets, target_label
+
+GUILD_ID = 1 << 40
+BOT_ID = 99
+BOT_ROLE = GUILD_ID + 1
+ROLES = 40
+P = discord.Permissions
+EVERYONE = P(view_channel=True, read_message_history=True, send_messages=True)
+BOT_PERMS = P(view_channel=True, read_message_history=True, manage_messages=True)
+
+
+def iso(moment):
+    return moment.isoformat()
+
+
+def overwrite(target_id, kind, allow=P.none(), deny=P.none()):
+    return {"id": str(target_id), "type": kind, "allow": str(allow.value), "deny": str(deny.value)}
+
+
+class FakeHTTP:
+    """Listados de hilos contestados en local; cuenta las llamadas por canal"""
+
+    def __init__(self, active, archived):
+        self.active = active  # [payload]
+        self.archived = archived  # parent_id -> ([públicos], [privados])
+        self.calls = []  # channel_id (0 = todo el servidor)
+
+    async def get_active_threads(self, guild_id):
+        self.calls.append(0)
+        members = [{"id": t["id"], "user_id": str(BOT_ID), "join_timestamp": t["thread_metadata"]["archive_timestamp"],
+                    "flags": 0} for t in self.active if t.get("_joined")]
+        return {"threads": self.active, "members": members}
+
+    async def _page(self, threads, channel_id, before, limit):
+        self.calls.append(channel_id)
+        if before is not None:
+            threads = [t for t in threads if t["thread_metadata"]["archive_timestamp"] < before]
+        return {"threads": threads[:limit], "members": [], "has_more": len(threads) > limit}
+
+    async def get_public_archived_threads(self, channel_id, before=None, limit=50):
+        return await self._page(self.archived[channel_id][0], channel_id, before, limit)
+
+    async def get_private_archived_threads(self, channel_id, before=None, limit=50):
+        return await self._page(self.archived[channel_id][1], channel_id, before, limit)
+
+
+def build_guild(args):
+    random.seed(args.seed)
+    client = discord.Client(intents=discord.Intents.default())
+    state = client._connection
+    state.user = discord.ClientUser(state=state, data={"id": str(BOT_ID), "username": "bot", "discriminator": "0",
+                                                       "avatar": None, "bot": True, "verified": True,
+                                                       "mfa_enabled": False})
+    role_ids = [GUILD_ID + 2 + r for r in range(ROLES)]
+    roles = [{"id": str(GUILD_ID), "name": "@everyone", "permissions": str(EVERYONE.value), "position": 0}]
+    roles.append({"id": str(BOT_ROLE), "name": "Limpieza", "permissions": str(BOT_PERMS.value), "position": 1})
+    roles += [{"id": str(r), "name": f"rol-{r}", "permissions": "0", "position": i + 2} for i, r in enumerate(role_ids)]
+    for role in roles:
+        role.update(color=0, hoist=False, managed=False, mentionable=False)
+    bot_roles = [str(BOT_ROLE)] + [str(r) for r in random.sample(role_ids, 9)]
+    guild = discord.Guild(state=state, data={
+        "id": str(GUILD_ID), "name": "servidor", "owner_id": "1", "roles": roles, "channels": [],
+        "members": [{"user": {"id": str(BOT_ID), "username": "bot", "discriminator": "0", "avatar": None},
+                     "roles": bot_roles, "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False,
+                     "flags": 0}],
+    })
+    state._add_guild(guild)
+
+    now = datetime.now(timezone.utc)
+    next_id = [GUILD_ID + 1000]
+
+    def new_id():
+        next_id[0] += 1
+        return next_id[0]
+
+    def thread_payload(parent_id, private, archived_at, archived):
+        return {"id": str(new_id()), "parent_id": str(parent_id), "owner_id": "1", "name": f"hilo-{next_id[0]}",
+                "type": 12 if private else 11, "message_count": 10, "member_count": 2, "guild_id": str(GUILD_ID),
+                "last_message_id": str(time_snowflake(archived_at)),
+                "thread_metadata": {"archived": archived, "auto_archive_duration": 1440,
+                                    "archive_timestamp": iso(archived_at), "locked": False}}
+
+    active, archived = [], {}
+    for c in range(args.categories):
+        # Overwrites de muchos roles en cada categoría; algunas ocultan el canal o quitan
+        # "gestionar mensajes" al rol del bot (anuncios, staff...)
+        kind = c % 5
+        overwrites = [overwrite(GUILD_ID, 0, deny=P(view_channel=True) if kind == 1 else P.none())]
+        overwrites += [overwrite(r, 0, allow=P(view_channel=True, send_messages=True), deny=P(add_reactions=True))
+                       for r in random.sample(role_ids, 14)]
+        if kind == 2:
+            overwrites.append(overwrite(BOT_ROLE, 0, deny=P(manage_messages=True)))
+        category_id = new_id()
+        guild._add_channel(discord.CategoryChannel(state=state, guild=guild, data={
+            "id": str(category_id), "type": 4, "name": f"categoría-{c}", "position": c, "guild_id": str(GUILD_ID),
+            "permission_overwrites": overwrites}))
+        for i in range(args.per_category):
+            own = list(overwrites)
+            if random.random() < 0.15:
+                # Canal no sincronizado: un overwrite propio para un miembro cualquiera
+                own.append(overwrite(random.randrange(10**17, 10**18), 1, allow=P(attach_files=True)))
+            channel_id = new_id()
+            data = {"id": str(channel_id), "type": 0, "name": f"canal-{c}-{i}", "position": i,
+                    "guild_id": str(GUILD_ID), "parent_id": str(category_id), "permission_overwrites": own,
+                    "nsfw": False}
+            guild._add_channel(discord.TextChannel(state=state, guild=guild, data=data))
+            for t in range(4):
+                thread = thread_payload(channel_id, private=t == 3, archived_at=now, archived=False)
+                thread["_joined"] = t == 3 and random.random() < 0.5
+                active.append(thread)
+            stamps = sorted((now - timedelta(days=6) * random.random() for _ in range(args.archived)), reverse=True)
+            archived[channel_id] = ([thread_payload(channel_id, False, s, True) for s in stamps], [])
+        for v in range(2):
+            guild._add_channel(discord.VoiceChannel(state=state, guild=guild, data={
+                "id": str(new_id()), "type": 2, "name": f"voz-{c}-{v}", "position": v, "guild_id": str(GUILD_ID),
+                "parent_id": str(category_id), "permission_overwrites": overwrites, "bitrate": 64000,
+                "user_limit": 0}))
+    state.http = FakeHTTP(active, archived)
+    return guild, state.http
+
+
+def forbidden(target, me):
+    """Lo que respondería Discord: ¿acabaría en Forbidden borrar aquí? (con discord.py, sin cache)"""
+    perms = target.permissions_for(me)
+    if not (perms.view_channel and perms.read_message_history and perms.manage_messages):
+        return True
+    if isinstance(target, discord.Thread) and target.is_private() and not perms.manage_threads:
+        return not any(m.id == me.id for m in target.members)
+    return False
+
+
+async def run(args, label, use_planner):
+    guild, http = build_guild(args)
+    me = guild.me
+    after = datetime.now(timezone.utc) - timedelta(days=7)
+    planner = PermissionPlanner(guild) if use_planner else None
+    targets = await collect_targets(guild, after, ThreadCache(), planner)
+
+    start = time.perf_counter()
+    if use_planner:
+        kept, skipped = planner.split(targets)
+        resolutions = planner.resolved
+    else:
+        # Comprobación de antes, canal por canal
+        kept = []
+        for t in targets:
+            perms = t.permissions_for(me)
+            if perms.manage_messages and perms.read_message_history:
+                kept.append(t)
+        skipped = None
+        resolutions = len(targets)
+    check = time.perf_counter() - start
+
+    # Peticiones inútiles: listados de archivados bajo canales donde no se puede borrar
+    # y un historial (Forbidden) por cada objetivo que se intentaría sin acceso
+    listing = sum(1 for cid in http.calls if cid and forbidden(guild.get_channel(cid), me))
+    history = sum(1 for t in kept if forbidden(t, me))
+    print(f"{label:<10}: {len(targets):5d} canales/hilos, {len(kept):5d} a barrer; "
+          f"{listing + history:4d} peticiones inútiles ({listing} listados de archivados, {history} historiales "
+          f"prohibidos); permisos en {check * 1000:6.1f} ms ({resolutions} resoluciones completas)")
+    if use_planner:
+        wrong = [t for t in targets if (planner.blocker(t) is not None) != forbidden(t, me)]
+        print(f"{'':<10}  aviso único: ⚠️  {describe_skipped(skipped, target_label)[:160]}...")
+        print(f"{'':<10}  decisiones distintas de discord.py: {len(wrong)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--categories", type=int, default=25)
+    parser.add_argument("--per-category", type=int, default=12)
+    parser.add_argument("--archived", type=int, default=150, help="Hilos archivados por canal")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    print(f"{args.categories * args.per_category} canales de texto en {args.categories} categorías, "
+          f"{args.archived} hilos archivados y 4 activos por canal, {ROLES} roles\n")
+    asyncio.run(run(args, "antes", False))
+    asyncio.run(run(args, "preflight", True))
+
+
+if __name__ == "__main__":
+    main()
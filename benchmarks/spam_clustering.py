@@ -0,0 +1,118 @@
+"""
+Benchmark: detección de spam por casi duplicados
+================================================
+Genera una ventana sintética con conversación normal y una incursión de
+cuentas desechables que publican variaciones del mismo texto en varios
+canales, y mide el tiempo de SpamAnalyzer (ingesta + grupos + ranking)
+y cuántas de esas cuentas detecta sin falsos positivos.
+
+Después repite la detección en ventanas pequeñas (decenas o cientos de
+mensajes): pocas cuentas con unas pocas variantes de un texto, cada una con
+una palabra cambiada, que no deben perderse por el filtro de palabras vacías.
+
+Uso:
+    python benchmarks/spam_clustering.py [--messages 300000] [--raiders 40]
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import spam_clusters
+from spam_clusters import SpamAnalyzer
+
+WORDS = ("hola que tal el server juego mañana partida gracias jaja alguien sabe como canal voz "
+         "imagen link mira esto bueno noche ayer equipo ganamos perdimos nivel misión build arma").split()
+# Vocabulario de conversación: palabras comunes + miles de palabras raras (distribución tipo Zipf)
+# (solo letras: la normalización convierte los dígitos en 0)
+_RNG = random.Random(99)
+VOCAB = WORDS + ["".join(_RNG.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(_RNG.randint(3, 9)))
+                 for _ in range(5000)]
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(VOCAB))))
+SPAM = [
+    "FREE NITRO for everyone claim now before it expires {url}",
+    "@everyone join my new server best giveaways {url} limited spots",
+    "hot singles in your area click {url} now",
+]
+
+
+def build_window(rng, count, raiders, spam_ratio):
+    now = time.time()
+    legit_authors = list(range(1, 2001))
+    raid_authors = list(range(900000, 900000 + raiders))
+    channels = list(range(100, 130))
+    rows = []
+    for i in range(count):
+        if rng.random() < spam_ratio:
+            template = rng.choice(SPAM)
+            url = f"https://spam{rng.randint(1, 3)}.gg/{rng.randint(1000, 9999)}"
+            text = template.format(url=url) + " " + "!" * rng.randint(0, 5)
+            rows.append((i, rng.choice(channels), rng.choice(raid_authors), now - rng.random() * 300, text))
+        else:
+            text = " ".join(rng.choices(VOCAB, cum_weights=CUM_WEIGHTS, k=rng.randint(1, 20)))
+            rows.append((i, rng.choice(channels), rng.choice(legit_authors), now - rng.random() * 7 * 86400, text))
+    return rows, set(raid_authors)
+
+
+SMALL_SPAM = "free nitro giveaway claim your prize now at this site before it expires".split()
+
+
+def small_window(rng, background, raiders=3, variants=4):
+    """Ventana pequeña: `raiders` cuentas con `variants` versiones (una palabra cambiada) en 3 canales"""
+    now = time.time()
+    rows = []
+    for i in range(background):
+        text = " ".join(rng.choices(VOCAB, cum_weights=CUM_WEIGHTS, k=rng.randint(4, 20)))
+        rows.append((i, rng.randint(100, 104), rng.randint(1, 300), now - rng.random() * 86400, text))
+    raid_authors = set(range(900000, 900000 + raiders))
+    for author in raid_authors:
+        for v in range(variants):
+            words = list(SMALL_SPAM)
+            words[rng.randrange(len(words))] = rng.choice(VOCAB[len(WORDS):])
+            rows.append((len(rows), 200 + v % 3, author, now - rng.random() * 300, " ".join(words)))
+    return rows, raid_authors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=300_000)
+    parser.add_argument("--raiders", type=int, default=40)
+    parser.add_argument("--spam-ratio", type=float, default=0.01)
+    args = parser.parse_args()
+
+    rows, raiders = build_window(random.Random(7), args.messages, args.raiders, args.spam_ratio)
+
+    start = time.perf_counter()
+    analyzer = SpamAnalyzer()
+    for row in rows:
+        analyzer.add(*row)
+    ingest = time.perf_counter() - start
+
+    start = time.perf_counter()
+    suspects = analyzer.rank_authors()
+    analysis = time.perf_counter() - start
+
+    flagged = {s.author_id for s in suspects}
+    backend = "numpy" if spam_clusters.np is not None else "python puro"
+    print(f"mensajes    : {args.messages} ({len(analyzer)} analizables, hash con {backend})")
+    print(f"ingesta     : {ingest:6.2f}s   análisis: {analysis:6.2f}s   total: {ingest + analysis:6.2f}s")
+    print(f"sospechosos : {len(flagged)}  (raiders detectados {len(flagged & raiders)}/{len(raiders)}, "
+          f"falsos positivos {len(flagged - raiders)})")
+
+    print("\nventanas pequeñas (3 cuentas, 4 variantes cada una, 3 canales):")
+    for background in (50, 500, 5000):
+        rows, raiders = small_window(random.Random(background), background)
+        analyzer = SpamAnalyzer()
+        for row in rows:
+            analyzer.add(*row)
+        flagged = {s.author_id for s in analyzer.rank_authors()}
+        print(f"  {background:5d} mensajes de fondo: raiders detectados {len(flagged & raiders)}/{len(raiders)}, "
+              f"falsos positivos {len(flagged - raiders)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: tiempo de arranque de la GUI y del bot de consola
+============================================================
+GUI: lanza src/main.py (o el .exe de PyInstaller) con BOT_STARTUP_PROBE=1;
+la app imprime sus tiempos internos (imports y primer pintado) y se cierra.
+Consola: mide cuánto tarda ChakielBotDiscord.py en mostrar el banner.
+En ambos casos también se mide el tiempo total desde que se lanza el proceso.
+
+Uso:
+    python benchmarks/startup_time.py [--runs 5] [--exe dist/main.exe]
+La parte de GUI requiere un entorno con pantalla (Tk).
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def probe_gui(cmd):
+    """Devuelve (wall_ms, {métrica: ms}) de un arranque de la GUI"""
+    env = dict(os.environ, BOT_STARTUP_PROBE="1", PYTHONUNBUFFERED="1")
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True, timeout=120,
+                          cwd=os.path.join(ROOT, "src"))
+    wall = (time.perf_counter() - start) * 1000
+    for line in proc.stdout.splitlines():
+        if line.startswith("STARTUP "):
+            metrics = dict(item.split("=") for item in line.split()[1:])
+            return wall, {k: float(v) for k, v in metrics.items()}
+    raise RuntimeError(f"La app no reportó tiempos:\n{proc.stderr}")
+
+
+def probe_cli():
+    """Milisegundos hasta que el bot de consola imprime el banner"""
+    env = dict(os.environ, PYTHONUNBUFFERED="1", DISCORD_TOKEN="")
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "ChakielBotDiscord.py"], env=env, cwd=ROOT,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        for line in proc.stdout:
+            if "DISCORD MESSAGE DELETER BOT" in line:
+                return (time.perf_counter() - start) * 1000
+    finally:
+        proc.kill()
+        proc.wait()
+    raise RuntimeError("El bot de consola no mostró el banner")
+
+
+def summarize(name, samples):
+    print(f"  {name:18s} mediana {statistics.median(samples):8.1f} ms   mín {min(samples):8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--exe", help="Ejecutable congelado de PyInstaller (opcional)")
+    parser.add_argument("--skip-gui", action="store_true", help="Solo medir el bot de consola")
+    args = parser.parse_args()
+
+    print("🖥️  Consola (ChakielBotDiscord.py)")
+    summarize("banner", [probe_cli() for _ in range(args.runs)])
+
+    if args.skip_gui:
+        return
+
+    builds = [("fuente", [sys.executable, "main.py"])]
+    if args.exe:
+        builds.append(("congelado", [os.path.abspath(args.exe)]))
+
+    for name, cmd in builds:
+        print(f"🪟 GUI ({name})")
+        walls, metrics = [], {}
+        for _ in range(args.runs):
+            wall, result = probe_gui(cmd)
+            walls.append(wall)
+            for key, value in result.items():
+                metrics.setdefault(key, []).append(value)
+        summarize("proceso total", walls)
+        for key, values in metrics.items():
+            summarize(key, values)
+
+
+if __name__ == "__main__":
+    main()
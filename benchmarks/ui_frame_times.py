@@ -0,0 +1,188 @@
+"""
+Benchmark: tiempos de frame de la GUI durante una purga sintética
+=================================================================
+Simula una purga de 100k mensajes (parseo + logs) con el motor en un hilo
+(modo "thread") y en un proceso aparte (modo "process") y mide cada cuánto
+consigue Tk redibujar la ventana.
+
+Uso:
+    python benchmarks/ui_frame_times.py [--messages 100000] [--mode thread|process|both] [--headless]
+Requiere un entorno con pantalla (Tk; vale una virtual, p. ej. xvfb-run). Con
+--headless no se abre ventana: el hilo principal hace de bucle de la GUI
+(espera FRAME_MS, vuelca los logs recibidos en un buffer) y se mide lo
+mismo. Sirve para comparar modos en máquinas sin pantalla, pero no incluye
+el coste de dibujar con Tk.
+"""
+
+import argparse
+import json
+import os
+import queue
+import statistics
+import sys
+import threading
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from bot_process import DiscordBotProcess
+
+FRAME_MS = 16  # ~60 fps
+LOG_EVERY = 100  # Una línea de log cada N mensajes
+DONE_MARK = "🏁"
+
+
+class FakeEngine(threading.Thread):
+    """Motor sintético con la misma interfaz que DiscordBotThread"""
+
+    def __init__(self, messages, callback):
+        super().__init__()
+        self.messages = messages
+        self.callback = callback
+        self.ready_event = threading.Event()
+        self._go = threading.Event()
+
+    def run(self):
+        self.ready_event.set()
+        self._go.wait()
+        payload = json.dumps({"id": 0, "author": {"id": 1234, "name": "spam"},
+                              "content": "x" * 200, "attachments": []})
+        deleted = 0
+        for i in range(self.messages):
+            msg = json.loads(payload)  # Trabajo de CPU por mensaje
+            if msg["author"]["id"] == 1234:
+                deleted += 1
+            if i % LOG_EVERY == 0:
+                self.callback(f"[{i}/{self.messages}] Escaneando #canal-{i % 50}...")
+        self.callback(f"{DONE_MARK} PROCESO TERMINADO. Total eliminados: {deleted}")
+
+    def get_guilds(self):
+        return [(1, "Servidor sintético")]
+
+    def start_deletion(self, *args):
+        # Mismos argumentos que DiscordBotThread.start_deletion; aquí da igual cuáles
+        self._go.set()
+
+    def stop(self):
+        pass
+
+
+class FakeEngineFactory:
+    """Factory serializable (el modo "process" la envía al proceso hijo)"""
+
+    def __init__(self, messages):
+        self.messages = messages
+
+    def __call__(self, token, callback):
+        return FakeEngine(self.messages, callback)
+
+
+def measure(mode, messages):
+    root = tk.Tk()
+    root.title(f"Benchmark ({mode})")
+    text = tk.Text(root, height=12)
+    text.pack()
+
+    done = threading.Event()
+    frames = []
+    last = [time.perf_counter()]
+
+    def log(message):
+        root.after(0, log_internal, message)
+
+    def log_internal(message):
+        text.insert(tk.END, message + "\n")
+        text.see(tk.END)
+        if DONE_MARK in message or message.startswith("❌"):
+            done.set()
+
+    def tick():
+        now = time.perf_counter()
+        frames.append((now - last[0]) * 1000)
+        last[0] = now
+        if done.is_set():
+            root.quit()
+            return
+        root.after(FRAME_MS, tick)
+
+    factory = FakeEngineFactory(messages)
+    if mode == "process":
+        engine = DiscordBotProcess("token-sintetico", log, engine_factory=factory)
+    else:
+        engine = factory("token-sintetico", log)
+    engine.daemon = True
+    engine.start()
+    engine.ready_event.wait(timeout=30)
+
+    start = time.perf_counter()
+    engine.start_deletion(1, 1234)
+    last[0] = time.perf_counter()
+    root.after(FRAME_MS, tick)
+    root.mainloop()
+    elapsed = time.perf_counter() - start
+
+    if mode == "process":
+        engine.stop()
+    root.destroy()
+    return frames, elapsed
+
+
+def measure_headless(mode, messages):
+    """Como measure(), con el hilo principal en el papel del bucle de Tk"""
+    inbox = queue.SimpleQueue()
+    factory = FakeEngineFactory(messages)
+    if mode == "process":
+        engine = DiscordBotProcess("token-sintetico", inbox.put, engine_factory=factory)
+    else:
+        engine = factory("token-sintetico", inbox.put)
+    engine.daemon = True
+    engine.start()
+    engine.ready_event.wait(timeout=30)
+
+    buffer = []
+    frames = []
+    start = time.perf_counter()
+    engine.start_deletion(1, 1234)
+    last = time.perf_counter()
+    done = False
+    while not done:
+        time.sleep(FRAME_MS / 1000)
+        while True:
+            try:
+                message = inbox.get_nowait()
+            except queue.Empty:
+                break
+            buffer.append(message)
+            done = done or DONE_MARK in message or message.startswith("❌")
+        now = time.perf_counter()
+        frames.append((now - last) * 1000)
+        last = now
+    elapsed = time.perf_counter() - start
+
+    if mode == "process":
+        engine.stop()
+    return frames, elapsed
+
+
+def report(mode, frames, elapsed):
+    frames = sorted(frames)
+    p95 = frames[int(len(frames) * 0.95) - 1] if frames else 0.0
+    print(f"{mode:8s} | duración {elapsed:6.2f}s | frames {len(frames):5d} | "
+          f"p50 {statistics.median(frames):7.1f} ms | p95 {p95:7.1f} ms | máx {frames[-1]:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--mode", choices=["thread", "process", "both"], default="both")
+    parser.add_argument("--headless", action="store_true", help="Sin ventana (máquinas sin pantalla)")
+    args = parser.parse_args()
+
+    modes = ["thread", "process"] if args.mode == "both" else [args.mode]
+    for mode in modes:
+        frames, elapsed = (measure_headless if args.headless else measure)(mode, args.messages)
+        report(mode, frames, elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Archivo de auditoría
+====================
+Guarda una copia compacta de cada mensaje eliminado (ID, canal, autor, fecha,
+contenido y URLs de adjuntos) en un fichero JSONL comprimido, para que los
+moderadores tengan evidencia de lo borrado.
+
+La escritura la hace un hilo en segundo plano por bloques: el pipeline de
+borrado solo encola tuplas pequeñas. Compresión gzip por defecto, o zstd si
+está instalado el paquete `zstandard` (dependencia opcional).
+
+Consulta rápida desde la terminal:
+    python src/archive.py archivo.jsonl.gz --author 123 --text "http"
+"""
+
+import argparse
+import gzip
+import json
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Registros por bloque escrito
+CHUNK_SIZE = 1000
+# Segundos máximos que un registro espera en memoria antes de escribirse
+FLUSH_INTERVAL = 2.0
+
+FIELDS = ("id", "guild_id", "channel_id", "author_id", "author", "created_at", "content", "attachments")
+
+
+def default_archive_path(directory: str, guild_id: int) -> str:
+    """Ruta de archivo para un trabajo nuevo: <dir>/<guild>_<fecha>.jsonl.gz|zst"""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+    ext = ".jsonl.zst" if zstandard is not None else ".jsonl.gz"
+    return os.path.join(directory, f"{guild_id}_{stamp}{ext}")
+
+
+def _open_write(path: str):
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("Instala 'zstandard' para escribir archivos .zst")
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(path, "ab"))
+    # Cada bloque añade un miembro gzip nuevo; gzip.open los lee todos seguidos
+    return gzip.open(path, "ab", compresslevel=6)
+
+
+def _open_read(path: str):
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("Instala 'zstandard' para leer archivos .zst")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True)
+    return gzip.open(path, "rb")
+
+
+class MessageArchiver:
+    """Escritor en segundo plano de mensajes eliminados"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.count = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._writer, name="archiver", daemon=True)
+        self._thread.start()
+
+    def add_many(self, messages):
+        """Encola los mensajes de un lote ya eliminado (solo extrae campos, no serializa)"""
+        self._queue.put([
+            (
+                msg.id,
+                msg.guild.id if msg.guild else None,
+                msg.channel.id,
+                msg.author.id,
+                str(msg.author),
+                msg.created_at,
+                msg.content,
+                [a.url for a in msg.attachments],
+            )
+            for msg in messages
+        ])
+
+    def close(self):
+        """Vacía la cola y espera a que el hilo escriba todo"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _writer(self):
+        out = _open_write(self.path)
+        pending = []
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=FLUSH_INTERVAL)
+                    timed_out = False
+                except queue.Empty:
+                    item, timed_out = [], True
+                if item is not None:
+                    pending.extend(item)
+                # Se escribe al llenar un bloque, al cerrar o tras FLUSH_INTERVAL sin actividad
+                if pending and (item is None or timed_out or len(pending) >= CHUNK_SIZE):
+                    self._write_chunk(out, pending)
+                    pending = []
+                if item is None:
+                    return
+        finally:
+            out.close()
+
+    def _write_chunk(self, out, rows):
+        lines = []
+        for row in rows:
+            record = dict(zip(FIELDS, row))
+            record["created_at"] = record["created_at"].isoformat()
+            lines.append(json.dumps(record, ensure_ascii=False))
+        out.write(("\n".join(lines) + "\n").encode("utf-8"))
+        out.flush()
+        self.count += len(rows)
+
+
+def iter_records(path: str, author_id: int = None, channel_id: int = None, text: str = None):
+    """Recorre el archivo aplicando filtros; descarta líneas sin parsear JSON cuando es posible"""
+    needles = []
+    if author_id is not None:
+        needles.append(f'"author_id": {author_id}'.encode())
+    if channel_id is not None:
+        needles.append(f'"channel_id": {channel_id}'.encode())
+    text_lower = text.lower() if text else None
+    # El filtro sobre bytes solo es fiable si JSON no escapa el texto y bytes.lower() lo cubre
+    text_raw = None
+    if text_lower and text_lower.isascii() and text_lower.isprintable() and not set(text_lower) & {'"', "\\"}:
+        text_raw = text_lower.encode()
+
+    with _open_read(path) as raw:
+        for line in raw:
+            # Filtro barato sobre bytes antes de decodificar
+            if any(n not in line for n in needles):
+                continue
+            if text_raw is not None and text_raw not in line.lower():
+                continue
+            record = json.loads(line)
+            # El prefiltro también acepta IDs más largos con el mismo prefijo (12 en 123456)
+            if author_id is not None and record["author_id"] != author_id:
+                continue
+            if channel_id is not None and record["channel_id"] != channel_id:
+                continue
+            if text_lower and text_lower not in (record["content"] or "").lower():
+                continue
+            yield record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Busca mensajes en un archivo de auditoría")
+    parser.add_argument("path", help="Archivo .jsonl.gz o .jsonl.zst")
+    parser.add_argument("--author", type=int, help="ID del autor")
+    parser.add_argument("--channel", type=int, help="ID del canal")
+    parser.add_argument("--text", help="Texto contenido en el mensaje (sin distinguir mayúsculas)")
+    parser.add_argument("--count", action="store_true", help="Solo mostrar el número de coincidencias")
+    args = parser.parse_args(argv)
+
+    total = 0
+    for record in iter_records(args.path, args.author, args.channel, args.text):
+        total += 1
+        if not args.count:
+            print(f"[{record['created_at']}] #{record['channel_id']} {record['author']} ({record['author_id']}): "
+                  f"{record['content']}" + (f" 📎 {' '.join(record['attachments'])}" if record["attachments"] else ""))
+    print(f"🔎 {total} mensajes encontrados", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
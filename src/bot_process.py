@@ -0,0 +1,160 @@
+"""
+Motor del bot en un proceso aparte
+==================================
+Alternativa a DiscordBotThread que ejecuta el cliente de Discord en otro proceso.
+La GUI y el bot ya no comparten el GIL: una purga grande no congela la ventana.
+
+Protocolo (multiprocessing.Pipe):
+  GUI -> bot:  ("call", nombre_metodo, args)  |  ("stop", None, ())
+  bot -> GUI:  ("ready", [(id, nombre), ...]) |  ("log", [linea, ...]) |  ("suspects", [id, ...])
+Los logs se agrupan en un frame cada FRAME_INTERVAL segundos.
+"""
+
+import multiprocessing
+import threading
+
+# Cada cuánto el proceso del bot envía los logs acumulados a la GUI
+FRAME_INTERVAL = 0.1
+
+
+def _default_engine(token, callback):
+    # Import diferido: el proceso de la GUI no necesita cargar discord.py
+    from bot_thread import DiscordBotThread
+    return DiscordBotThread(token, callback)
+
+
+def _engine_main(conn, token, engine_factory):
+    """Punto de entrada del proceso hijo"""
+    pending = []
+    lock = threading.Lock()
+
+    def callback(message):
+        with lock:
+            pending.append(message)
+
+    suspects = []
+
+    def suspects_callback(ids):
+        with lock:
+            suspects.append(ids)
+
+    engine = engine_factory(token, callback)
+    engine.suspects_callback = suspects_callback
+    engine.daemon = True
+    engine.start()
+
+    ready_sent = False
+    try:
+        while True:
+            if not ready_sent and engine.ready_event.is_set():
+                conn.send(("ready", engine.get_guilds()))
+                ready_sent = True
+
+            if conn.poll(FRAME_INTERVAL):
+                kind, name, args = conn.recv()
+                if kind == "stop":
+                    engine.stop()
+                    break
+                if kind == "call":
+                    try:
+                        getattr(engine, name)(*args)
+                    except Exception as e:
+                        # Un fallo en una llamada no debe tumbar el proceso del bot
+                        callback(f"❌ Error en {name}: {type(e).__name__}: {e}")
+
+            with lock:
+                batch = pending[:]
+                pending.clear()
+                found = suspects[:]
+                suspects.clear()
+            if batch:
+                conn.send(("log", batch))
+            for ids in found:
+                conn.send(("suspects", ids))
+    except (EOFError, BrokenPipeError):
+        pass  # La GUI se cerró
+
+
+class DiscordBotProcess(threading.Thread):
+    """
+    Misma interfaz que DiscordBotThread (ready_event, get_guilds, start_deletion, control de trabajos)
+    pero el bot vive en otro proceso. Este hilo solo recibe los frames del bot.
+    """
+
+    def __init__(self, token, gui_callback, engine_factory=_default_engine):
+        super().__init__()
+        self.gui_callback = gui_callback
+        self.suspects_callback = None
+        self.ready_event = threading.Event()
+        self._guilds = []
+        self._conn, child_conn = multiprocessing.Pipe()
+        self._send_lock = threading.Lock()
+        self._stopping = False
+        self.process = multiprocessing.Process(
+            target=_engine_main,
+            args=(child_conn, token, engine_factory),
+            daemon=True,
+        )
+
+    def start(self):
+        self.process.start()
+        super().start()
+
+    def run(self):
+        """Recibe frames del proceso del bot y los entrega a la GUI"""
+        try:
+            while True:
+                kind, payload = self._conn.recv()
+                if kind == "ready":
+                    self._guilds = payload
+                    self.ready_event.set()
+                elif kind == "log":
+                    # Un frame = una sola escritura en la GUI
+                    self.gui_callback("\n".join(payload))
+                elif kind == "suspects" and self.suspects_callback:
+                    self.suspects_callback(payload)
+        except (EOFError, OSError):
+            if not self._stopping:
+                # También después de "ready": si no, la ventana parece viva sin motor detrás
+                self.process.join(timeout=1)
+                self.gui_callback(f"❌ El proceso del bot terminó inesperadamente "
+                                  f"(código {self.process.exitcode}). Reinicia el bot.")
+
+    def _call(self, name, *args):
+        with self._send_lock:
+            self._conn.send(("call", name, args))
+
+    def get_guilds(self):
+        """Devuelve lista de servidores (ID, Nombre) recibida al conectar"""
+        return list(self._guilds)
+
+    def start_deletion(self, guild_id, target_user_ids, max_rate=None, archive_dir=None, patterns=None):
+        self._call("start_deletion", guild_id, target_user_ids, max_rate, archive_dir, patterns)
+
+    def analyze_spam(self, guild_id):
+        self._call("analyze_spam", guild_id)
+
+    def pause_job(self, guild_id):
+        self._call("pause_job", guild_id)
+
+    def resume_job(self, guild_id):
+        self._call("resume_job", guild_id)
+
+    def cancel_job(self, guild_id):
+        self._call("cancel_job", guild_id)
+
+    def set_job_rate(self, guild_id, max_rate):
+        self._call("set_job_rate", guild_id, max_rate)
+
+    def profile_loop(self, seconds=10.0):
+        self._call("profile_loop", seconds)
+
+    def stop(self):
+        """Pide al proceso del bot que termine"""
+        self._stopping = True
+        try:
+            with self._send_lock:
+                self._conn.send(("stop", None, ()))
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
@@ -0,0 +1,377 @@
+"""
+Motor del bot para la GUI
+=========================
+Ejecuta el cliente de Discord en un hilo con su propio event loop.
+La GUI lo usa directamente (modo "thread") o a través de bot_process.py (modo "process").
+"""
+
+import discord
+import asyncio
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from archive import MessageArchiver, default_archive_path
+from credentials import CredentialStore
+from history_cache import HistoryCache
+from jobs import DeletionJob, JobGroup, JobRegistry
+from loop_watchdog import LoopWatchdog
+from matcher import ContentMatcher, MessageFilter
+from memory_budget import budget_from_env, client_options
+from multi_guild import GuildReport, report_lines, run_guilds
+from preflight import READ_PERMISSIONS, PermissionPlanner, describe_skipped
+from purge import DeleteBatcher, RequestStats, purge_authors_cached, purge_channel
+from retention_scheduler import RetentionScheduler
+from run_report import ChannelReport, RunReport, default_report_path
+from session_resume import ResumableClient
+from spam_clusters import SpamAnalyzer, scan_window
+from sweep import ThreadCache, collect_targets, run_sweep, target_label
+
+
+class DiscordBotThread(threading.Thread):
+    def __init__(self, token, gui_callback):
+        super().__init__()
+        self.token = token
+        self.gui_callback = gui_callback 
+        self.loop = asyncio.new_event_loop()
+        self.bot = None # Se crea en run(), fuera del hilo de la GUI
+        self.ready_event = threading.Event()
+        self.thread_cache = ThreadCache() # Hilos archivados por canal padre
+        self.jobs = JobRegistry() # Un trabajo activo por servidor
+        self.group = None # JobGroup del último barrido en todos los servidores
+        self.suspects_callback = None # Recibe los IDs sospechosos de analyze_spam()
+        self.history_cache = None # Autores/fechas por canal en disco (history_cache.py)
+        self.watchdog = None # Lag del loop, callbacks lentos y heartbeat (loop_watchdog.py)
+        self.retention = None # Políticas de retención por canal (retention_scheduler.py)
+        self.memory_budget = budget_from_env() # Modo de poca memoria (memory_budget.py)
+        if self.memory_budget:
+            self.memory_budget.report = gui_callback
+
+    def _get_intents(self):
+        intents = discord.Intents.default()
+        intents.message_content = True
+        intents.guilds = True
+        intents.members = True
+        return intents
+
+    def run(self):
+        """Este método se ejecuta en un hilo separado (background)"""
+        asyncio.set_event_loop(self.loop)
+        self.bot = ResumableClient(intents=self._get_intents(), **client_options(self.memory_budget))
+        self.watchdog = LoopWatchdog(self.gui_callback, client=self.bot)
+        self.bot.event(self.on_ready)
+        self.bot.event(self.on_raw_message_delete)
+        self.bot.event(self.on_raw_bulk_message_delete)
+        try:
+            self.history_cache = HistoryCache()
+        except Exception as e:
+            self.gui_callback(f"⚠️ Cache de historial desactivada: {e}")
+        try:
+            self.loop.run_until_complete(self.bot.start(self.token))
+        except discord.LoginFailure:
+            # Se olvida el token guardado para que el próximo arranque lo pida
+            CredentialStore().clear()
+            self.gui_callback("❌ Error: Token de Discord inválido. Vuelve a ejecutar para ingresar el token.")
+        except Exception as e:
+            self.gui_callback(f"❌ Error de conexión: {e}")
+
+    async def on_ready(self):
+        CredentialStore().save_identity(self.bot.user.id, str(self.bot.user))
+        self.gui_callback(f"✅ Bot conectado como: {self.bot.user}")
+        self.watchdog.start()
+        if self.retention is None:
+            self.retention = RetentionScheduler(self.bot, self.gui_callback, jobs=self.jobs,
+                                                history_cache=self.history_cache)
+            self.retention.start()
+        if self.bot.resumed_session:
+            self.gui_callback("♻️ Sesión anterior reanudada (sin IDENTIFY)")
+        self.ready_event.set() 
+
+    async def on_raw_message_delete(self, payload):
+        if self.history_cache:
+            self.history_cache.forget([payload.message_id])
+
+    async def on_raw_bulk_message_delete(self, payload):
+        if self.history_cache:
+            self.history_cache.forget(payload.message_ids)
+
+    def stop(self, timeout=5.0):
+        """Cierra el bot guardando la sesión del gateway para reanudarla en el próximo arranque"""
+        if self.bot is None or self.bot.is_closed() or not self.loop.is_running():
+            return
+        future = asyncio.run_coroutine_threadsafe(self.bot.close_resumable(), self.loop)
+        try:
+            future.result(timeout)
+        except Exception:
+            pass # Cerrando la app: no hay a quién avisar
+
+    def profile_loop(self, seconds=10.0):
+        """Perfil por muestreo del event loop del bot (se guarda en un archivo y se resume en el log)"""
+        if self.watchdog:
+            self.watchdog.profile(seconds)
+
+    def get_guilds(self):
+        """Devuelve lista de servidores (ID, Nombre)"""
+        return [(g.id, g.name) for g in self.bot.guilds]
+
+    def start_deletion(self, guild_id, target_user_ids, max_rate=None, archive_dir=None, patterns=None):
+        """
+        Inicia la tarea de eliminación en el loop del bot de forma segura.
+        `target_user_ids` y `patterns` (líneas con el formato de matcher.py) se combinan:
+        se borran los mensajes que cumplan ambos criterios si se indican los dos.
+        Con `archive_dir` se guarda copia comprimida de los mensajes eliminados.
+        Con `guild_id=None` se barren todos los servidores a la vez (devuelve un JobGroup).
+        """
+        try:
+            matcher = ContentMatcher.from_lines(patterns) if patterns else None
+        except (re.error, ValueError) as e:
+            self.gui_callback(f"❌ Patrón inválido: {e}")
+            return None
+        if not target_user_ids and matcher is None:
+            self.gui_callback("❌ Indica al menos un usuario o un patrón de contenido.")
+            return None
+
+        if guild_id is None:
+            return self._start_all(target_user_ids, max_rate, archive_dir, matcher)
+
+        job = DeletionJob(guild_id, self.loop, max_rate, budget=self.memory_budget)
+        if not self.jobs.acquire(job):
+            self.gui_callback("⚠️ Ya hay una eliminación en curso en este servidor.")
+            return None
+        job.future = asyncio.run_coroutine_threadsafe(
+            self._delete_task(job, target_user_ids, matcher, archive_dir), 
+            self.loop
+        )
+        return job
+
+    def _start_all(self, target_user_ids, max_rate, archive_dir, matcher):
+        group = JobGroup(self.loop, max_rate, budget=self.memory_budget)
+        plan = []
+        for guild in list(self.bot.guilds):
+            job = group.add(guild.id, self.jobs)
+            if job is None:
+                self.gui_callback(f"⚠️ {guild.name}: ya hay una eliminación en curso, se omite.")
+            else:
+                plan.append((guild, job))
+        if not plan:
+            return None
+        self.group = group
+        asyncio.run_coroutine_threadsafe(
+            self._delete_all_task(plan, target_user_ids, matcher, archive_dir),
+            self.loop
+        )
+        return group
+
+    def _job_for(self, guild_id):
+        """Trabajo a controlar: el del servidor, o el grupo si se lanzó en todos (guild_id=None)"""
+        return self.group if guild_id is None else self.jobs.get(guild_id)
+
+    def analyze_spam(self, guild_id):
+        """
+        Escanea la ventana de 7 días sin borrar nada, agrupa los mensajes casi
+        duplicados y entrega los IDs de las cuentas sospechosas a `suspects_callback`.
+        """
+        return asyncio.run_coroutine_threadsafe(self._spam_task(guild_id), self.loop)
+
+    async def _spam_task(self, guild_id):
+        suspects = []
+        try:
+            guild = self.bot.get_guild(guild_id)
+            if not guild:
+                self.gui_callback("❌ Error: No se encuentra el servidor seleccionado.")
+                return
+
+            self.gui_callback(f"\n🔎 ANALIZANDO SPAM EN: {guild.name}")
+            seven_days_ago = datetime.now(timezone.utc) - timedelta(days=7)
+            planner = PermissionPlanner(guild, READ_PERMISSIONS)
+            targets, _ = planner.split(await collect_targets(guild, seven_days_ago, self.thread_cache, planner))
+            analyzer = SpamAnalyzer()
+            elapsed = await scan_window(targets, seven_days_ago, analyzer)
+            self.gui_callback(f"📥 {len(analyzer)} mensajes leídos de {len(targets)} canales en {elapsed:.1f}s")
+
+            suspects = await asyncio.to_thread(analyzer.rank_authors)
+            if not suspects:
+                self.gui_callback("✅ No se encontraron cuentas con mensajes casi duplicados.")
+            for s in suspects:
+                member = guild.get_member(s.author_id)
+                name = member.name if member else "desconocido"
+                self.gui_callback(f"   🚩 {s.author_id} ({name}): puntuación {s.score:.0f}, "
+                                  f"{s.messages} mensajes en {len(s.channels)} canales")
+        except Exception as e:
+            suspects = []
+            self.gui_callback(f"❌ Error analizando spam: {e}")
+        finally:
+            # Siempre: la GUI vuelve a habilitar el botón al recibir la lista (aunque esté vacía)
+            if self.suspects_callback:
+                self.suspects_callback([s.author_id for s in suspects])
+
+    def pause_job(self, guild_id):
+        job = self._job_for(guild_id)
+        if job:
+            job.pause()
+            self.gui_callback("⏸️ Eliminación en pausa.")
+
+    def resume_job(self, guild_id):
+        job = self._job_for(guild_id)
+        if job:
+            job.resume()
+            self.gui_callback("▶️ Eliminación reanudada.")
+
+    def cancel_job(self, guild_id):
+        job = self._job_for(guild_id)
+        if job:
+            job.cancel()
+
+    def set_job_rate(self, guild_id, max_rate):
+        """Cambia el techo de peticiones/s del trabajo en curso (0 = sin límite)"""
+        job = self._job_for(guild_id)
+        if job:
+            job.set_rate(max_rate)
+            self.gui_callback(f"🎚️ Límite de ritmo: {max_rate or 'sin límite'} peticiones/s")
+
+    async def _delete_all_task(self, plan, target_user_ids, matcher=None, archive_dir=None):
+        self.gui_callback(f"\n🌐 INICIANDO EN {len(plan)} SERVIDORES A LA VEZ")
+        stats = RequestStats() # Compartido: una sola cuenta de peticiones para todo el barrido
+        run_report = RunReport(default_report_path("todos")) # Y un solo informe por canal
+
+        async def run_one(guild, job, report):
+            await self._delete_task(job, target_user_ids, matcher, archive_dir,
+                                    report=report, stats=stats, tag=f"[{guild.name}] ", run_report=run_report)
+
+        try:
+            reports, elapsed = await run_guilds(plan, run_one)
+        finally:
+            run_report.close()
+        self.gui_callback("\n" + "="*40)
+        for line in report_lines(reports, elapsed):
+            self.gui_callback(line)
+        self.gui_callback(f"📈 {stats.summary()}")
+        self.gui_callback(f"🧾 Informe por canal: {run_report.path}")
+        self.gui_callback(f"🩺 {self.watchdog.summary()}")
+        self.gui_callback("="*40)
+
+    async def _delete_task(self, job, target_user_ids, matcher=None, archive_dir=None,
+                           report=None, stats=None, tag="", run_report=None):
+        archiver = None
+        if archive_dir:
+            archiver = MessageArchiver(default_archive_path(archive_dir, job.guild_id))
+        own_report = run_report is None
+        if own_report:
+            run_report = RunReport(default_report_path(str(job.guild_id)))
+        try:
+            job.state = "running"
+            await self._run_deletion(job, target_user_ids, matcher, archiver, report, stats, tag, run_report)
+        except asyncio.CancelledError:
+            self.gui_callback(f"\n⏹️ {tag}ELIMINACIÓN CANCELADA.")
+            raise
+        finally:
+            if job.state != "cancelled":
+                job.state = "finished"
+            self.jobs.release(job)
+            if archiver:
+                await asyncio.to_thread(archiver.close)
+                self.gui_callback(f"📦 {archiver.count} mensajes archivados en {archiver.path}")
+            if own_report:
+                run_report.close()
+                self.gui_callback(f"🧾 Informe por canal: {run_report.path}")
+
+    async def _run_deletion(self, job, target_user_ids, matcher=None, archiver=None,
+                            report=None, stats=None, tag="", run_report=None):
+        """
+        Barre un servidor. En un barrido de todos los servidores, `report` recoge sus
+        cifras, `stats` es compartido y `tag` antepone el nombre del servidor a los logs.
+        `run_report` recibe una fila por canal al terminarlo.
+        """
+        guild = self.bot.get_guild(job.guild_id)
+        if not guild:
+            self.gui_callback("❌ Error: No se encuentra el servidor seleccionado.")
+            return
+
+        self.gui_callback(f"\n🚀 INICIANDO EN: {guild.name}")
+        seven_days_ago = datetime.now(timezone.utc) - timedelta(days=7)
+        check_message = MessageFilter(seven_days_ago, target_user_ids, matcher)
+        self.gui_callback(f"🎯 OBJETIVO: {check_message.describe()}")
+        
+        # Canales de texto, chats de voz, hilos y posts de foros; los que no admiten
+        # el trabajo por permisos se apartan antes de ninguna petición (un solo aviso)
+        planner = PermissionPlanner(guild)
+        targets, skipped = planner.split(await collect_targets(guild, seven_days_ago, self.thread_cache, planner))
+        if skipped:
+            self.gui_callback(f"⚠️ {tag}{describe_skipped(skipped, target_label)}")
+            if run_report is not None:
+                for reason, blocked in skipped.items():
+                    for channel in blocked:
+                        run_report.write(ChannelReport(guild.id, channel.id, tag + target_label(channel),
+                                                       error=reason))
+
+        # Solo por autor y sin archivo: basta con la cache local (el archivo necesita el contenido)
+        use_cache = self.history_cache is not None and matcher is None and archiver is None
+        if use_cache:
+            self.gui_callback("🗄️ Usando la cache local de historial (solo se descarga lo nuevo)")
+        
+        if report is None:
+            report = GuildReport(guild.id, guild.name)
+        # Un solo batcher para todo el barrido: cuenta las peticiones de todos los canales
+        shared_stats = stats is not None
+        if stats is None:
+            stats = RequestStats()
+        forget = (lambda batch: self.history_cache.forget([m.id for m in batch])) if self.history_cache else None
+        batcher = DeleteBatcher(job, "Limpieza Bot GUI", archiver, stats, on_deleted=forget)
+
+        async def worker(channel, i, total):
+            label = tag + target_label(channel)
+            row = ChannelReport(guild.id, channel.id, label)
+            self.gui_callback(f"[{i}/{total}] Escaneando {label}...")
+            start = time.perf_counter()
+            
+            try:
+                if use_cache:
+                    count = await purge_authors_cached(
+                        channel,
+                        self.history_cache,
+                        target_user_ids,
+                        seven_days_ago,
+                        job=job,
+                        reason="Limpieza Bot GUI",
+                        batcher=batcher,
+                        report=row
+                    )
+                else:
+                    count = await purge_channel(
+                        channel, 
+                        check_message, 
+                        seven_days_ago,
+                        job=job,
+                        reason="Limpieza Bot GUI",
+                        archiver=archiver,
+                        batcher=batcher,
+                        report=row
+                    )
+                row.elapsed = time.perf_counter() - start
+                report.channels += 1
+                if count > 0:
+                    self.gui_callback(f"   ✅ {label}: Eliminados {count}")
+                    report.deleted += count
+                
+                # Pausa vital para evitar Rate Limits
+                await asyncio.sleep(1.0) 
+                
+            except Exception as e:
+                report.errors += 1
+                row.error = repr(e)
+                self.gui_callback(f"   ❌ Error en {label}: {e}")
+            finally:
+                if not row.elapsed:
+                    row.elapsed = time.perf_counter() - start
+                if run_report is not None:
+                    run_report.write(row)
+
+        await run_sweep(targets, worker)
+
+        self.gui_callback(f"\n🏁 {tag}PROCESO TERMINADO. Total eliminados: {report.deleted}")
+        if not shared_stats:
+            # En el barrido de todos los servidores el resumen sale una sola vez al final
+            self.gui_callback(f"📈 {stats.summary()}")
+            self.gui_callback(f"🩺 {self.watchdog.summary()}")
+            self.gui_callback("="*40)
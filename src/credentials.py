@@ -0,0 +1,160 @@
+"""
+Almacén local del token del bot
+===============================
+Sustituye al `token.dat` en texto plano. Guarda, en un único archivo JSON:
+  - el token, cifrado con DPAPI en Windows (ligado a la cuenta del usuario);
+    en otros sistemas sin cifrar, con permisos 0600.
+  - la identidad del bot (ID y nombre) vista en la última conexión.
+
+El ID del bot va codificado en la primera parte del token, así que se puede
+comprobar sin red que el token guardado sigue siendo el del bot conocido y
+mostrar su nombre antes de conectar. Un token con formato inválido se detecta
+al momento, sin esperar al login.
+"""
+
+import base64
+import binascii
+import json
+import os
+import sys
+from dataclasses import dataclass
+from typing import Optional
+
+STORE_FILE = "credenciales.dat"
+# Archivo de versiones anteriores (token en texto plano): se migra y se borra
+LEGACY_TOKEN_FILE = "token.dat"
+
+_ENTROPY = b"ChakielBotDiscord"
+
+
+def token_user_id(token: str) -> Optional[int]:
+    """ID del bot codificado en el token (base64 de la primera parte), o None si el formato no es válido"""
+    parts = token.strip().split(".")
+    if len(parts) != 3 or not all(parts):
+        return None
+    head = parts[0]
+    try:
+        decoded = base64.urlsafe_b64decode(head + "=" * (-len(head) % 4)).decode("ascii")
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    return int(decoded) if decoded.isdigit() else None
+
+
+if sys.platform == "win32":
+    import ctypes
+    from ctypes import wintypes
+
+    class _Blob(ctypes.Structure):
+        _fields_ = [("cbData", wintypes.DWORD), ("pbData", ctypes.POINTER(ctypes.c_char))]
+
+    def _dpapi(data: bytes, protect: bool) -> bytes:
+        crypt32 = ctypes.windll.crypt32
+        buffer = ctypes.create_string_buffer(data, len(data))
+        entropy_buffer = ctypes.create_string_buffer(_ENTROPY, len(_ENTROPY))
+        blob_in = _Blob(len(data), ctypes.cast(buffer, ctypes.POINTER(ctypes.c_char)))
+        entropy = _Blob(len(_ENTROPY), ctypes.cast(entropy_buffer, ctypes.POINTER(ctypes.c_char)))
+        blob_out = _Blob()
+        call = crypt32.CryptProtectData if protect else crypt32.CryptUnprotectData
+        # CRYPTPROTECT_UI_FORBIDDEN = 0x1: nunca mostrar diálogos
+        if not call(ctypes.byref(blob_in), None, ctypes.byref(entropy), None, None, 0x1, ctypes.byref(blob_out)):
+            raise OSError(ctypes.FormatError())
+        try:
+            return ctypes.string_at(blob_out.pbData, blob_out.cbData)
+        finally:
+            ctypes.windll.kernel32.LocalFree(blob_out.pbData)
+
+    SCHEME = "dpapi"
+
+    def _protect(data: bytes) -> bytes:
+        return _dpapi(data, True)
+
+    def _unprotect(data: bytes) -> bytes:
+        return _dpapi(data, False)
+else:
+    SCHEME = "plain"
+
+    def _protect(data: bytes) -> bytes:
+        return data
+
+    def _unprotect(data: bytes) -> bytes:
+        return data
+
+
+@dataclass
+class StoredCredentials:
+    token: str
+    bot_id: Optional[int] = None
+    bot_name: Optional[str] = None
+
+    @property
+    def identity_matches(self) -> bool:
+        """El token guardado pertenece al bot de la última conexión (comprobación sin red)"""
+        return self.bot_id is not None and token_user_id(self.token) == self.bot_id
+
+
+class CredentialStore:
+    """Lee y escribe el archivo de credenciales"""
+
+    def __init__(self, path: str = STORE_FILE, legacy_path: str = LEGACY_TOKEN_FILE):
+        self.path = path
+        self.legacy_path = legacy_path
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, data: dict):
+        tmp = self.path + ".tmp"
+        # 0600: solo el usuario actual puede leerlo (en Windows el cifrado hace ese papel)
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    def load(self) -> Optional[StoredCredentials]:
+        """Credenciales guardadas (migrando token.dat si existe), o None"""
+        data = self._read()
+        if data.get("token"):
+            try:
+                token = _unprotect(base64.b64decode(data["token"])).decode("utf-8")
+            except (OSError, ValueError):
+                return None  # Cifrado por otra cuenta u otro equipo: hay que pedirlo de nuevo
+            return StoredCredentials(token, data.get("bot_id"), data.get("bot_name"))
+
+        if os.path.exists(self.legacy_path):
+            with open(self.legacy_path, encoding="utf-8") as f:
+                token = f.read().strip()
+            if token:
+                self.save_token(token)
+                os.remove(self.legacy_path)
+                return StoredCredentials(token)
+        return None
+
+    def save_token(self, token: str):
+        """Guarda un token nuevo (olvida la identidad anterior si es de otro bot)"""
+        token = token.strip()
+        data = self._read()
+        if data.get("bot_id") != token_user_id(token):
+            data.pop("bot_id", None)
+            data.pop("bot_name", None)
+        data["scheme"] = SCHEME
+        data["token"] = base64.b64encode(_protect(token.encode("utf-8"))).decode("ascii")
+        self._write(data)
+
+    def save_identity(self, bot_id: int, bot_name: str):
+        """Recuerda qué bot respondió con este token (se llama al conectar)"""
+        data = self._read()
+        if not data.get("token"):
+            return
+        data["bot_id"] = bot_id
+        data["bot_name"] = bot_name
+        self._write(data)
+
+    def clear(self):
+        """Olvida el token (p. ej. Discord lo rechazó): el próximo arranque lo pedirá"""
+        for path in (self.path, self.legacy_path):
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,163 @@
+"""
+Cache local del historial de mensajes
+=====================================
+Guarda en SQLite (message_id, author_id, timestamp) de cada canal escaneado.
+La siguiente vez solo se pide a Discord lo publicado después del último
+snowflake conocido, y la pregunta "qué mensajes de estos autores hay en esta
+ventana" se responde en local.
+
+Cada canal guarda el rango de snowflakes que tiene completo [floor_id, last_id].
+Los borrados que ve el bot (eventos raw de delete) se quitan de la cache.
+Un borrado hecho con el bot apagado deja una entrada obsoleta, que es
+inofensiva: Discord ignora esos IDs en el bulk delete.
+
+Las escrituras (una por página de historial y por lote borrado) se hacen en
+el event loop del bot, así que la base va en modo WAL con synchronous=NORMAL:
+un commit solo añade al WAL, sin fsync (se sincroniza en los checkpoints).
+Un corte de luz puede perder los últimos commits, que no es más que una
+cache por detrás: la siguiente sincronización los vuelve a traer.
+"""
+
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import discord
+from discord.utils import time_snowflake
+
+# Archivo por defecto (junto al token y al log)
+DEFAULT_PATH = "historial_cache.sqlite3"
+# El bulk delete solo acepta mensajes de menos de 14 días: lo anterior no sirve de nada
+RETENTION_DAYS = 14
+# Filas por escritura durante la sincronización (una página del historial)
+SYNC_BATCH = 100
+# IDs por consulta al leer los mensajes de unos autores
+AUTHORED_PAGE = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    message_id INTEGER PRIMARY KEY,
+    channel_id INTEGER NOT NULL,
+    author_id  INTEGER NOT NULL,
+    ts         REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_by_author ON messages (channel_id, author_id, message_id);
+CREATE TABLE IF NOT EXISTS channels (
+    channel_id INTEGER PRIMARY KEY,
+    floor_id   INTEGER NOT NULL,
+    last_id    INTEGER NOT NULL
+);
+"""
+
+
+class HistoryCache:
+    """Cache en disco de autores y fechas de los mensajes por canal"""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        # Solo se usa desde el event loop del bot, pero el loop puede vivir en otro hilo
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # Commits sin fsync: no bloquean el event loop en cada página ni en cada lote borrado
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self.prune()
+
+    def close(self):
+        self._db.close()
+
+    def coverage(self, channel_id: int):
+        """(floor_id, last_id) del rango completo del canal, o None si nunca se sincronizó"""
+        return self._db.execute(
+            "SELECT floor_id, last_id FROM channels WHERE channel_id = ?", (channel_id,)
+        ).fetchone()
+
+    async def sync(self, channel, after: datetime, job=None) -> int:
+        """
+        Trae a la cache los mensajes de `channel` posteriores a `after` que aún no tiene.
+        Devuelve cuántos se descargaron (0 si la cache ya estaba al día).
+        """
+        floor = time_snowflake(after)
+        known = self.coverage(channel.id)
+        if known and known[0] <= floor:
+            floor, start = known[0], known[1]
+        else:
+            # La ventana empieza antes de lo cacheado: se rehace el canal desde `after`
+            self.forget_channel(channel.id)
+            start = floor
+
+        fetched = 0
+        last = start
+        rows = []
+        if job is not None:
+            await job.next_page()  # Primera página
+        try:
+            # Con `after` el historial llega del más antiguo al más reciente
+            async for msg in channel.history(limit=None, after=discord.Object(id=start)):
+                rows.append((msg.id, channel.id, msg.author.id, msg.created_at.timestamp()))
+                if len(rows) == SYNC_BATCH:
+                    last = self._store(channel.id, floor, rows)
+                    fetched += len(rows)
+                    rows = []
+                    if job is not None:
+                        await job.next_page()
+        finally:
+            # Lo descargado hasta una cancelación o un error sigue siendo un rango contiguo
+            if rows:
+                last = self._store(channel.id, floor, rows)
+                fetched += len(rows)
+            elif last == start:
+                with self._db:
+                    self._set_coverage(channel.id, floor, last)
+        return fetched
+
+    def _store(self, channel_id, floor, rows):
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?)", rows)
+            self._set_coverage(channel_id, floor, rows[-1][0])
+        return rows[-1][0]
+
+    def _set_coverage(self, channel_id, floor, last):
+        self._db.execute("INSERT OR REPLACE INTO channels VALUES (?, ?, ?)", (channel_id, floor, last))
+
+    def authored(self, channel_id: int, author_ids, after: datetime):
+        """
+        IDs de los mensajes de `author_ids` en el canal posteriores a `after`, del más antiguo
+        al más reciente. Se leen de AUTHORED_PAGE en AUTHORED_PAGE (por rango de ID, sin
+        cursor abierto): la memoria no crece con el canal y se puede borrar mientras se itera.
+        """
+        author_ids = list(author_ids)
+        marks = ",".join("?" * len(author_ids))
+        query = (f"SELECT message_id FROM messages WHERE channel_id = ? AND author_id IN ({marks}) "
+                 f"AND message_id > ? ORDER BY message_id LIMIT {AUTHORED_PAGE}")
+        last = time_snowflake(after)
+        while True:
+            page = [row[0] for row in self._db.execute(query, (channel_id, *author_ids, last))]
+            yield from page
+            if len(page) < AUTHORED_PAGE:
+                return
+            last = page[-1]
+
+    def forget(self, message_ids):
+        """Quita mensajes borrados (por el bot o vistos en eventos de borrado)"""
+        with self._db:
+            self._db.executemany("DELETE FROM messages WHERE message_id = ?", ((i,) for i in message_ids))
+
+    def forget_channel(self, channel_id: int):
+        """Descarta todo lo cacheado de un canal: el próximo sync lo rehace entero"""
+        with self._db:
+            self._db.execute("DELETE FROM messages WHERE channel_id = ?", (channel_id,))
+            self._db.execute("DELETE FROM channels WHERE channel_id = ?", (channel_id,))
+
+    def prune(self, days: int = RETENTION_DAYS):
+        """Borra lo que ya no se puede eliminar con bulk delete y sube el suelo de cada canal"""
+        limit = time_snowflake(datetime.now(timezone.utc) - timedelta(days=days))
+        with self._db:
+            self._db.execute("DELETE FROM messages WHERE message_id < ?", (limit,))
+            self._db.execute("UPDATE channels SET floor_id = ?, last_id = MAX(last_id, ?) WHERE floor_id < ?",
+                             (limit, limit, limit))
+
+    def stats(self):
+        """(canales, mensajes) cacheados"""
+        channels = self._db.execute("SELECT COUNT(*) FROM channels").fetchone()[0]
+        messages = self._db.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+        return channels, messages
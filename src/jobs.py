@@ -0,0 +1,191 @@
+"""
+Control de trabajos de eliminación
+==================================
+Un DeletionJob representa una purga en curso sobre un servidor y permite
+pausarla, reanudarla, cancelarla o limitar su ritmo mientras corre.
+Los métodos de control son seguros desde cualquier hilo (GUI, consola).
+
+Un JobGroup agrupa los trabajos de varios servidores que corren a la vez
+("borrar a este usuario en todos los servidores"): se controlan juntos y
+comparten un RateLimiter global, además del límite propio de cada servidor.
+
+Con un MemoryBudget (memory_budget.py), next_page() mide la memoria antes de
+cada página de historial y avisa si el proceso supera el presupuesto.
+"""
+
+import asyncio
+import threading
+
+# Techo global de peticiones/s con varios servidores a la vez. Discord permite 50/s
+# por bot; se deja margen para el gateway y los reintentos de discord.py.
+GLOBAL_RATE = 40.0
+
+
+class RateLimiter:
+    """Reparte huecos de petición a ritmo fijo entre todos los que lo comparten"""
+
+    def __init__(self, max_rate: float = None):
+        self.max_rate = max_rate  # Peticiones por segundo (None = sin límite)
+        self._next_slot = 0.0
+
+    async def acquire(self, requests: int = 1):
+        if not self.max_rate:
+            return
+        now = asyncio.get_running_loop().time()
+        start = max(now, self._next_slot)
+        self._next_slot = start + requests / self.max_rate
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+class DeletionJob:
+    """Handle de un trabajo de eliminación sobre un servidor"""
+
+    def __init__(self, guild_id: int, loop: asyncio.AbstractEventLoop, max_rate: float = None,
+                 shared_limit: RateLimiter = None, budget=None):
+        self.guild_id = guild_id
+        self.loop = loop
+        self.max_rate = max_rate  # Peticiones por segundo (None = sin límite)
+        self.shared_limit = shared_limit  # Límite global del JobGroup, si lo hay
+        self.budget = budget  # memory_budget.MemoryBudget, si lo hay
+        self.state = "pending"  # pending / running / paused / cancelled / finished
+        self.future = None
+        self._running = asyncio.Event()
+        self._running.set()
+        self._next_slot = 0.0
+
+    # --- Control (seguro entre hilos) ---
+
+    def pause(self):
+        self.loop.call_soon_threadsafe(self._set_paused, True)
+
+    def resume(self):
+        self.loop.call_soon_threadsafe(self._set_paused, False)
+
+    def cancel(self):
+        self.state = "cancelled"
+        if self.future is not None:
+            # Task.cancel() no es seguro entre hilos: se delega al loop
+            self.loop.call_soon_threadsafe(self.future.cancel)
+
+    def set_rate(self, max_rate: float = None):
+        """Cambia el techo de peticiones por segundo (None o 0 = sin límite)"""
+        self.max_rate = max_rate or None
+
+    @property
+    def done(self) -> bool:
+        return self.state in ("cancelled", "finished")
+
+    def _set_paused(self, paused: bool):
+        if self.done:
+            return
+        if paused:
+            self._running.clear()
+            self.state = "paused"
+        else:
+            self._running.set()
+            self.state = "running"
+
+    # --- Usado por el motor dentro del event loop ---
+
+    async def checkpoint(self):
+        """Espera mientras el trabajo esté en pausa"""
+        await self._running.wait()
+
+    async def throttle(self, requests: int = 1):
+        """Reserva `requests` peticiones respetando el techo de ritmo (y el global, si lo hay)"""
+        await self.checkpoint()
+        if self.max_rate:
+            now = self.loop.time()
+            start = max(now, self._next_slot)
+            self._next_slot = start + requests / self.max_rate
+            if start > now:
+                await asyncio.sleep(start - now)
+        if self.shared_limit is not None:
+            await self.shared_limit.acquire(requests)
+
+    async def next_page(self):
+        """Antes de pedir una página de historial: comprobación de memoria y luego throttle()"""
+        if self.budget is not None:
+            self.budget.check()
+        await self.throttle()
+
+
+class JobGroup:
+    """
+    Trabajos de varios servidores lanzados juntos. Expone los mismos controles
+    que DeletionJob (pausar, reanudar, cancelar, límite por servidor) y los
+    aplica a todos.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_rate: float = None, global_rate: float = GLOBAL_RATE,
+                 budget=None):
+        self.loop = loop
+        self.max_rate = max_rate
+        self.budget = budget
+        self.limiter = RateLimiter(global_rate)
+        self.jobs = []
+
+    def add(self, guild_id: int, registry: "JobRegistry"):
+        """Planifica el trabajo de un servidor; None si ya hay otro en curso en él"""
+        job = DeletionJob(guild_id, self.loop, self.max_rate, self.limiter, self.budget)
+        if not registry.acquire(job):
+            return None
+        self.jobs.append(job)
+        return job
+
+    def pause(self):
+        for job in self.jobs:
+            job.pause()
+
+    def resume(self):
+        for job in self.jobs:
+            job.resume()
+
+    def cancel(self):
+        for job in self.jobs:
+            job.cancel()
+
+    def set_rate(self, max_rate: float = None):
+        """Cambia el techo por servidor; el global se mantiene"""
+        self.max_rate = max_rate or None
+        for job in self.jobs:
+            job.set_rate(max_rate)
+
+    @property
+    def state(self) -> str:
+        states = {job.state for job in self.jobs}
+        for state in ("running", "paused", "pending", "cancelled"):
+            if state in states:
+                return state
+        return "finished"
+
+    @property
+    def done(self) -> bool:
+        return all(job.done for job in self.jobs)
+
+
+class JobRegistry:
+    """Garantiza un único trabajo activo por servidor"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = {}  # guild_id -> DeletionJob
+
+    def acquire(self, job: DeletionJob) -> bool:
+        """Registra el trabajo; False si ya hay otro en curso en ese servidor"""
+        with self._lock:
+            current = self._active.get(job.guild_id)
+            if current is not None and not current.done:
+                return False
+            self._active[job.guild_id] = job
+            return True
+
+    def release(self, job: DeletionJob):
+        with self._lock:
+            if self._active.get(job.guild_id) is job:
+                del self._active[job.guild_id]
+
+    def get(self, guild_id: int):
+        with self._lock:
+            return self._active.get(guild_id)
@@ -0,0 +1,163 @@
+"""
+Logs sin bloquear el event loop
+===============================
+Los handlers de consola y archivo escriben de forma síncrona: con
+logging.basicConfig cada línea de una purga grande bloqueaba el event loop
+(disco y terminal). Aquí el loop solo encola el registro (QueueHandler) y un
+hilo aparte (QueueListener) lo escribe:
+  - en consola, legible y desde INFO,
+  - en LOG_FILE, un objeto JSON por línea con los campos estructurados del
+    registro (job, channel, latency_ms, ...), con rotación por tamaño.
+
+Campos estructurados: `logger.info("...", extra={"job": 123, "channel": "#general"})`.
+Los eventos de mucho volumen llevan además un `event` y se muestrean según su
+nivel (SAMPLING): se conserva 1 de cada N y el registro guardado lleva
+`sample_rate` = N para poder reponderar. WARNING y superiores nunca se muestrean.
+
+El tiempo que el loop pasa dentro de logging se mide (LogPipeline.blocked).
+"""
+
+import atexit
+import itertools
+import json
+import logging
+import queue
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FILE = "bot_deletion.log"
+# Rotación: 5 MB por archivo, 3 copias anteriores (bot_deletion.log.1 ... .3)
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 3
+# 1 de cada N eventos de mucho volumen por nivel (1 = todos)
+SAMPLING = {logging.DEBUG: 20, logging.INFO: 1}
+CONSOLE_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# Atributos propios de LogRecord: todo lo demás son campos estructurados (extra=...)
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+_TRACEBACKS = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    """Un objeto JSON por línea: ts, level, logger, msg y los campos de `extra`"""
+
+    def format(self, record):
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Deja pasar 1 de cada N registros con `event`, según el nivel (ver SAMPLING)"""
+
+    def __init__(self, every=None):
+        super().__init__()
+        self.every = SAMPLING if every is None else every
+        self._counters = {}
+
+    def filter(self, record):
+        event = getattr(record, "event", None)
+        rate = self.every.get(record.levelno, 1)
+        if event is None or rate <= 1 or record.levelno >= logging.WARNING:
+            return True
+        counter = self._counters.get((event, record.levelno))
+        if counter is None:
+            counter = self._counters.setdefault((event, record.levelno), itertools.count())
+        if next(counter) % rate:
+            return False
+        record.sample_rate = rate
+        return True
+
+
+class TimedQueueHandler(QueueHandler):
+    """QueueHandler que acumula el tiempo que quien registra pasa dentro de logging"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.blocked = 0.0
+        self.records = 0
+
+    def prepare(self, record):
+        # Lo mínimo en el hilo del loop: fijar el texto (los args podrían cambiar después).
+        # Sin copia ni formato: es el único handler del logger raíz
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _TRACEBACKS.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def handle(self, record):
+        start = time.perf_counter()
+        try:
+            return super().handle(record)
+        finally:
+            self.blocked += time.perf_counter() - start
+            self.records += 1
+
+
+class LogPipeline:
+    """Handlers en un hilo aparte; el loop solo encola"""
+
+    def __init__(self, path: str = LOG_FILE, console: bool = True, sampling=None):
+        self.path = path
+        self._queue = queue.SimpleQueue()
+        self.handler = TimedQueueHandler(self._queue)
+        self.handler.addFilter(SamplingFilter(sampling))
+
+        file_handler = RotatingFileHandler(path, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT,
+                                           encoding="utf-8", delay=True)
+        file_handler.setFormatter(JsonFormatter())
+        handlers = [file_handler]
+        if console:
+            console_handler = logging.StreamHandler()
+            console_handler.setLevel(logging.INFO)
+            console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+            handlers.append(console_handler)
+        self.listener = QueueListener(self._queue, *handlers, respect_handler_level=True)
+        self._running = False
+
+    def install(self, level=logging.DEBUG):
+        """Sustituye los handlers del logger raíz y arranca el hilo escritor"""
+        # Datos del registro que no se usan: ahorran buscar el llamador en la pila en cada línea
+        # (optimizaciones documentadas del módulo logging)
+        logging._srcfile = None
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+        root = logging.getLogger()
+        root.handlers[:] = [self.handler]
+        root.setLevel(level)
+        # discord.py registra cada evento del gateway en DEBUG
+        logging.getLogger("discord").setLevel(logging.INFO)
+        self.listener.start()
+        self._running = True
+        atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        """Vacía la cola y para el hilo escritor (idempotente)"""
+        if self._running:
+            self._running = False
+            self.listener.stop()
+
+    @property
+    def blocked(self) -> float:
+        """Segundos totales que el código que registra pasó dentro de logging"""
+        return self.handler.blocked
+
+    def summary(self) -> str:
+        per_record = self.blocked / self.handler.records * 1e6 if self.handler.records else 0.0
+        return (f"{self.handler.records} registros, {self.blocked * 1000:.1f} ms de bloqueo "
+                f"({per_record:.1f} µs por registro)")
@@ -0,0 +1,159 @@
+"""
+Vigilancia del event loop
+=========================
+Un callback que bloquea el loop (un input(), E/S de disco, CPU) retrasa
+también el heartbeat del gateway, y si se repite Discord cierra la conexión.
+LoopWatchdog lo detecta antes:
+  - lag del loop: una tarea se despierta cada TICK y mide cuánto tarde llega,
+  - callbacks lentos: un hilo vigila esa tarea; si el loop lleva más de
+    `slow_callback` segundos sin despertarla, registra la pila del hilo del
+    loop en ese momento (qué código lo está bloqueando), una vez por bloqueo,
+  - latencia del heartbeat: el ACK del gateway (client.latency),
+  - perfil por muestreo bajo demanda (profile()): muestras de la pila del
+    hilo del loop en formato "folded" (una pila por línea con su número de
+    muestras), legible con flamegraph.pl o speedscope.
+
+Todo el informe sale por `report(mensaje)`: logger en la consola, la GUI en la app.
+"""
+
+import asyncio
+import collections
+import os
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+
+# Cada cuánto se despierta la tarea de medida
+TICK = 0.1
+# Un callback que retiene el loop más de esto se registra con su pila
+SLOW_CALLBACK = 0.25
+# Latencia del heartbeat (ACK) a partir de la que se avisa
+HEARTBEAT_WARN = 1.0
+# Cada cuánto se mira la latencia del heartbeat
+HEARTBEAT_CHECK = 10.0
+# Frames de la pila que se registran por bloqueo
+STACK_DEPTH = 12
+# Intervalo entre muestras del perfil
+PROFILE_INTERVAL = 0.005
+
+
+class LoopWatchdog:
+    """Mide el lag del loop, caza callbacks lentos y vigila el heartbeat de `client`"""
+
+    def __init__(self, report, client=None, slow_callback: float = SLOW_CALLBACK):
+        self.report = report
+        self.client = client
+        self.slow_callback = slow_callback
+        self.max_lag = 0.0
+        self.stalls = 0  # Bloqueos de más de slow_callback
+        self.max_heartbeat = 0.0
+        self._lags = collections.deque(maxlen=3000)  # ~5 min de medidas
+        self._beat = 0.0
+        self._loop_thread = None
+        self._task = None
+        self._stop = threading.Event()
+        self._heartbeat_slow = False
+
+    def start(self):
+        """Arranca la vigilancia; se llama desde dentro del loop (p. ej. en on_ready)"""
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.ensure_future(self._tick())
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _tick(self):
+        last_heartbeat = time.monotonic()
+        while True:
+            start = time.monotonic()
+            self._beat = start
+            await asyncio.sleep(TICK)
+            now = time.monotonic()
+            lag = now - start - TICK
+            self._lags.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if self.client is not None and now - last_heartbeat >= HEARTBEAT_CHECK:
+                last_heartbeat = now
+                self._check_heartbeat()
+
+    def _check_heartbeat(self):
+        latency = self.client.latency
+        if latency != latency or latency == float("inf"):
+            return  # Aún sin ACK (o reconectando)
+        self.max_heartbeat = max(self.max_heartbeat, latency)
+        if latency > HEARTBEAT_WARN and not self._heartbeat_slow:
+            self.report(f"💓 Heartbeat lento: el gateway tarda {latency * 1000:.0f} ms en confirmar")
+        self._heartbeat_slow = latency > HEARTBEAT_WARN
+
+    def _watch(self):
+        """Hilo vigilante: si el loop no despierta a _tick a tiempo, registra qué está ejecutando"""
+        reported = None
+        while not self._stop.wait(TICK / 2):
+            beat = self._beat
+            stalled = time.monotonic() - beat - TICK
+            if stalled <= self.slow_callback or reported == beat:
+                continue
+            reported = beat
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = "".join(traceback.format_stack(frame, limit=-STACK_DEPTH)) if frame else ""
+            self.report(f"🐢 El event loop lleva {stalled * 1000:.0f} ms bloqueado por un callback. Pila:\n{stack}")
+
+    def summary(self) -> str:
+        lags = sorted(self._lags)
+        p99 = lags[int(len(lags) * 0.99)] if lags else 0.0
+        text = (f"lag del loop p99 {p99 * 1000:.0f} ms, máx. {self.max_lag * 1000:.0f} ms; "
+                f"{self.stalls} bloqueos de más de {self.slow_callback * 1000:.0f} ms")
+        if self.max_heartbeat:
+            text += f"; heartbeat máx. {self.max_heartbeat * 1000:.0f} ms"
+        return text
+
+    def profile(self, seconds: float = 10.0, directory: str = "."):
+        """
+        Muestrea la pila del hilo del loop durante `seconds` en un hilo aparte y guarda
+        el perfil en <directory>/perfil_loop_<fecha>.txt (formato folded).
+        """
+        if self._loop_thread is None:
+            self.report("⚠️ La vigilancia del loop aún no ha arrancado.")
+            return
+        path = os.path.join(directory, f"perfil_loop_{datetime.now():%Y%m%d_%H%M%S}.txt")
+        threading.Thread(target=self._sample, args=(seconds, path), name="loop-profiler", daemon=True).start()
+        self.report(f"📊 Perfilando el event loop durante {seconds:.0f}s...")
+
+    def _sample(self, seconds, path):
+        stacks = collections.Counter()
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is not None:
+                stacks[_fold(frame)] += 1
+            time.sleep(PROFILE_INTERVAL)
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        # Resumen: funciones donde más tiempo estuvo el loop (hoja de cada pila)
+        leaves = collections.Counter()
+        for stack, count in stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(stacks.values()) or 1
+        top = ", ".join(f"{name} {count * 100 / total:.0f}%" for name, count in leaves.most_common(5))
+        self.report(f"📊 Perfil guardado en {path} ({total} muestras). Más frecuentes: {top}")
+
+
+def _fold(frame) -> str:
+    """Pila como 'modulo:funcion;modulo:funcion;...' de la raíz a la hoja"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
@@ -1,110 +1,34 @@
-import discord
-import asyncio
+import time
+_T_START = time.perf_counter() # Para la medición de arranque (STARTUP_PROBE)
+
+import multiprocessing
 import threading
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, simpledialog
-from datetime import datetime, timedelta, timezone
 import os # Necesario para manejar archivos
 
-# --- CONFIGURACIÓN ---
-TOKEN_FILE = "token.dat" # Nombre del archivo donde se guardará el token de forma local
-
-class DiscordBotThread(threading.Thread):
-    def __init__(self, token, gui_callback):
-        super().__init__()
-        self.token = token
-        self.gui_callback = gui_callback 
-        self.loop = asyncio.new_event_loop()
-        self.bot = discord.Client(intents=self._get_intents())
-        self.ready_event = threading.Event()
-        
-        self.bot.event(self.on_ready)
-
-    def _get_intents(self):
-        intents = discord.Intents.default()
-        intents.message_content = True
-        intents.guilds = True
-        intents.members = True
-        return intents
-
-    def run(self):
-        """Este método se ejecuta en un hilo separado (background)"""
-        asyncio.set_event_loop(self.loop)
-        try:
-            self.loop.run_until_complete(self.bot.start(self.token))
-        except discord.LoginFailure:
-            self.gui_callback("❌ Error: Token de Discord inválido. Vuelve a ejecutar para ingresar el token.")
-        except Exception as e:
-            self.gui_callback(f"❌ Error de conexión: {e}")
-
-    async def on_ready(self):
-        self.gui_callback(f"✅ Bot conectado como: {self.bot.user}")
-        self.ready_event.set() 
-
-    def get_guilds(self):
-        """Devuelve lista de servidores (ID, Nombre)"""
-        return [(g.id, g.name) for g in self.bot.guilds]
-
-    def start_deletion(self, guild_id, target_user_id):
-        """Inicia la tarea de eliminación en el loop del bot de forma segura"""
-        asyncio.run_coroutine_threadsafe(
-            self._delete_task(guild_id, target_user_id), 
-            self.loop
-        )
-
-    async def _delete_task(self, guild_id, target_user_id):
-        guild = self.bot.get_guild(guild_id)
-        if not guild:
-            self.gui_callback("❌ Error: No se encuentra el servidor seleccionado.")
-            return
-
-        self.gui_callback(f"\n🚀 INICIANDO EN: {guild.name}")
-        self.gui_callback(f"🎯 OBJETIVO ID: {target_user_id}")
-        
-        seven_days_ago = datetime.now(timezone.utc) - timedelta(days=7)
-        text_channels = [ch for ch in guild.text_channels]
-        
-        total_deleted = 0
-        
-        def check_message(msg):
-            return (msg.author.id == target_user_id and 
-                    msg.created_at.replace(tzinfo=timezone.utc) > seven_days_ago)
-
-        for i, channel in enumerate(text_channels, 1):
-            perms = channel.permissions_for(guild.me)
-            if not perms.manage_messages or not perms.read_message_history:
-                self.gui_callback(f"⚠️ Saltando #{channel.name} (Sin permisos)")
-                continue
+from credentials import STORE_FILE, CredentialStore, token_user_id # Ligero: solo stdlib
+from retention import RetentionStore # Ligero: solo stdlib
 
-            self.gui_callback(f"[{i}/{len(text_channels)}] Escaneando #{channel.name}...")
-            
-            try:
-                deleted = await channel.purge(
-                    limit=None, 
-                    check=check_message, 
-                    after=seven_days_ago,
-                    reason="Limpieza Bot GUI"
-                )
-                count = len(deleted)
-                if count > 0:
-                    self.gui_callback(f"   ✅ Eliminados: {count}")
-                    total_deleted += count
-                
-                # Pausa vital para evitar Rate Limits
-                await asyncio.sleep(1.0) 
-                
-            except Exception as e:
-                self.gui_callback(f"   ❌ Error en #{channel.name}: {e}")
+# discord.py y el motor se importan en segundo plano (_boot_engine):
+# la ventana aparece antes de cargar los módulos pesados.
+_T_IMPORTS = time.perf_counter()
 
-        self.gui_callback(f"\n🏁 PROCESO TERMINADO. Total eliminados: {total_deleted}")
-        self.gui_callback("="*40)
+# --- CONFIGURACIÓN ---
+# "thread": el bot corre en un hilo dentro de la GUI.
+# "process": el bot corre en un proceso aparte y la GUI no compite por el GIL en purgas grandes.
+ENGINE_MODE = os.environ.get("BOT_ENGINE_MODE", "thread")
+ARCHIVE_DIR = "archivo_auditoria" # Carpeta de las copias de mensajes eliminados
+ALL_GUILDS = "🌐 Todos los servidores" # Entrada del combo que barre todos a la vez
+# Si está definida, la app imprime sus tiempos de arranque y se cierra (benchmarks/startup_time.py)
+STARTUP_PROBE = os.environ.get("BOT_STARTUP_PROBE")
 
 
 class BotApp(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Discord Cleaner Bot - GUI")
-        self.geometry("600x550")
+        self.geometry("600x720")
         self.resizable(False, False)
         
         style = ttk.Style()
@@ -112,12 +36,39 @@ class BotApp(tk.Tk):
 
         self.bot_thread = None
         self.guild_map = {}
+        self.active_guild_id = None # Servidor del último trabajo lanzado (None = todos)
+        self.has_job = False
 
         self._create_widgets()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
         
+        if STARTUP_PROBE:
+            self.after(0, self._startup_probe)
+            return
+
         # Iniciar el proceso de carga/solicitud de token
         self.after(100, self.load_or_ask_token)
 
+    def on_close(self):
+        """Cierra el bot guardando su sesión (el próximo arranque la reanuda) y la ventana"""
+        if self.bot_thread is not None:
+            self.lbl_status.config(text="👋 Cerrando...", foreground="orange")
+            self.update_idletasks()
+            self.bot_thread.stop()
+        self.destroy()
+
+    def _startup_probe(self):
+        """Mide primer pintado y carga del motor, imprime los tiempos y cierra"""
+        self.update()
+        t_paint = time.perf_counter()
+        t0 = time.perf_counter()
+        import bot_thread # noqa: F401 (lo que _boot_engine hace en segundo plano)
+        t_engine = time.perf_counter() - t0
+        print(f"STARTUP import_ms={(_T_IMPORTS - _T_START) * 1000:.1f} "
+              f"first_paint_ms={(t_paint - _T_START) * 1000:.1f} "
+              f"engine_import_ms={t_engine * 1000:.1f}", flush=True)
+        self.destroy()
+
 
     def _create_widgets(self):
         # ... (Widgets de la GUI, idénticos a la versión anterior) ...
@@ -137,35 +88,81 @@ class BotApp(tk.Tk):
         self.combo_guilds.pack(fill=tk.X)
         self.combo_guilds.set("Esperando token...")
 
-        lbl_user = ttk.Label(main_frame, text="ID del Usuario (Click derecho en usuario -> Copiar ID):")
+        lbl_user = ttk.Label(main_frame, text="ID(s) del Usuario, separados por coma (Click derecho en usuario -> Copiar ID):")
         lbl_user.pack(anchor="w", pady=(15, 2))
         
-        self.entry_user_id = ttk.Entry(main_frame)
-        self.entry_user_id.pack(fill=tk.X)
+        user_row = ttk.Frame(main_frame)
+        user_row.pack(fill=tk.X)
+        self.btn_spam = ttk.Button(user_row, text="🔎 Detectar cuentas de spam", command=self.analyze_spam)
+        self.btn_spam.pack(side=tk.RIGHT, padx=(5, 0))
+        self.btn_spam.config(state="disabled")
+        self.entry_user_id = ttk.Entry(user_row)
+        self.entry_user_id.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        lbl_patterns = ttk.Label(main_frame, text="Patrones de contenido, uno por línea (texto, re:<regex>, dominio:<dominio>):")
+        lbl_patterns.pack(anchor="w", pady=(10, 2))
+
+        self.text_patterns = tk.Text(main_frame, height=3, font=("Consolas", 9))
+        self.text_patterns.pack(fill=tk.X)
+
+        self.archive_var = tk.BooleanVar(value=False)
+        chk_archive = ttk.Checkbutton(main_frame, text=f"📦 Guardar copia de los mensajes eliminados (carpeta '{ARCHIVE_DIR}')", variable=self.archive_var)
+        chk_archive.pack(anchor="w", pady=(10, 0))
 
         self.btn_run = ttk.Button(main_frame, text="🗑️ ELIMINAR MENSAJES (Últimos 7 días)", command=self.confirm_and_run)
-        self.btn_run.pack(fill=tk.X, pady=20)
+        self.btn_run.pack(fill=tk.X, pady=(10, 5))
         self.btn_run.config(state="disabled")
 
-        lbl_log = ttk.Label(main_frame, text="Registro de operaciones:")
-        lbl_log.pack(anchor="w")
+        # Controles del trabajo en curso
+        controls = ttk.Frame(main_frame)
+        controls.pack(fill=tk.X, pady=(0, 15))
+
+        self.btn_pause = ttk.Button(controls, text="⏸️ Pausar", command=self.pause_job)
+        self.btn_pause.pack(side=tk.LEFT)
+        self.btn_resume = ttk.Button(controls, text="▶️ Reanudar", command=self.resume_job)
+        self.btn_resume.pack(side=tk.LEFT, padx=5)
+        self.btn_cancel = ttk.Button(controls, text="⏹️ Cancelar", command=self.cancel_job)
+        self.btn_cancel.pack(side=tk.LEFT)
+
+        self.rate_var = tk.StringVar(value="0")
+        self.spin_rate = ttk.Spinbox(controls, from_=0, to=50, width=5, textvariable=self.rate_var, command=self.apply_rate)
+        self.spin_rate.pack(side=tk.RIGHT)
+        self.spin_rate.bind("<Return>", lambda e: self.apply_rate())
+        lbl_rate = ttk.Label(controls, text="Límite peticiones/s (0 = sin límite):")
+        lbl_rate.pack(side=tk.RIGHT, padx=5)
+
+        log_row = ttk.Frame(main_frame)
+        log_row.pack(fill=tk.X)
+        lbl_log = ttk.Label(log_row, text="Registro de operaciones:")
+        lbl_log.pack(side=tk.LEFT)
+        self.btn_profile = ttk.Button(log_row, text="🩺 Perfil del bot (10 s)", command=self.profile_loop)
+        self.btn_profile.pack(side=tk.RIGHT)
+        self.btn_retention = ttk.Button(log_row, text="🕒 Retención...", command=self.edit_retention)
+        self.btn_retention.pack(side=tk.RIGHT, padx=5)
         
         self.log_area = scrolledtext.ScrolledText(main_frame, height=12, state='disabled', font=("Consolas", 9))
         self.log_area.pack(fill=tk.BOTH, expand=True)
 
     def load_or_ask_token(self):
-        """Verifica si el token existe, si no, lo pide."""
-        
-        if os.path.exists(TOKEN_FILE):
-            try:
-                with open(TOKEN_FILE, 'r') as f:
-                    token = f.read().strip()
-                if token:
-                    self.log(f"✅ Token encontrado en {TOKEN_FILE}. Iniciando conexión.")
-                    self._start_bot_thread(token)
-                    return
-            except Exception as e:
-                self.log(f"⚠️ Error al leer el token: {e}. Solicitando nuevamente.")
+        """Lee (y descifra) el token fuera del hilo de Tk; si no hay, lo pide."""
+        threading.Thread(target=self._load_credentials, daemon=True).start()
+
+    def _load_credentials(self):
+        try:
+            credentials = CredentialStore().load()
+        except Exception as e:
+            self.log(f"⚠️ Error al leer el token: {e}. Solicitando nuevamente.")
+            credentials = None
+        self.after(0, self._on_credentials, credentials)
+
+    def _on_credentials(self, credentials):
+        if credentials and credentials.token:
+            if credentials.identity_matches:
+                # Mismo bot que en la última conexión: se muestra sin esperar al gateway
+                self.lbl_status.config(text=f"🔌 Conectando como {credentials.bot_name}...", foreground="orange")
+            self.log(f"✅ Token encontrado en {STORE_FILE}. Iniciando conexión.")
+            self._start_bot_thread(credentials.token)
+            return
         
         # Si el archivo no existe o está vacío, pedir el token
         self.lbl_status.config(text="⚠️ Token no encontrado. Ingresa el token de Discord.", foreground="red")
@@ -176,17 +173,21 @@ class BotApp(tk.Tk):
     def _show_token_dialog(self):
         token = simpledialog.askstring(
             "Autenticación del Bot", 
-            "¡Primera ejecución!\n\nPor favor, ingresa tu token de Bot de Discord:\n(Será guardado en 'token.dat' para uso futuro)", 
+            f"¡Primera ejecución!\n\nPor favor, ingresa tu token de Bot de Discord:\n(Será guardado en '{STORE_FILE}' para uso futuro)", 
             parent=self, 
             show='*' # Ocultar el token mientras se escribe
         )
         
         if token:
+            if token_user_id(token) is None:
+                # Formato incorrecto: no hace falta esperar a que Discord lo rechace
+                messagebox.showerror("Token inválido", "Eso no parece un token de bot de Discord. Revisa que esté completo.")
+                self.after(0, self._show_token_dialog)
+                return
             try:
-                # Guardar el token para futuras ejecuciones
-                with open(TOKEN_FILE, 'w') as f:
-                    f.write(token.strip())
-                self._start_bot_thread(token)
+                # Guardar el token (cifrado en Windows) para futuras ejecuciones
+                CredentialStore().save_token(token)
+                self._start_bot_thread(token.strip())
             except Exception as e:
                 messagebox.showerror("Error de Guardado", f"No se pudo guardar el token. Error: {e}")
                 self.lbl_status.config(text="❌ Error fatal. Cierra el programa.", foreground="black")
@@ -195,13 +196,24 @@ class BotApp(tk.Tk):
             self.destroy() # Cerrar la aplicación si no se da el token
 
     def _start_bot_thread(self, token):
-        self.bot_thread = DiscordBotThread(token, self.log)
-        self.bot_thread.daemon = True
-        self.bot_thread.start()
+        self.lbl_status.config(text="🔌 Conectando bot...", foreground="orange")
+        threading.Thread(target=self._boot_engine, args=(token,), daemon=True).start()
         self.after(1000, self.check_connection)
 
+    def _boot_engine(self, token):
+        """Importa discord.py y arranca el motor fuera del hilo de Tk"""
+        if ENGINE_MODE == "process":
+            from bot_process import DiscordBotProcess as Engine
+        else:
+            from bot_thread import DiscordBotThread as Engine
+        engine = Engine(token, self.log)
+        engine.suspects_callback = lambda ids: self.after(0, self._fill_suspects, ids)
+        engine.daemon = True
+        engine.start()
+        self.bot_thread = engine
+
     def check_connection(self):
-        if self.bot_thread.ready_event.is_set():
+        if self.bot_thread is not None and self.bot_thread.ready_event.is_set():
             self.lbl_status.config(text="✅ Conectado y Listo", foreground="green")
             self.load_guilds()
         else:
@@ -220,11 +232,15 @@ class BotApp(tk.Tk):
             display_name = f"{gname} (ID: {gid})"
             guild_names.append(display_name)
             self.guild_map[display_name] = gid
+        if len(guilds) > 1:
+            guild_names.append(ALL_GUILDS)
+            self.guild_map[ALL_GUILDS] = None
             
         self.combo_guilds['values'] = guild_names
         if guild_names:
             self.combo_guilds.current(0)
             self.btn_run.config(state="normal")
+            self.btn_spam.config(state="normal")
             self.log("📋 Lista de servidores actualizada.")
 
     def log(self, message):
@@ -239,28 +255,115 @@ class BotApp(tk.Tk):
 
     def confirm_and_run(self):
         selected_text = self.combo_guilds.get()
-        user_id_str = self.entry_user_id.get().strip()
+        user_ids_str = [p.strip() for p in self.entry_user_id.get().split(",") if p.strip()]
+        patterns = [p for p in self.text_patterns.get("1.0", tk.END).splitlines() if p.strip()]
         
-        if not user_id_str.isdigit():
+        if not all(p.isdigit() for p in user_ids_str):
             messagebox.showerror("Error", "El ID de usuario debe ser numérico.")
             return
+        if not user_ids_str and not patterns:
+            messagebox.showerror("Error", "Indica al menos un ID de usuario o un patrón de contenido.")
+            return
             
         guild_id = self.guild_map[selected_text]
-        user_id = int(user_id_str)
+        user_ids = [int(p) for p in user_ids_str]
         
+        target = []
+        if user_ids:
+            target.append("ID: " + ", ".join(str(u) for u in user_ids))
+        if patterns:
+            target.append(f"Con contenido que coincida con {len(patterns)} patrón(es)")
+        if guild_id is None:
+            target.append(f"En TODOS los servidores ({len(self.guild_map) - 1}) a la vez")
         confirm = messagebox.askyesno(
             "Confirmación de Seguridad", 
-            f"⚠️ ESTA ACCIÓN ES IRREVERSIBLE\n\n¿Estás seguro de eliminar los mensajes del usuario:\nID: {user_id}\n\nEn los últimos 7 días?"
+            f"⚠️ ESTA ACCIÓN ES IRREVERSIBLE\n\n¿Estás seguro de eliminar los mensajes:\n" + "\n".join(target) + "\n\nEn los últimos 7 días?"
         )
         
         if confirm:
             self.btn_run.config(state="disabled")
             self.log("\n" + "-" * 30)
-            self.bot_thread.start_deletion(guild_id, user_id)
+            self.active_guild_id = guild_id
+            self.has_job = True
+            archive_dir = ARCHIVE_DIR if self.archive_var.get() else None
+            self.bot_thread.start_deletion(guild_id, user_ids, self._get_rate(), archive_dir, patterns)
             self.after(5000, lambda: self.btn_run.config(state="normal"))
 
+    def analyze_spam(self):
+        """Busca cuentas que publicaron mensajes casi idénticos (no borra nada)"""
+        guild_id = self.guild_map[self.combo_guilds.get()]
+        if guild_id is None:
+            messagebox.showinfo("Detectar spam", "Elige un servidor concreto para analizar.")
+            return
+        self.btn_spam.config(state="disabled")
+        self.log("\n" + "-" * 30)
+        self.bot_thread.analyze_spam(guild_id)
+
+    def _fill_suspects(self, ids):
+        """Pone los IDs sospechosos en el campo de usuarios, listos para revisar y eliminar"""
+        self.btn_spam.config(state="normal")
+        if not ids:
+            return
+        self.entry_user_id.delete(0, tk.END)
+        self.entry_user_id.insert(0, ", ".join(str(i) for i in ids))
+        self.log(f"📝 {len(ids)} cuenta(s) sospechosa(s) añadidas al campo de usuarios. Revísalas antes de eliminar.")
+
+    def _get_rate(self):
+        try:
+            return max(0.0, float(self.rate_var.get())) or None
+        except ValueError:
+            return None
+
+    def pause_job(self):
+        if self.bot_thread and self.has_job:
+            self.bot_thread.pause_job(self.active_guild_id)
+
+    def resume_job(self):
+        if self.bot_thread and self.has_job:
+            self.bot_thread.resume_job(self.active_guild_id)
+
+    def cancel_job(self):
+        if self.bot_thread and self.has_job:
+            if messagebox.askyesno("Cancelar", "¿Detener la eliminación en curso?"):
+                self.bot_thread.cancel_job(self.active_guild_id)
+
+    def edit_retention(self):
+        """Editor de las políticas de retención; el bot las relee en cada revisión"""
+        store = RetentionStore()
+        dialog = tk.Toplevel(self)
+        dialog.title("Políticas de retención")
+        dialog.transient(self)
+        ttk.Label(dialog, text="Una regla por línea: <ID del canal> <duración>   (90m, 24h, 30d, 2w)\n"
+                               "El bot borra lo que supere la duración, poco a poco y sin tocar los fijados.",
+                  padding=10).pack(anchor="w")
+        text = tk.Text(dialog, width=50, height=10, font=("Consolas", 9))
+        text.pack(fill=tk.BOTH, expand=True, padx=10)
+        text.insert("1.0", "".join(f"{r.channel_id} {r.keep}\n" for r in store.load()))
+
+        def save():
+            try:
+                rules = store.replace_all(text.get("1.0", tk.END).splitlines())
+            except ValueError as e:
+                messagebox.showerror("Error", str(e), parent=dialog)
+                return
+            self.log(f"🕒 {len(rules)} política(s) de retención guardadas.")
+            dialog.destroy()
+
+        ttk.Button(dialog, text="💾 Guardar", command=save).pack(pady=10)
+
+    def profile_loop(self):
+        """Muestrea 10 s el event loop del bot para ver qué lo ocupa (el resultado sale en el registro)"""
+        if self.bot_thread and self.bot_thread.ready_event.is_set():
+            self.bot_thread.profile_loop(10.0)
+
+    def apply_rate(self):
+        if self.bot_thread and self.has_job:
+            self.bot_thread.set_job_rate(self.active_guild_id, self._get_rate())
+
 
 if __name__ == "__main__":
+    # Necesario para el modo "process" dentro del .exe de PyInstaller
+    multiprocessing.freeze_support()
     app = BotApp()
     try:
         app.mainloop()
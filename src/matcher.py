@@ -0,0 +1,176 @@
+"""
+Filtro de mensajes por autor y contenido
+========================================
+Compila palabras clave, expresiones regulares y dominios en un único matcher,
+de modo que cada mensaje escaneado se comprueba una sola vez:
+  1. Las palabras y dominios se agrupan en una regex con forma de trie.
+  2. Antes de ejecutarla se comprueba, con un conjunto, si alguna palabra del
+     mensaje es la primera palabra de algún patrón. Casi todos los mensajes
+     legítimos se descartan ahí sin llegar a la regex.
+  3. Las regex de usuario (no indexables) van en una regex combinada aparte.
+
+Formato de patrones (uno por línea):
+    texto libre        -> palabra/frase completa, sin distinguir mayúsculas
+    re:<regex>         -> expresión regular
+    dominio:<dominio>  -> enlaces a ese dominio o sus subdominios
+"""
+
+import re
+from datetime import timezone
+
+REGEX_PREFIX = "re:"
+DOMAIN_PREFIX = "dominio:"
+
+_WORD = re.compile(r"\w+")
+# Flags globales al inicio de una regex de usuario: "(?i)", "(?sx)"...
+_GLOBAL_FLAGS = re.compile(r"\(\?[aiLmsux]+\)")
+
+
+def _char_pattern(ch):
+    # Un espacio de la frase acepta cualquier separación: "free  nitro", "free\nnitro"...
+    return r"\s+" if ch == " " else re.escape(ch)
+
+
+def _trie_pattern(words):
+    """Convierte una lista de literales en una regex con forma de trie"""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    return _node_pattern(trie)
+
+
+def _node_pattern(node):
+    is_end = "" in node
+    branches = []
+    singles = []
+    for ch in sorted(k for k in node if k):
+        sub = _node_pattern(node[ch])
+        if sub is None and ch != " ":
+            singles.append(re.escape(ch))
+        else:
+            branches.append(_char_pattern(ch) + (sub or ""))
+
+    if not branches and not singles:
+        return None
+    if singles:
+        branches.append(singles[0] if len(singles) == 1 else "[" + "".join(singles) + "]")
+    pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if is_end:
+        pattern = "(?:" + pattern + ")?"
+    return pattern
+
+
+class ContentMatcher:
+    """Matcher compilado de palabras clave, regex y dominios"""
+
+    def __init__(self, keywords=(), regexes=(), domains=()):
+        # Espacios normalizados: en la regex cada uno equivale a \s+
+        self.keywords = sorted({" ".join(k.lower().split()) for k in keywords if k and not k.isspace()})
+        self.regexes = list(regexes)
+        self.domains = sorted({d.lower().strip(".") for d in domains if _WORD.search(d)})
+
+        # Primera palabra de cada patrón literal: índice del prefiltro
+        self._first_words = set()
+        indexed, unindexed = [], []
+        for keyword in self.keywords:
+            words = _WORD.findall(keyword)
+            if words:
+                self._first_words.add(words[0])
+                indexed.append(keyword)
+            else:
+                unindexed.append(keyword)  # p. ej. solo emojis o símbolos
+        for domain in self.domains:
+            self._first_words.add(_WORD.findall(domain)[0])
+
+        literal_parts = []
+        if indexed:
+            literal_parts.append(r"(?<!\w)" + _trie_pattern(indexed) + r"(?!\w)")
+        if self.domains:
+            # Dominio o subdominio, con o sin esquema, y sin continuar en otro dominio
+            literal_parts.append(r"(?<![\w-])(?:https?://)?(?:[\w-]+\.)*"
+                                 + _trie_pattern(self.domains) + r"(?!\.?[\w-])")
+
+        always_parts = []
+        self._separate = []  # Regex que no pueden ir en la alternancia combinada
+        if unindexed:
+            always_parts.append(_trie_pattern(unindexed))
+        for regex in self.regexes:
+            # Compilar cada una por separado también da un error claro
+            compiled = re.compile(regex, re.IGNORECASE)
+            if compiled.groups or _GLOBAL_FLAGS.match(regex):
+                # En la alternancia los grupos se renumeran (rompe \1) y un "(?i)" deja
+                # de estar al inicio (error al compilar): estas se prueban una a una
+                self._separate.append(compiled)
+            else:
+                always_parts.append(f"(?:{regex})")
+
+        if not literal_parts and not always_parts and not self._separate:
+            raise ValueError("El matcher necesita al menos un patrón")
+        self._literal = re.compile("|".join(literal_parts), re.IGNORECASE) if literal_parts else None
+        self._always = re.compile("|".join(always_parts), re.IGNORECASE) if always_parts else None
+
+    @classmethod
+    def from_lines(cls, lines):
+        """Construye el matcher a partir de líneas con el formato del módulo"""
+        keywords, regexes, domains = [], [], []
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith(REGEX_PREFIX):
+                regexes.append(line[len(REGEX_PREFIX):])
+            elif line.startswith(DOMAIN_PREFIX):
+                domains.append(line[len(DOMAIN_PREFIX):].strip())
+            else:
+                keywords.append(line)
+        return cls(keywords, regexes, domains)
+
+    def search(self, text: str) -> bool:
+        if not text:
+            return False
+        if self._always is not None and self._always.search(text):
+            return True
+        if any(regex.search(text) for regex in self._separate):
+            return True
+        if self._literal is not None and not self._first_words.isdisjoint(_WORD.findall(text.lower())):
+            return self._literal.search(text) is not None
+        return False
+
+    def __len__(self):
+        return len(self.keywords) + len(self.regexes) + len(self.domains)
+
+
+class MessageFilter:
+    """
+    Decide si un mensaje se elimina. Todos los criterios indicados deben cumplirse:
+    fecha posterior a `after`, autor dentro de `author_ids` (si se da) y contenido
+    que coincida con `matcher` (si se da).
+    """
+
+    def __init__(self, after, author_ids=None, matcher: ContentMatcher = None):
+        self.after = after
+        self.author_ids = frozenset(author_ids) if author_ids else None
+        self.matcher = matcher
+        if self.author_ids is None and self.matcher is None:
+            raise ValueError("Indica al menos un usuario o un patrón de contenido")
+
+    def __call__(self, msg) -> bool:
+        if msg.created_at.replace(tzinfo=timezone.utc) <= self.after:
+            return False
+        if self.author_ids is not None and msg.author.id not in self.author_ids:
+            return False
+        if self.matcher is not None and not self.matcher.search(msg.content):
+            return False
+        return True
+
+    def describe(self) -> str:
+        parts = []
+        if self.author_ids is not None:
+            ids = ", ".join(str(i) for i in sorted(self.author_ids))
+            parts.append(f"Usuario(s) ID: {ids}")
+        if self.matcher is not None:
+            parts.append(f"Contenido: {len(self.matcher)} patrón(es)")
+        return " + ".join(parts)
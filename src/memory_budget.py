@@ -0,0 +1,140 @@
+"""
+Modo de poca memoria
+====================
+Para hosts pequeños (un VPS de 512 MB) con servidores enormes. Con
+DELETE_MEMORY_BUDGET_MB=<MB> el bot:
+  - no guarda mensajes en la cache de discord.py (max_messages=None) ni
+    miembros (solo el propio bot), y no descarga la lista de miembros al
+    conectar; las búsquedas por nombre preguntan al gateway (query_members),
+  - vigila un presupuesto de memoria: antes de pedir cada página de
+    historial mide la memoria residente (RSS) del proceso. La primera vez que
+    lo supera (y otra vez solo tras bajar de RESET_FRACTION del presupuesto)
+    recoge basura y devuelve al sistema lo ya liberado, y avisa una vez.
+    No detiene el escaneo: en una purga, escanear y borrar van en la misma
+    corrutina, así que un escáner parado no deja ningún borrado que libere
+    memoria; lo que la acota son las caches mínimas de arriba.
+
+Lo que no depende del modo (siempre activo): los lotes pendientes guardan
+PartialMessage (solo IDs), los IDs de la cache de historial se leen por
+páginas y el análisis de spam guarda sus filas en arrays de enteros.
+"""
+
+import ctypes
+import gc
+import os
+import sys
+
+import discord
+
+# Variable de entorno con el presupuesto en MB (vacía o 0 = modo normal)
+BUDGET_ENV = "DELETE_MEMORY_BUDGET_MB"
+# Un episodio por encima del presupuesto termina al bajar de esta fracción (evita
+# recolectar en cada página cuando la memoria ronda el límite)
+RESET_FRACTION = 0.9
+
+try:
+    _libc = ctypes.CDLL("libc.so.6")
+    _malloc_trim = _libc.malloc_trim
+except (OSError, AttributeError):
+    _malloc_trim = None  # No es glibc (Windows, macOS, musl)
+
+
+def current_rss():
+    """Memoria residente del proceso en bytes (None si el sistema no permite medirla)"""
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/self/statm", "rb") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            return None
+    if sys.platform == "win32":
+        return _windows_rss()
+    return None
+
+
+def _windows_rss():
+    class Counters(ctypes.Structure):
+        _fields_ = [("cb", ctypes.c_ulong), ("PageFaultCount", ctypes.c_ulong),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    counters = Counters()
+    counters.cb = ctypes.sizeof(counters)
+    try:
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+    except (AttributeError, OSError):
+        pass
+    return None
+
+
+def budget_from_env():
+    """MemoryBudget según DELETE_MEMORY_BUDGET_MB, o None en modo normal"""
+    try:
+        megabytes = float(os.getenv(BUDGET_ENV, "0") or 0)
+    except ValueError:
+        return None
+    return MemoryBudget(megabytes) if megabytes > 0 else None
+
+
+def client_options(budget=None) -> dict:
+    """Argumentos extra de discord.Client: caches mínimas si hay presupuesto de memoria"""
+    if budget is None:
+        return {}
+    return {
+        "max_messages": None,
+        "member_cache_flags": discord.MemberCacheFlags.none(),
+        "chunk_guilds_at_startup": False,
+    }
+
+
+class MemoryBudget:
+    """Techo de memoria residente, medido antes de cada página de historial"""
+
+    def __init__(self, megabytes: float, report=None):
+        self.limit = int(megabytes * 1024 * 1024)
+        self.report = report  # Avisos (logger o GUI); se puede fijar después
+        self.peak = 0
+        self.episodes = 0  # Veces que se superó el presupuesto
+        self._over = False  # Dentro de un episodio (aún no bajó de RESET_FRACTION)
+        self._warned = False
+
+    @property
+    def megabytes(self) -> float:
+        return self.limit / (1024 * 1024)
+
+    def over(self) -> bool:
+        return self._measure() > self.limit
+
+    def _measure(self) -> int:
+        rss = current_rss()
+        if rss is None:
+            return 0  # Sin medida no hay presupuesto que vigilar
+        self.peak = max(self.peak, rss)
+        return rss
+
+    def check(self):
+        """Antes de leer más historial: al superar el presupuesto, recolecta una vez y avisa"""
+        rss = self._measure()
+        if self._over:
+            self._over = rss > self.limit * RESET_FRACTION
+            return
+        if rss <= self.limit:
+            return
+        self._over = True
+        self.episodes += 1
+        # Una vez por episodio (no en cada página: bloquea el event loop un momento)
+        gc.collect()
+        if _malloc_trim is not None:
+            _malloc_trim(0)
+        if self.over() and not self._warned and self.report is not None:
+            self._warned = True
+            self.report(f"⚠️ La memoria supera el presupuesto ({self._measure() / (1024 * 1024):.0f} MB de "
+                        f"{self.megabytes:.0f} MB): se continúa con las caches al mínimo")
+
+    def summary(self) -> str:
+        return (f"memoria máx. {self.peak / (1024 * 1024):.0f} MB de {self.megabytes:.0f} MB; "
+                f"{self.episodes} veces por encima del presupuesto")
@@ -0,0 +1,86 @@
+"""
+Barrido de varios servidores a la vez
+=====================================
+Para "borrar los mensajes de esta cuenta en todos los servidores que
+moderamos". Cada servidor es un DeletionJob de un JobGroup (jobs.py) y los
+servidores corren en paralelo (hasta GUILD_CONCURRENCY), así que el tiempo
+total se acerca al del servidor más lento y no a la suma de todos.
+
+Los rate limits de historial y borrado de Discord son por canal: servidores
+distintos no compiten entre sí, solo por el límite global del bot, que
+respeta el RateLimiter compartido del grupo.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+
+# Servidores en vuelo a la vez (cada uno con su propio pipeline de canales)
+GUILD_CONCURRENCY = 8
+
+_STATE_ICONS = {"finished": "✅", "cancelled": "⏹️", "error": "❌", "pending": "⏳"}
+
+
+@dataclass
+class GuildReport:
+    """Resultado de un servidor dentro de un barrido múltiple"""
+    guild_id: int
+    name: str
+    channels: int = 0
+    deleted: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+    state: str = "pending"  # finished / cancelled / error
+    error: str = ""
+
+
+async def run_guilds(plan, run_one, concurrency: int = GUILD_CONCURRENCY):
+    """
+    Ejecuta `run_one(guild, job, report)` para cada (guild, job) de `plan` a la vez.
+    `run_one` rellena su GuildReport. Devuelve (informes en el orden del plan, segundos totales).
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    reports = [GuildReport(guild.id, guild.name) for guild, _ in plan]
+
+    async def run(guild, job, report):
+        async with semaphore:
+            if job.done:
+                report.state = job.state  # Cancelado antes de empezar
+                return
+            job.state = "running"
+            start = time.perf_counter()
+            job.future = asyncio.ensure_future(run_one(guild, job, report))
+            try:
+                await job.future
+            except asyncio.CancelledError:
+                if job.state != "cancelled":
+                    raise
+            except Exception as e:
+                # Un servidor que falla no detiene a los demás
+                report.state, report.error = "error", str(e)
+            finally:
+                report.elapsed = time.perf_counter() - start
+                if job.state != "cancelled":
+                    job.state = "finished"
+                if report.state != "error":
+                    report.state = job.state
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run(guild, job, report) for (guild, job), report in zip(plan, reports)))
+    return reports, time.perf_counter() - start
+
+
+def report_lines(reports, elapsed: float):
+    """Informe combinado: una línea por servidor (más eliminados primero) y el total"""
+    lines = ["🌐 RESUMEN POR SERVIDOR"]
+    for r in sorted(reports, key=lambda r: r.deleted, reverse=True):
+        line = (f"   {_STATE_ICONS.get(r.state, '•')} {r.name}: {r.deleted} eliminados, "
+                f"{r.channels} canales, {r.errors} errores ({r.elapsed:.1f}s)")
+        if r.error:
+            line += f" — {r.error}"
+        lines.append(line)
+    slowest = max((r.elapsed for r in reports), default=0.0)
+    serial = sum(r.elapsed for r in reports)
+    lines.append(f"   Σ {sum(r.deleted for r in reports)} eliminados en {len(reports)} servidores · "
+                 f"{elapsed:.1f}s (servidor más lento {slowest:.1f}s; uno tras otro serían {serial:.1f}s)")
+    return lines
@@ -0,0 +1,102 @@
+"""
+Comprobación de permisos antes de empezar
+=========================================
+Antes de la primera petición de un trabajo, PermissionPlanner calcula los
+permisos efectivos del bot en todos los canales e hilos del servidor y
+aparta aquellos en los que no puede trabajar. Así no se gasta ni una
+petición (ni cupo de rate limit) en un canal que acabaría en Forbidden, y el
+aviso sale una sola vez, agrupado por motivo, en lugar de canal por canal.
+
+La resolución (roles del bot + overwrites del canal, con la lógica de
+discord.py: dueño, administrador, timeout, permisos implícitos) se hace una
+vez por combinación distinta de overwrites: los canales sincronizados con su
+categoría la comparten y los hilos usan la de su canal padre. En los hilos
+privados además hace falta ser miembro o tener "gestionar hilos".
+"""
+
+import discord
+
+# Lo que necesita cada tipo de trabajo (sin ver el canal, discord.py ya lo deniega todo)
+DELETE_PERMISSIONS = discord.Permissions(view_channel=True, read_message_history=True, manage_messages=True)
+READ_PERMISSIONS = discord.Permissions(view_channel=True, read_message_history=True)
+# Canales que se nombran por motivo en el aviso (el resto, "+N")
+WARN_NAMES = 5
+
+_PERMISSION_NAMES = {
+    "view_channel": "ver el canal",
+    "read_message_history": "leer el historial",
+    "manage_messages": "gestionar mensajes",
+}
+
+
+class PermissionPlanner:
+    """Permisos del bot por canal e hilo de un servidor, resueltos una vez por combinación de overwrites"""
+
+    def __init__(self, guild: discord.Guild, required: discord.Permissions = DELETE_PERMISSIONS):
+        self.guild = guild
+        self.me = guild.me
+        self.required = required
+        self.resolved = 0  # Resoluciones completas (el resto salió de la cache)
+        self._required = [name for name, needed in required if needed]
+        self._by_overwrites = {}  # (tipo de canal, overwrites) -> Permissions
+        self._by_channel = {}  # channel.id -> Permissions
+        self._reasons = {}  # channel.id -> motivo (o None) de los canales ya vistos
+
+    def permissions(self, channel) -> discord.Permissions:
+        """Permisos efectivos del bot en un canal (en un hilo, los de su canal padre)"""
+        if isinstance(channel, discord.Thread):
+            parent = channel.parent
+            return self.permissions(parent) if parent is not None else discord.Permissions.none()
+        perms = self._by_channel.get(channel.id)
+        if perms is None:
+            # El resultado solo depende del tipo de canal y de sus overwrites (el bot es el mismo)
+            key = (type(channel), tuple((o.id, o.type, o.allow, o.deny) for o in channel._overwrites))
+            perms = self._by_overwrites.get(key)
+            if perms is None:
+                perms = self._by_overwrites[key] = channel.permissions_for(self.me)
+                self.resolved += 1
+            self._by_channel[channel.id] = perms
+        return perms
+
+    def blocker(self, target):
+        """Por qué el bot no puede trabajar en `target`, o None si puede"""
+        if isinstance(target, discord.Thread):
+            parent = target.parent
+            reason = self.blocker(parent) if parent is not None else "canal padre desconocido"
+            if reason is None and target.is_private() and not self.permissions(parent).manage_threads:
+                if target.me is None and not any(m.id == self.me.id for m in target.members):
+                    return "hilo privado sin el bot como miembro"
+            return reason
+        try:
+            return self._reasons[target.id]
+        except KeyError:
+            perms = self.permissions(target)
+            missing = [name for name in self._required if not getattr(perms, name)]
+            reason = ("sin permiso de " + " ni ".join(_PERMISSION_NAMES.get(m, m) for m in missing)
+                      if missing else None)
+            self._reasons[target.id] = reason
+            return reason
+
+    def split(self, targets):
+        """(alcanzables, {motivo: [omitidos]}) sin hacer ninguna petición"""
+        reachable = []
+        skipped = {}
+        for target in targets:
+            reason = self.blocker(target)
+            if reason is None:
+                reachable.append(target)
+            else:
+                skipped.setdefault(reason, []).append(target)
+        return reachable, skipped
+
+
+def describe_skipped(skipped, label=None) -> str:
+    """Un único aviso con los canales omitidos, agrupados por motivo"""
+    label = label or (lambda t: f"#{t.name}")
+    total = sum(len(targets) for targets in skipped.values())
+    parts = []
+    for reason, targets in sorted(skipped.items(), key=lambda item: -len(item[1])):
+        names = ", ".join(label(t) for t in targets[:WARN_NAMES])
+        more = f" +{len(targets) - WARN_NAMES}" if len(targets) > WARN_NAMES else ""
+        parts.append(f"{len(targets)} {reason} ({names}{more})")
+    return f"{total} canales/hilos omitidos antes de empezar: " + "; ".join(parts)
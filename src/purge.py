@@ -0,0 +1,295 @@
+"""
+Purga de un canal
+=================
+Equivalente a `channel.purge(bulk=True)` de discord.py, pero con puntos de
+control del trabajo (pausa, cancelación y límite de ritmo) entre páginas
+y entre lotes de borrado.
+
+Con una HistoryCache (history_cache.py) y un filtro solo por autores, la purga
+no recorre el historial: sincroniza el delta y borra por ID desde la cache.
+
+Los borrados pasan por un DeleteBatcher compartido por todo el barrido, que
+decide bulk o individual y cuenta las peticiones (RequestStats). El bulk delete
+es por canal, así que el mínimo de peticiones de borrado ya es un lote de 100
+por canal; lo que sí se ahorra es:
+  - la página de historial de los canales sin mensajes en la ventana
+    (su last_message_id es anterior), que se saltan sin petición, y
+  - los intentos de bulk con mensajes de más de 14 días (Discord los rechaza):
+    esos van directamente por borrado individual.
+
+Con un `report` (run_report.ChannelReport), la purga de un canal anota sus
+cifras: mensajes, páginas y segundos en historial, en borrado y retenidos por
+el límite de ritmo del trabajo. Los 429 de Discord los espera discord.py por
+dentro; se cuentan con un handler en el logger "discord.http" (avisa de cada
+uno con su retry_after) y se anotan en el informe del canal en curso, que va
+en una contextvar de la tarea. Las esperas preventivas de discord.py por
+bucket agotado no se registran y quedan en historial o borrado.
+"""
+
+import contextvars
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+import discord
+from discord.utils import snowflake_time
+
+# Máximo de IDs que acepta el endpoint de bulk delete
+BULK_LIMIT = 100
+# El historial se pide en páginas de 100 mensajes
+PAGE_SIZE = 100
+# Antigüedad máxima para bulk delete (14 días, con margen por el reloj local)
+BULK_MAX_AGE = timedelta(days=14) - timedelta(minutes=10)
+logger = logging.getLogger(__name__)
+
+# Segundos que un lote parcial puede esperar a llenarse mientras sigue el escaneo del canal
+FLUSH_DEADLINE = 30.0
+
+# Informe del canal que se está purgando en esta tarea (para los 429 de discord.http)
+_current_report = contextvars.ContextVar("current_report", default=None)
+# Aviso de discord.py por cada 429: "... responded with 429. Retrying in %.2f seconds."
+_RATELIMIT_LOG = "responded with 429. Retrying in"
+
+
+class _RateLimitHandler(logging.Handler):
+    """Anota en el informe del canal en curso los 429 que discord.py espera y reintenta"""
+
+    def emit(self, record):
+        report = _current_report.get()
+        if report is None or not isinstance(record.msg, str) or _RATELIMIT_LOG not in record.msg:
+            return
+        report.ratelimits += 1
+        report.ratelimit_s += float(record.args[-1])
+
+
+logging.getLogger("discord.http").addHandler(_RateLimitHandler())
+
+
+@dataclass
+class RequestStats:
+    """Peticiones a la API de un barrido; la métrica clave es peticiones por mensaje eliminado"""
+    history: int = 0
+    bulk: int = 0
+    single: int = 0
+    deleted: int = 0
+    skipped_channels: int = 0  # Sin mensajes en la ventana: ni una petición
+
+    @property
+    def requests(self) -> int:
+        return self.history + self.bulk + self.single
+
+    @property
+    def per_deleted(self) -> float:
+        return self.requests / self.deleted if self.deleted else float(self.requests)
+
+    def summary(self) -> str:
+        return (f"{self.per_deleted:.3f} peticiones por mensaje eliminado "
+                f"({self.history} historial, {self.bulk} bulk, {self.single} individuales; "
+                f"{self.skipped_channels} canales sin actividad saltados)")
+
+
+def is_quiet(channel, after: datetime) -> bool:
+    """El último mensaje conocido del canal es anterior a la ventana: no hay nada que escanear"""
+    last_id = getattr(channel, "last_message_id", None)
+    return last_id is not None and snowflake_time(last_id) <= after
+
+
+class DeleteBatcher:
+    """
+    Lotes de borrado pendientes por canal. Un lote se envía al llenarse (100),
+    al terminar el canal o si lleva más de `deadline` segundos esperando.
+    `on_deleted(lote)` se llama tras cada borrado (p. ej. para olvidar IDs de la cache).
+    Sin archivador, lo pendiente se guarda como PartialMessage (canal e ID): el
+    mensaje completo, con su contenido y autor, se libera al seguir el escaneo.
+    """
+
+    def __init__(self, job=None, reason: str = None, archiver=None, stats: RequestStats = None,
+                 deadline: float = FLUSH_DEADLINE, on_deleted=None):
+        self.job = job
+        self.reason = reason
+        self.archiver = archiver
+        self.stats = stats if stats is not None else RequestStats()
+        self.deadline = deadline
+        self.on_deleted = on_deleted
+        self._pending = {}  # channel.id -> (canal, [mensajes], momento del primero)
+        self.reports = {}  # channel.id -> ChannelReport del canal que se está purgando
+
+    async def add(self, channel, msg) -> int:
+        """Encola un mensaje para borrar. Devuelve cuántos se borraron ahora (0 si solo se encoló)"""
+        entry = self._pending.get(channel.id)
+        if entry is None:
+            entry = self._pending[channel.id] = (channel, [], time.monotonic())
+        # discord.Message hereda de PartialMessage: se comprueba el mensaje completo
+        if self.archiver is None and isinstance(msg, discord.Message):
+            msg = channel.get_partial_message(msg.id)
+        entry[1].append(msg)
+        if len(entry[1]) >= BULK_LIMIT or time.monotonic() - entry[2] > self.deadline:
+            return await self.flush(channel)
+        return 0
+
+    async def flush(self, channel=None) -> int:
+        """Envía lo pendiente de un canal (o de todos). Devuelve cuántos se borraron"""
+        channels = [channel.id] if channel is not None else list(self._pending)
+        deleted = 0
+        for channel_id in channels:
+            entry = self._pending.pop(channel_id, None)
+            if entry:
+                deleted += await self._send(entry[0], entry[1])
+        return deleted
+
+    async def _send(self, channel, messages) -> int:
+        # Bulk solo para mensajes de menos de 14 días; el resto, uno a uno
+        limit = datetime.now(timezone.utc) - BULK_MAX_AGE
+        recent = [m for m in messages if m.created_at > limit]
+        old = [m for m in messages if m.created_at <= limit]
+        deleted = 0
+        for start in range(0, len(recent), BULK_LIMIT):
+            deleted += await self._request(channel, recent[start:start + BULK_LIMIT])
+        for msg in old:
+            deleted += await self._request(channel, [msg])
+        return deleted
+
+    async def _request(self, channel, batch) -> int:
+        report = self.reports.get(channel.id)
+        if self.job is not None:
+            await _timed_wait(self.job.throttle(), report)
+        start = time.perf_counter()
+        try:
+            if len(batch) == 1:
+                # El bulk delete exige al menos 2 mensajes: mismo coste, una petición
+                self.stats.single += 1
+                await batch[0].delete()
+            else:
+                self.stats.bulk += 1
+                await channel.delete_messages(batch, reason=self.reason)
+        except discord.NotFound:
+            # Ya no existe (p. ej. entrada obsoleta de la cache); el bulk ignora esos IDs
+            if self.on_deleted is not None:
+                self.on_deleted(batch)
+            return 0
+        finally:
+            if report is not None:
+                report.delete_s += time.perf_counter() - start
+        if logger.isEnabledFor(logging.DEBUG):
+            # Evento de mucho volumen: en DEBUG y muestreado por log_pipeline
+            logger.debug("Lote borrado", extra={
+                "event": "delete_request", "job": self.job.guild_id if self.job is not None else None,
+                "channel_id": channel.id, "count": len(batch),
+                "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            })
+        if self.archiver is not None:
+            self.archiver.add_many(batch)
+        if self.on_deleted is not None:
+            self.on_deleted(batch)
+        self.stats.deleted += len(batch)
+        return len(batch)
+
+
+async def _timed_wait(waiting, report):
+    """Espera `waiting` (throttle o next_page del trabajo) y la suma a report.throttle_s"""
+    start = time.perf_counter()
+    await waiting
+    if report is not None:
+        report.throttle_s += time.perf_counter() - start
+
+
+async def _timed_history(messages, report):
+    """Los mensajes de `messages` sumando a report.fetch_s lo que se espera por cada página"""
+    iterator = messages.__aiter__()
+    while True:
+        start = time.perf_counter()
+        try:
+            msg = await iterator.__anext__()
+        except StopAsyncIteration:
+            return
+        finally:
+            report.fetch_s += time.perf_counter() - start
+        yield msg
+
+
+async def purge_channel(channel, check, after: datetime, job=None, reason: str = None,
+                        archiver=None, batcher: DeleteBatcher = None, report=None) -> int:
+    """
+    Borra los mensajes de `channel` posteriores a `after` que cumplan `check`. Devuelve cuántos.
+    Si se pasa un `archiver` (archive.MessageArchiver) se guarda copia de cada lote borrado.
+    Con un `batcher` compartido, sus estadísticas cubren todo el barrido.
+    """
+    if batcher is None:
+        batcher = DeleteBatcher(job, reason, archiver)
+    if is_quiet(channel, after):
+        batcher.stats.skipped_channels += 1
+        return 0
+
+    deleted = 0
+    scanned = 0
+    pages = 1
+    history = channel.history(limit=None, after=after)
+    token = _current_report.set(report)
+    if report is not None:
+        batcher.reports[channel.id] = report
+        history = _timed_history(history, report)
+    try:
+        batcher.stats.history += 1
+        if job is not None:
+            await _timed_wait(job.next_page(), report)
+        async for msg in history:
+            scanned += 1
+            if scanned % PAGE_SIZE == 0:
+                # La siguiente iteración pedirá otra página del historial
+                pages += 1
+                batcher.stats.history += 1
+                if job is not None:
+                    await _timed_wait(job.next_page(), report)
+
+            if check(msg):
+                deleted += await batcher.add(channel, msg)
+
+        deleted += await batcher.flush(channel)
+    finally:
+        _current_report.reset(token)
+        if report is not None:
+            batcher.reports.pop(channel.id, None)
+            report.scanned += scanned
+            report.pages += pages
+            report.deleted += deleted
+    return deleted
+
+
+async def purge_authors_cached(channel, cache, author_ids, after: datetime, job=None,
+                               reason: str = None, batcher: DeleteBatcher = None, report=None) -> int:
+    """
+    Como purge_channel con un filtro solo por autor, pero consultando la cache local:
+    solo se descarga el historial nuevo desde el último sync. Devuelve cuántos se borraron.
+    Un `batcher` compartido debe quitar de la cache lo borrado (on_deleted).
+    En el `report`, el tiempo del sync (con sus esperas de ritmo) cuenta como historial.
+    """
+    if batcher is None:
+        batcher = DeleteBatcher(job, reason, on_deleted=lambda batch: cache.forget([m.id for m in batch]))
+    if is_quiet(channel, after):
+        batcher.stats.skipped_channels += 1
+        return 0
+
+    token = _current_report.set(report)
+    deleted = 0
+    try:
+        start = time.perf_counter()
+        fetched = await cache.sync(channel, after, job=job)
+        # Una página por cada 100 mensajes nuevos, más la última (vacía o incompleta)
+        pages = fetched // PAGE_SIZE + 1
+        batcher.stats.history += pages
+        if report is not None:
+            report.fetch_s += time.perf_counter() - start
+            report.scanned += fetched
+            report.pages += pages
+            batcher.reports[channel.id] = report
+
+        for message_id in cache.authored(channel.id, author_ids, after):
+            deleted += await batcher.add(channel, channel.get_partial_message(message_id))
+        deleted += await batcher.flush(channel)
+    finally:
+        _current_report.reset(token)
+        if report is not None:
+            batcher.reports.pop(channel.id, None)
+            report.deleted += deleted
+    return deleted
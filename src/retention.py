@@ -0,0 +1,161 @@
+"""
+Políticas de retención por canal
+================================
+Reglas del tipo "#bot-spam solo guarda 24 h" o "#memes guarda 30 días".
+Se guardan en un JSON junto al token y las aplica RetentionScheduler
+(retention_scheduler.py) mientras el bot está conectado: el bot de la GUI
+siempre, el de consola con el modo 5.
+
+Cada regla recuerda hasta qué snowflake está limpio su canal (`last_id`), así
+que cada pasada solo recorre lo que ha caducado desde la anterior.
+
+Solo stdlib: la GUI edita las reglas sin cargar discord.py.
+Gestión desde la terminal:
+    python src/retention.py list
+    python src/retention.py add <canal_id> 24h
+    python src/retention.py remove <canal_id>
+"""
+
+import argparse
+import json
+import os
+import re
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+
+STORE_FILE = "politicas_retencion.json"
+# Una regla se aplica cada keep/24, entre 5 minutos y 1 hora
+MIN_PERIOD = 300
+MAX_PERIOD = 3600
+
+_UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+_DURATION = re.compile(r"^\s*(\d+)\s*([mhdw])\s*$", re.IGNORECASE)
+
+
+def parse_duration(text: str) -> timedelta:
+    """'90m', '24h', '30d', '2w' -> timedelta (ValueError si no se entiende)"""
+    match = _DURATION.match(text)
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Duración no válida: '{text}' (usa por ejemplo 90m, 24h, 30d o 2w)")
+    return timedelta(**{_UNITS[match.group(2).lower()]: int(match.group(1))})
+
+
+@dataclass
+class RetentionRule:
+    channel_id: int
+    keep: str  # Tal como lo escribió el usuario ("24h")
+    last_id: int = 0  # Todo lo anterior (y ya caducado) está limpio
+    last_run: float = 0.0
+
+    @property
+    def keep_delta(self) -> timedelta:
+        return parse_duration(self.keep)
+
+    @property
+    def period(self) -> float:
+        """Segundos entre pasadas"""
+        return min(MAX_PERIOD, max(MIN_PERIOD, self.keep_delta.total_seconds() / 24))
+
+
+class RetentionStore:
+    """Lee y escribe las reglas (escrituras atómicas, relee antes de cada cambio)"""
+
+    def __init__(self, path: str = STORE_FILE):
+        self.path = path
+
+    def load(self) -> list:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return []
+        return [RetentionRule(**item) for item in data.get("rules", [])]
+
+    def _write(self, rules):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"rules": [asdict(r) for r in rules]}, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def set_rule(self, channel_id: int, keep: str):
+        """Crea o cambia la regla de un canal (conserva su progreso)"""
+        parse_duration(keep)
+        rules = self.load()
+        for rule in rules:
+            if rule.channel_id == channel_id:
+                rule.keep = keep
+                break
+        else:
+            rules.append(RetentionRule(channel_id, keep))
+        self._write(rules)
+
+    def remove_rule(self, channel_id: int) -> bool:
+        rules = self.load()
+        kept = [r for r in rules if r.channel_id != channel_id]
+        self._write(kept)
+        return len(kept) != len(rules)
+
+    def replace_all(self, lines):
+        """
+        Sustituye las reglas por las de `lines` ("<canal_id> <duración>", '#' para comentarios),
+        conservando el progreso de los canales que siguen. ValueError si una línea no es válida.
+        """
+        previous = {r.channel_id: r for r in self.load()}
+        rules = []
+        for line in lines:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            parts = line.split()
+            if len(parts) != 2 or not parts[0].isdigit():
+                raise ValueError(f"Línea no válida: '{line}' (formato: <canal_id> <duración>)")
+            channel_id, keep = int(parts[0]), parts[1]
+            parse_duration(keep)
+            rule = previous.get(channel_id) or RetentionRule(channel_id, keep)
+            rule.keep = keep
+            rules.append(rule)
+        self._write(rules)
+        return rules
+
+    def save_progress(self, channel_id: int, last_id: int, last_run: float):
+        """Apunta hasta dónde llegó una pasada (sin pisar cambios hechos mientras tanto)"""
+        rules = self.load()
+        for rule in rules:
+            if rule.channel_id == channel_id:
+                rule.last_id = max(rule.last_id, last_id)
+                rule.last_run = last_run
+                self._write(rules)
+                return
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Políticas de retención por canal")
+    parser.add_argument("--file", default=STORE_FILE)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="Muestra las reglas")
+    add = sub.add_parser("add", help="Crea o cambia la regla de un canal")
+    add.add_argument("channel_id", type=int)
+    add.add_argument("keep", help="Cuánto se conserva: 90m, 24h, 30d, 2w")
+    remove = sub.add_parser("remove", help="Quita la regla de un canal")
+    remove.add_argument("channel_id", type=int)
+    args = parser.parse_args()
+
+    store = RetentionStore(args.file)
+    if args.command == "add":
+        try:
+            store.set_rule(args.channel_id, args.keep)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"✅ Canal {args.channel_id}: se conservan {args.keep}")
+    elif args.command == "remove":
+        print("🗑️ Regla eliminada" if store.remove_rule(args.channel_id) else "⚠️ Ese canal no tenía regla")
+    else:
+        rules = store.load()
+        if not rules:
+            print("(sin reglas)")
+        for rule in rules:
+            print(f"{rule.channel_id}  conserva {rule.keep}  (cada {rule.period / 60:.0f} min)")
+
+
+if __name__ == "__main__":
+    main()
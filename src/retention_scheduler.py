@@ -0,0 +1,154 @@
+"""
+Aplicación programada de las políticas de retención
+===================================================
+Revisa las reglas de retention.py cada POLICY_TICK segundos y aplica las que
+tocan. Cada pasada de un canal:
+  - recorre solo (last_id, ahora - retención], del más antiguo al más reciente,
+  - borra con el mismo DeleteBatcher que las purgas (bulk si es posible,
+    individual para lo de más de 14 días), respetando los mensajes fijados,
+  - va a ritmo fijo y bajo (POLICY_RATE) y como mucho RUN_BUDGET mensajes:
+    lo que sobre se sigue en la siguiente revisión, así el trabajo se reparte
+    en el tiempo y nunca sale en ráfaga,
+  - guarda el snowflake hasta el que el canal queda limpio.
+Los canales se tratan de uno en uno. Las purgas manuales tienen prioridad:
+las políticas no ocupan el registro de trabajos del servidor, y si hay (o
+empieza) una purga manual en él, la pasada no arranca (o se corta en la
+siguiente página) y el canal sigue en la siguiente revisión. Si una regla
+falla, se avisa y no se reintenta hasta su siguiente periodo.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import discord
+from discord.utils import time_snowflake
+
+from jobs import DeletionJob, JobRegistry
+from purge import PAGE_SIZE, DeleteBatcher, RequestStats
+from retention import RetentionStore
+
+# Segundos entre revisiones de las reglas
+POLICY_TICK = 60.0
+# Mensajes como máximo por canal y pasada (lo de más de 14 días va de uno en uno:
+# 200 a POLICY_RATE son menos de 2 minutos ocupando el servidor)
+RUN_BUDGET = 200
+# Peticiones por segundo de las políticas (las purgas manuales tienen prioridad)
+POLICY_RATE = 2.0
+
+
+class RetentionScheduler:
+    """Aplica las reglas de retención mientras el cliente está conectado"""
+
+    def __init__(self, client, report, store: RetentionStore = None, jobs: JobRegistry = None,
+                 history_cache=None):
+        self.client = client
+        self.report = report
+        self.store = store if store is not None else RetentionStore()
+        self.jobs = jobs if jobs is not None else JobRegistry()
+        self.history_cache = history_cache
+        self.stats = RequestStats()
+        self._invalid = set()  # (canal, keep) de reglas no válidas ya avisadas
+        self._task = None
+
+    def start(self):
+        """Arranca la revisión periódica (desde dentro del loop, p. ej. en on_ready)"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self.run_forever())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def run_forever(self):
+        while True:
+            try:
+                await self.run_due()
+            except Exception as e:
+                self.report(f"❌ Error aplicando políticas de retención: {e}")
+            await asyncio.sleep(POLICY_TICK)
+
+    async def run_due(self) -> int:
+        """Aplica las reglas pendientes, de la más atrasada a la menos. Devuelve cuántos mensajes borró"""
+        now = time.time()
+        due = []
+        for rule in self.store.load():
+            try:
+                next_run = rule.last_run + rule.period
+            except ValueError as e:
+                # Regla editada a mano con una duración no válida: se salta (avisando una vez)
+                if (rule.channel_id, rule.keep) not in self._invalid:
+                    self._invalid.add((rule.channel_id, rule.keep))
+                    self.report(f"⚠️ Retención: regla del canal {rule.channel_id} ignorada: {e}")
+                continue
+            if now >= next_run:
+                due.append((next_run, rule))
+        deleted = 0
+        for _, rule in sorted(due, key=lambda item: item[0]):
+            try:
+                deleted += await self.apply(rule)
+            except Exception as e:
+                # Una regla rota (Forbidden, HTTPException...) no frena a las demás ni se
+                # reintenta en cada revisión: se apunta como ejecutada sin avanzar last_id
+                self.report(f"❌ Retención: error en el canal {rule.channel_id} ({rule.keep}): {e}")
+                self.store.save_progress(rule.channel_id, rule.last_id, time.time())
+        return deleted
+
+    def _manual_job(self, guild_id: int) -> bool:
+        job = self.jobs.get(guild_id)
+        return job is not None and not job.done
+
+    async def apply(self, rule) -> int:
+        channel = self.client.get_channel(rule.channel_id)
+        if channel is None:
+            self.report(f"⚠️ Retención: el canal {rule.channel_id} no existe o el bot no lo ve")
+            self.store.save_progress(rule.channel_id, rule.last_id, time.time())
+            return 0
+        perms = channel.permissions_for(channel.guild.me)
+        if not perms.manage_messages or not perms.read_message_history:
+            self.report(f"⚠️ Retención: sin permisos en #{channel.name}")
+            self.store.save_progress(rule.channel_id, rule.last_id, time.time())
+            return 0
+
+        guild_id = channel.guild.id
+        if self._manual_job(guild_id):
+            return 0  # Purga manual en curso en ese servidor: en la siguiente revisión
+        # Sin registrarlo en self.jobs: una purga manual puede empezar mientras tanto
+        job = DeletionJob(guild_id, asyncio.get_running_loop(), POLICY_RATE)
+        forget = ((lambda batch: self.history_cache.forget([m.id for m in batch]))
+                  if self.history_cache else None)
+        batcher = DeleteBatcher(job, f"Política de retención ({rule.keep})", stats=self.stats, on_deleted=forget)
+        cutoff = time_snowflake(datetime.now(timezone.utc) - rule.keep_delta)
+        last = rule.last_id
+        scanned = deleted = 0
+        yielded = False
+        job.state = "running"
+        try:
+            self.stats.history += 1
+            await job.next_page()
+            async for msg in channel.history(limit=RUN_BUDGET, after=discord.Object(id=rule.last_id),
+                                             before=discord.Object(id=cutoff), oldest_first=True):
+                scanned += 1
+                if scanned % PAGE_SIZE == 0:
+                    if self._manual_job(guild_id):
+                        yielded = True  # Deja paso a la purga manual
+                        break
+                    self.stats.history += 1
+                    await job.next_page()
+                if not msg.pinned:
+                    deleted += await batcher.add(channel, msg)
+                last = msg.id
+            deleted += await batcher.flush(channel)
+        finally:
+            job.state = "finished"
+
+        if not yielded and scanned < RUN_BUDGET:
+            # Canal limpio hasta el corte: la próxima pasada, cuando toque
+            self.store.save_progress(rule.channel_id, cutoff, time.time())
+        else:
+            # Queda trabajo: se sigue en la próxima revisión (last_run sin cambiar)
+            self.store.save_progress(rule.channel_id, last, rule.last_run)
+        if deleted:
+            self.report(f"🕒 Retención #{channel.name} ({rule.keep}): {deleted} mensajes caducados eliminados")
+        return deleted
@@ -0,0 +1,168 @@
+"""
+Informe por canal de cada trabajo
+=================================
+Cada trabajo de eliminación escribe un informe con una fila por canal:
+mensajes escaneados y eliminados, páginas de historial, segundos
+descargando historial, borrando y retenidos por el límite de ritmo propio del
+trabajo, los 429 de Discord y lo que se esperó por ellos, y el error si lo
+hubo. Cada fila se escribe en cuanto termina su canal: si el
+trabajo se corta, lo hecho hasta ese momento ya está en el archivo.
+
+El formato sale de la extensión: .jsonl (un objeto JSON por línea) o .csv.
+Por defecto, REPORT_DIR/informe_<fecha>_<trabajo>.jsonl.
+
+Solo stdlib. Comparar dos ejecuciones para ver qué canales empeoraron:
+    python src/run_report.py informes/informe_antes.jsonl informes/informe_despues.jsonl
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+
+REPORT_DIR = "informes"
+# Un canal empeora si su tiempo por mensaje escaneado sube más de esta fracción...
+REGRESSION = 0.25
+# ...y además tarda al menos estos segundos más (los canales pequeños son solo ruido)
+MIN_SLOWDOWN = 1.0
+
+
+@dataclass
+class ChannelReport:
+    guild_id: int
+    channel_id: int
+    channel: str
+    scanned: int = 0
+    deleted: int = 0
+    pages: int = 0  # Peticiones de historial
+    fetch_s: float = 0.0  # Esperando páginas de historial
+    delete_s: float = 0.0  # Esperando peticiones de borrado
+    throttle_s: float = 0.0  # Retenido por el límite de ritmo propio del trabajo (y el global de JobGroup)
+    ratelimits: int = 0  # Respuestas 429 de Discord
+    ratelimit_s: float = 0.0  # Esperado por esos 429 (ya incluido en fetch_s / delete_s)
+    elapsed: float = 0.0
+    error: str = ""
+
+    @property
+    def per_message(self) -> float:
+        """Segundos por mensaje escaneado (lo comparable entre ejecuciones)"""
+        return self.elapsed / self.scanned if self.scanned else self.elapsed
+
+
+FIELDS = [f.name for f in fields(ChannelReport)]
+_TYPES = {f.name: f.type for f in fields(ChannelReport)}
+
+
+def default_report_path(label: str, directory: str = REPORT_DIR, fmt: str = "jsonl") -> str:
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"informe_{datetime.now():%Y%m%d_%H%M%S}_{label}.{fmt}")
+
+
+class RunReport:
+    """Informe de un trabajo: una fila por canal, escrita al terminar el canal"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rows = 0
+        self._csv = path.lower().endswith(".csv")
+        self._file = open(path, "a", encoding="utf-8", newline="")
+        if self._csv:
+            self._writer = csv.DictWriter(self._file, FIELDS)
+            if self._file.tell() == 0:
+                self._writer.writeheader()
+
+    def write(self, report: ChannelReport):
+        row = asdict(report)
+        for key in ("fetch_s", "delete_s", "throttle_s", "ratelimit_s", "elapsed"):
+            row[key] = round(row[key], 3)
+        if self._csv:
+            self._writer.writerow(row)
+        else:
+            self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        # Una línea por canal: visible enseguida para quien siga el archivo
+        self._file.flush()
+        self.rows += 1
+
+    def close(self):
+        self._file.close()
+
+
+def load(path: str) -> list:
+    """Filas de un informe (.jsonl o .csv)"""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    reports = []
+    for row in rows:
+        # En CSV todo llega como texto (y los vacíos como "")
+        values = {key: _TYPES[key](row[key]) if row[key] != "" else _TYPES[key]()
+                  for key in FIELDS if key in row}
+        reports.append(ChannelReport(**values))
+    return reports
+
+
+def totals(reports) -> dict:
+    total = {key: sum(getattr(r, key) for r in reports)
+             for key in ("scanned", "deleted", "pages", "fetch_s", "delete_s", "throttle_s", "ratelimits",
+                         "ratelimit_s", "elapsed")}
+    total["channels"] = len(reports)
+    total["errors"] = sum(1 for r in reports if r.error)
+    return total
+
+
+def compare(before, after, threshold: float = REGRESSION, min_slowdown: float = MIN_SLOWDOWN):
+    """(líneas del informe, canales que empeoraron) entre dos ejecuciones"""
+    old, new = totals(before), totals(after)
+    lines = [f"{'':<18}{'antes':>12}{'después':>12}{'cambio':>9}"]
+    for key, label in (("channels", "canales"), ("scanned", "escaneados"), ("deleted", "eliminados"),
+                       ("pages", "páginas"), ("fetch_s", "historial (s)"), ("delete_s", "borrado (s)"),
+                       ("throttle_s", "ritmo propio (s)"), ("ratelimits", "429 de Discord"),
+                       ("ratelimit_s", "espera 429 (s)"), ("elapsed", "suma canales (s)"), ("errors", "errores")):
+        a, b = old[key], new[key]
+        change = f"{(b - a) / a * 100:+.0f}%" if a else ""
+        lines.append(f"{label:<18}{a:>12.5g}{b:>12.5g}{change:>9}")
+
+    previous = {r.channel_id: r for r in before}
+    regressions = []
+    for r in after:
+        p = previous.get(r.channel_id)
+        if p is None:
+            continue
+        if r.error and not p.error:
+            regressions.append((r, f"error nuevo: {r.error}"))
+        elif (p.scanned and r.scanned and r.per_message > p.per_message * (1 + threshold)
+              and r.elapsed - p.elapsed >= min_slowdown):
+            regressions.append((r, f"{p.per_message * 1000:.1f} -> {r.per_message * 1000:.1f} ms por mensaje "
+                                   f"({p.elapsed:.1f}s -> {r.elapsed:.1f}s; historial {r.fetch_s:.1f}s, "
+                                   f"borrado {r.delete_s:.1f}s, ritmo propio {r.throttle_s:.1f}s, "
+                                   f"{r.ratelimits} 429 con {r.ratelimit_s:.1f}s de espera)"))
+    if regressions:
+        lines.append(f"\n🐢 {len(regressions)} canales empeoran:")
+        lines.extend(f"   {r.channel} ({r.channel_id}): {reason}" for r, reason in regressions)
+    else:
+        lines.append("\n✅ Ningún canal empeora")
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara los informes por canal de dos ejecuciones")
+    parser.add_argument("before", help="Informe de referencia (.jsonl o .csv)")
+    parser.add_argument("after", help="Informe a comparar")
+    parser.add_argument("--threshold", type=float, default=REGRESSION,
+                        help="Subida del tiempo por mensaje que cuenta como regresión (0.25 = 25%%)")
+    parser.add_argument("--min-slowdown", type=float, default=MIN_SLOWDOWN,
+                        help="Segundos mínimos de diferencia para marcar un canal")
+    args = parser.parse_args()
+    lines, regressions = compare(load(args.before), load(args.after), args.threshold, args.min_slowdown)
+    print("\n".join(lines))
+    # Código de salida 1 si algo empeoró: útil en scripts
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Reanudación de la sesión del gateway entre arranques
+====================================================
+Un arranque normal hace IDENTIFY y espera los GUILD_CREATE de todos los
+servidores (más la descarga de miembros), lo que tarda decenas de segundos con
+muchos servidores y gasta cupo de IDENTIFY. ResumableClient, al cerrar
+limpiamente:
+  1. guarda session_id, secuencia, URL de reanudación y una copia de los
+     servidores (canales, roles y el propio miembro del bot), y
+  2. cierra el websocket con un código distinto de 1000 para que Discord
+     mantenga la sesión viva.
+Si el siguiente arranque llega dentro de RESUME_WINDOW, se restauran los
+servidores desde disco y se envía RESUME: Discord solo reenvía los eventos
+perdidos. Si la sesión ya no es válida se vuelve al IDENTIFY normal.
+
+La copia de los servidores son los payloads crudos de GUILD_CREATE, mantenidos
+al día con los eventos de canales, roles y servidor que llegan después.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import time
+
+import aiohttp
+import discord
+import yarl
+from discord.errors import ConnectionClosed, GatewayNotFound, HTTPException
+from discord.gateway import DiscordWebSocket, ReconnectWebSocket
+
+SESSION_FILE = "sesion_gateway.json.gz"
+# Segundos tras el cierre en los que se intenta RESUME (Discord no publica el límite exacto)
+RESUME_WINDOW = 60
+# Código de cierre que conserva la sesión (1000/1001 la invalidan)
+RESUMABLE_CLOSE_CODE = 4000
+# Partes del GUILD_CREATE que no se guardan: grandes y sin uso tras reanudar
+_DROPPED_GUILD_KEYS = ("presences", "voice_states", "threads")
+
+
+def _replace_by_id(items, item):
+    return [i for i in items if i["id"] != item["id"]] + [item]
+
+
+class GuildSnapshot:
+    """Payloads crudos de los servidores, actualizados con los eventos del gateway"""
+
+    def __init__(self, own_id):
+        self._own_id = own_id  # Función: ID del bot (se conoce tras el login)
+        self.guilds = {}
+
+    def install(self, parsers):
+        """Envuelve los parsers de discord.py para seguir los eventos que cambian un servidor"""
+        for event in ("READY", "GUILD_CREATE", "GUILD_UPDATE", "GUILD_DELETE",
+                      "CHANNEL_CREATE", "CHANNEL_UPDATE", "CHANNEL_DELETE",
+                      "GUILD_ROLE_CREATE", "GUILD_ROLE_UPDATE", "GUILD_ROLE_DELETE",
+                      "GUILD_MEMBER_UPDATE"):
+            parsers[event] = self._wrap(parsers[event], getattr(self, "_on_" + event.lower()))
+
+    @staticmethod
+    def _wrap(parser, track):
+        def wrapper(data):
+            parser(data)
+            track(data)
+        return wrapper
+
+    def _on_ready(self, data):
+        self.guilds.clear()  # Sesión nueva: llegarán todos los GUILD_CREATE
+
+    def _on_guild_create(self, data):
+        if data.get("unavailable"):
+            return
+        guild = {k: v for k, v in data.items() if k not in _DROPPED_GUILD_KEYS}
+        # Solo el miembro del bot (permisos); el resto se descarga si hace falta
+        own_id = str(self._own_id())
+        guild["members"] = [m for m in data.get("members", ()) if m["user"]["id"] == own_id]
+        self.guilds[data["id"]] = guild
+
+    def _on_guild_update(self, data):
+        if data["id"] in self.guilds:
+            self.guilds[data["id"]].update(data)
+
+    def _on_guild_delete(self, data):
+        self.guilds.pop(data["id"], None)
+
+    def _on_channel_create(self, data):
+        guild = self.guilds.get(data.get("guild_id"))
+        if guild is not None:
+            guild["channels"] = _replace_by_id(guild.get("channels", []), data)
+
+    _on_channel_update = _on_channel_create
+
+    def _on_channel_delete(self, data):
+        guild = self.guilds.get(data.get("guild_id"))
+        if guild is not None:
+            guild["channels"] = [c for c in guild.get("channels", []) if c["id"] != data["id"]]
+
+    def _on_guild_role_create(self, data):
+        guild = self.guilds.get(data["guild_id"])
+        if guild is not None:
+            guild["roles"] = _replace_by_id(guild.get("roles", []), data["role"])
+
+    _on_guild_role_update = _on_guild_role_create
+
+    def _on_guild_role_delete(self, data):
+        guild = self.guilds.get(data["guild_id"])
+        if guild is not None:
+            guild["roles"] = [r for r in guild.get("roles", []) if r["id"] != data["role_id"]]
+
+    def _on_guild_member_update(self, data):
+        guild = self.guilds.get(data["guild_id"])
+        if guild is not None and data["user"]["id"] == str(self._own_id()):
+            member = {k: v for k, v in data.items() if k != "guild_id"}
+            guild["members"] = [member]
+
+
+class ResumableClient(discord.Client):
+    """discord.Client que reanuda la sesión del arranque anterior si es posible"""
+
+    def __init__(self, *args, session_path: str = SESSION_FILE, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.session_path = session_path
+        self.resumed_session = False  # True si este arranque se saltó el IDENTIFY
+        self._cold_resume = False
+        self._snapshot = GuildSnapshot(lambda: self.user.id)
+        parsers = self._connection.parsers
+        self._snapshot.install(parsers)
+        resumed = parsers["RESUMED"]
+
+        def on_resumed(data):
+            resumed(data)
+            if self._cold_resume:
+                # Tras un RESUME en frío no llega READY: el bot ya está listo
+                self._cold_resume = False
+                self.resumed_session = True
+                self._connection.call_handlers("ready")
+                self.dispatch("ready")
+
+        parsers["RESUMED"] = on_resumed
+
+    def _take_session(self):
+        """Lee y borra la sesión guardada si sigue siendo aprovechable"""
+        try:
+            with gzip.open(self.session_path, "rt", encoding="utf-8") as f:
+                session = json.load(f)
+        except (OSError, ValueError):
+            return None
+        finally:
+            # De un solo uso: si este arranque falla, el siguiente hace IDENTIFY
+            if os.path.exists(self.session_path):
+                os.remove(self.session_path)
+
+        if time.time() - session.get("saved_at", 0) > RESUME_WINDOW:
+            return None
+        if session.get("user_id") != self.user.id or session.get("intents") != self.intents.value:
+            return None
+        return session
+
+    async def connect(self, *, reconnect: bool = True) -> None:
+        session = self._take_session()
+        if session is not None:
+            await self._resume(session)
+            if self.is_closed():
+                return
+        await super().connect(reconnect=reconnect)
+
+    async def _resume(self, session):
+        """Bucle de conexión con RESUME; vuelve cuando hay que hacer IDENTIFY (o al cerrar)"""
+        for guild in session["guilds"]:
+            self._connection._add_guild_from_data(guild)
+            self._snapshot.guilds[guild["id"]] = guild
+        self._cold_resume = True
+        params = {
+            "initial": False,
+            "shard_id": self.shard_id,
+            "gateway": yarl.URL(session["gateway"]),
+            "session": session["session_id"],
+            "sequence": session["sequence"],
+            "resume": True,
+        }
+        try:
+            while not self.is_closed():
+                try:
+                    self.ws = await asyncio.wait_for(DiscordWebSocket.from_client(self, **params), timeout=60.0)
+                    while True:
+                        await self.ws.poll_event()
+                except ReconnectWebSocket as e:
+                    self.dispatch("disconnect")
+                    if not e.resume:
+                        return  # Sesión invalidada
+                    params.update(sequence=self.ws.sequence, session=self.ws.session_id, gateway=self.ws.gateway)
+        except (OSError, HTTPException, GatewayNotFound, ConnectionClosed,
+                aiohttp.ClientError, asyncio.TimeoutError):
+            self.dispatch("disconnect")
+        finally:
+            self._cold_resume = False
+
+    def save_session(self) -> bool:
+        """Guarda la sesión actual para el siguiente arranque. Devuelve False si no hay sesión"""
+        ws = self.ws
+        if ws is None or not ws.open or ws.session_id is None or self.user is None:
+            return False
+        # Los MESSAGE_CREATE no tocan el payload guardado: se copia el último mensaje de cada
+        # canal para que el salto de canales sin actividad (purge.is_quiet) no use datos viejos
+        for guild in self._snapshot.guilds.values():
+            for data in guild.get("channels", ()):
+                channel = self.get_channel(int(data["id"]))
+                last_id = getattr(channel, "last_message_id", None)
+                if last_id is not None:
+                    data["last_message_id"] = str(last_id)
+        session = {
+            "saved_at": time.time(),
+            "user_id": self.user.id,
+            "intents": self.intents.value,
+            "session_id": ws.session_id,
+            "sequence": ws.sequence,
+            "gateway": str(ws.gateway),
+            "guilds": list(self._snapshot.guilds.values()),
+        }
+        tmp = self.session_path + ".tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(session, f)
+        os.replace(tmp, self.session_path)
+        return True
+
+    async def close_resumable(self):
+        """Cierra guardando la sesión y sin invalidarla en Discord"""
+        ws = self.ws
+        if self.save_session():
+            # close() marca el cliente como cerrado y luego cierra el websocket con 1000;
+            # se cambia ese código para que el bucle de conexión no intente reconectar
+            async def close_keeping_session(code=1000):
+                await DiscordWebSocket.close(ws, RESUMABLE_CLOSE_CODE)
+
+            ws.close = close_keeping_session
+        await self.close()
@@ -0,0 +1,261 @@
+"""
+Detección de cuentas de spam por mensajes casi duplicados
+=========================================================
+Agrupa los mensajes de la ventana escaneada por huella de contenido (MinHash
+con LSH por bandas sobre el texto normalizado) y puntúa a las cuentas que
+publicaron contenido casi idéntico en varios canales o en ráfagas.
+
+Sin comparaciones por pares: cada texto normalizado distinto se firma una
+sola vez, las firmas se reparten en cubos por banda y cada texto solo se
+compara (Jaccard) con el representante del grupo del primero de sus cubos.
+El coste es lineal en mensajes. Si numpy está instalado (dependencia opcional)
+las firmas se calculan vectorizadas por bloques; si no (p. ej. el .exe), en
+Python puro con el mismo resultado en cuanto a grupos.
+"""
+
+import re
+import time
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+from itertools import chain
+
+import discord
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from sweep import DEFAULT_CONCURRENCY, run_sweep
+
+# LSH: BANDS bandas; cada una es el conjunto de los ROWS menores hashes del texto (bottom-k). Umbral aproximado de Jaccard: (1/BANDS) ** (1/ROWS) ≈ 0.58
+BANDS = 5
+ROWS = 3
+# Similitud mínima (Jaccard de palabras) para unir dos textos candidatos
+MIN_JACCARD = 0.6
+# Textos más cortos que esto (tras normalizar) no se analizan: "hola", "gg", "buenos días"...
+MIN_TOKENS = 4
+MIN_CHARS = 16
+# Un grupo necesita al menos este número de mensajes para considerarse spam
+MIN_CLUSTER_SIZE = 3
+# Segundos: un grupo publicado en menos tiempo cuenta como ráfaga (puntúa doble)
+BURST_WINDOW = 600
+# Puntuación mínima para marcar una cuenta como sospechosa
+SUSPECT_SCORE = 6
+# Palabras presentes en más de esta fracción de textos distintos no entran en la firma
+# ("hola", "que"...): solo crean cubos enormes de candidatos falsos
+STOPWORD_DF = 0.01
+# ...y en al menos este número de textos: en ventanas pequeñas el 1 % son un puñado de
+# textos y las palabras de unas pocas variantes de un mismo spam contarían como vacías
+MIN_STOPWORD_DF = 100
+# Textos firmados por bloque en la ruta con numpy (acota la memoria)
+NUMPY_CHUNK = 20000
+
+_URL = re.compile(r"https?://(?:www\.)?([^/\s]+)\S*")
+_MENTION = re.compile(r"<(?:@[!&]?|#|a?:\w+:)\d+>")
+_DIGITS = re.compile(r"\d+")
+_WORD = re.compile(r"\w+")
+
+# Sales fijas para las permutaciones del MinHash (enteros de 64 bits)
+_SALTS = [(0x9E3779B97F4A7C15 * (i + 1)) & 0xFFFFFFFFFFFFFFFF for i in range(BANDS)]
+
+
+def normalize(text: str) -> str:
+    """Quita lo que cambia entre copias de un mismo spam: menciones, números, rutas de URL, signos"""
+    text = text.lower()
+    if "http" in text:
+        text = _URL.sub(r" \1 ", text)
+    if "<" in text:
+        text = _MENTION.sub(" ", text)
+    return " ".join(_WORD.findall(_DIGITS.sub("0", text)))
+
+
+def _signatures_python(token_sets):
+    """Por cada texto, la tupla de claves de cubo de sus BANDS bandas"""
+    for tokens in token_sets:
+        hashes = [hash(t) for t in tokens]
+        # Bottom-k por banda: los ROWS menores hashes bajo la permutación de la banda
+        yield tuple(hash(tuple(sorted(map(salt.__xor__, hashes))[:ROWS])) for salt in _SALTS)
+
+
+def _signatures_numpy(token_sets):
+    """Igual que _signatures_python, con el hash vectorizado por bloques"""
+    salts = np.array(_SALTS, dtype=np.uint64).view(np.int64)
+    for start in range(0, len(token_sets), NUMPY_CHUNK):
+        chunk = token_sets[start:start + NUMPY_CHUNK]
+        lengths = np.fromiter((len(t) for t in chunk), dtype=np.int64, count=len(chunk))
+        hashes = np.fromiter((hash(w) for t in chunk for w in t), dtype=np.int64, count=int(lengths.sum()))
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        segment = np.repeat(np.arange(len(chunk)), lengths)
+        keys = np.empty((len(chunk), BANDS), dtype=np.int64)
+        for band, salt in enumerate(salts):
+            # Orden por (texto, hash permutado): los ROWS primeros de cada texto son su bottom-k
+            ordered = (hashes ^ salt)[np.lexsort((hashes ^ salt, segment))]
+            key = np.zeros(len(chunk), dtype=np.int64)
+            for r in range(ROWS):
+                row = np.where(r < lengths, ordered[np.minimum(offsets + r, len(ordered) - 1)], 0)
+                key = key * np.int64(1000003) ^ row
+            keys[:, band] = key
+        yield from map(tuple, keys.tolist())
+
+
+def _signatures(token_sets):
+    if np is not None and token_sets:
+        return _signatures_numpy(token_sets)
+    return _signatures_python(token_sets)
+
+
+@dataclass
+class SpamCluster:
+    sample: str
+    message_ids: list
+    authors: dict  # author_id -> nº de mensajes
+    channels: set
+    first_ts: float
+    last_ts: float
+
+    @property
+    def is_burst(self) -> bool:
+        return self.last_ts - self.first_ts <= BURST_WINDOW
+
+
+@dataclass
+class SuspectAccount:
+    author_id: int
+    score: float
+    messages: int = 0
+    channels: set = field(default_factory=set)
+    clusters: int = 0
+
+
+class SpamAnalyzer:
+    """Acumula mensajes de la ventana y calcula grupos de casi duplicados"""
+
+    def __init__(self):
+        self._texts = {}  # texto normalizado -> índice
+        self._text_tokens = []
+        # Una fila por mensaje en columnas de enteros (~36 bytes por mensaje en vez de
+        # ~200 con una tupla): id, canal, autor, timestamp e índice de texto
+        self._ids = array("q")
+        self._channels = array("q")
+        self._authors = array("q")
+        self._stamps = array("d")
+        self._text_idx = array("l")
+        self._samples = []
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, message_id: int, channel_id: int, author_id: int, timestamp: float, content: str):
+        norm = normalize(content or "")
+        if len(norm) < MIN_CHARS:
+            return
+        idx = self._texts.get(norm)
+        if idx is None:
+            tokens = frozenset(norm.split())
+            if len(tokens) < MIN_TOKENS:
+                return
+            idx = len(self._text_tokens)
+            self._texts[norm] = idx
+            self._text_tokens.append(tokens)
+            self._samples.append(content[:120])
+        self._ids.append(message_id)
+        self._channels.append(channel_id)
+        self._authors.append(author_id)
+        self._stamps.append(timestamp)
+        self._text_idx.append(idx)
+
+    def add_message(self, msg):
+        if msg.author.bot:
+            return
+        self.add(msg.id, msg.channel.id, msg.author.id, msg.created_at.timestamp(), msg.content)
+
+    def clusters(self, min_size: int = MIN_CLUSTER_SIZE):
+        """Grupos de mensajes con contenido casi idéntico"""
+        tokens = self._text_tokens
+        df = Counter(chain.from_iterable(tokens))
+        cutoff = max(MIN_STOPWORD_DF, STOPWORD_DF * len(tokens))
+        stop = {t for t, c in df.items() if c > cutoff}
+        reduced = [toks - stop for toks in tokens]
+        signed = [i for i, toks in enumerate(reduced) if len(toks) >= 2]
+
+        # Agrupación en estrella y en línea: los textos se recorren en orden y cada
+        # uno se une al representante del grupo del primer texto de alguno de sus
+        # cubos, solo si se parece a ese representante (evita cadenas A~B~C~...).
+        root = list(range(len(tokens)))
+        buckets = [{} for _ in range(BANDS)]
+        for idx, keys in zip(signed, _signatures([reduced[i] for i in signed])):
+            a = tokens[idx]
+            for bucket, key in zip(buckets, keys):
+                leader = bucket.setdefault(key, idx)
+                if leader == idx:
+                    continue
+                rep = root[leader]
+                b = tokens[rep]
+                if root[idx] == idx and len(a & b) >= MIN_JACCARD * len(a | b):
+                    root[idx] = rep
+
+        members = {}
+        for row, idx in enumerate(self._text_idx):
+            members.setdefault(root[idx], []).append(row)
+
+        result = []
+        for rep, rows in members.items():
+            if len(rows) < min_size:
+                continue
+            stamps = [self._stamps[row] for row in rows]
+            result.append(SpamCluster(
+                self._samples[rep],
+                [self._ids[row] for row in rows],
+                Counter(self._authors[row] for row in rows),
+                {self._channels[row] for row in rows},
+                min(stamps),
+                max(stamps),
+            ))
+        result.sort(key=lambda c: len(c.message_ids), reverse=True)
+        return result
+
+    def rank_authors(self, min_score: float = SUSPECT_SCORE):
+        """
+        Cuentas ordenadas por puntuación. Por cada grupo, una cuenta que
+        repitió el texto suma sus mensajes en él × nº de canales del grupo
+        (×2 si fue una ráfaga). Una frase común dicha una vez por muchas
+        personas no puntúa.
+        """
+        suspects = {}
+        for cluster in self.clusters():
+            weight = len(cluster.channels) * (2 if cluster.is_burst else 1)
+            # Un único autor repitiendo en un solo canal sin ráfaga no es spam coordinado
+            if weight == 1 and len(cluster.authors) == 1:
+                continue
+            for author_id, count in cluster.authors.items():
+                if count < 2:
+                    continue
+                suspect = suspects.setdefault(author_id, SuspectAccount(author_id, 0.0))
+                suspect.score += count * weight
+                suspect.messages += count
+                suspect.channels |= cluster.channels
+                suspect.clusters += 1
+
+        ranked = [s for s in suspects.values() if s.score >= min_score]
+        ranked.sort(key=lambda s: s.score, reverse=True)
+        return ranked
+
+
+async def scan_window(targets, after, analyzer: SpamAnalyzer, job=None, concurrency=None):
+    """Lee el historial de la ventana de cada canal/hilo y lo pasa al analizador (sin borrar nada)"""
+    async def worker(channel, idx, total):
+        scanned = 0
+        try:
+            async for msg in channel.history(limit=None, after=after):
+                scanned += 1
+                if job is not None and scanned % 100 == 0:
+                    await job.next_page()
+                analyzer.add_message(msg)
+        except discord.HTTPException:
+            pass  # Canal sin acceso: se omite del análisis
+
+    start = time.perf_counter()
+    await run_sweep(targets, worker, concurrency or DEFAULT_CONCURRENCY)
+    return time.perf_counter() - start
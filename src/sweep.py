@@ -0,0 +1,147 @@
+"""
+Barrido de canales e hilos
+==========================
+Enumera todo lo que puede contener mensajes en un servidor (canales de texto,
+chats de canales de voz/escenario, hilos activos y archivados, posts de foros)
+y lo procesa en un único pipeline concurrente.
+Lo usan tanto el bot de consola (ChakielBotDiscord.py) como la GUI (main.py).
+"""
+
+import asyncio
+import time
+from datetime import datetime
+
+import discord
+
+# Número de canales/hilos que se procesan a la vez.
+# discord.py ya gestiona los rate limits por ruta; más concurrencia no ayuda.
+DEFAULT_CONCURRENCY = 4
+
+
+class ThreadCache:
+    """
+    Cache de hilos archivados por canal padre.
+    Paginar los archivados cuesta una petición por cada 100 hilos, así que se
+    guarda el resultado durante `ttl` segundos para no repetirlo en barridos seguidos.
+    """
+
+    def __init__(self, ttl: float = 600.0):
+        self.ttl = ttl
+        self._entries = {}  # parent_id -> (momento, fecha límite, [hilos])
+
+    async def archived_threads(self, parent, after: datetime, private: bool = False):
+        """Hilos archivados de `parent` que pudieron recibir mensajes después de `after`"""
+        entry = self._entries.get(parent.id)
+        # Una entrada sirve si es reciente y cubre una ventana igual o más amplia
+        if entry and time.monotonic() - entry[0] < self.ttl and entry[1] <= after:
+            return [t for t in entry[2] if t.archive_timestamp > after]
+
+        threads = await self._fetch_archived(parent, after, private)
+        self._entries[parent.id] = (time.monotonic(), after, threads)
+        return threads
+
+    async def _fetch_archived(self, parent, after: datetime, private: bool):
+        threads = []
+        iterators = [parent.archived_threads(limit=None)]
+        if private and isinstance(parent, discord.TextChannel):
+            iterators.append(parent.archived_threads(limit=None, private=True))
+
+        for iterator in iterators:
+            # Vienen ordenados por fecha de archivado descendente: un hilo archivado
+            # antes de la ventana ya no pudo recibir mensajes, se corta la paginación.
+            async for thread in iterator:
+                if thread.archive_timestamp <= after:
+                    break
+                threads.append(thread)
+        return threads
+
+    def invalidate(self, parent_id: int = None):
+        """Descarta la cache de un canal padre (o toda si no se indica)"""
+        if parent_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(parent_id, None)
+
+
+def target_label(target) -> str:
+    """Nombre legible de un canal o hilo para los logs"""
+    if isinstance(target, discord.Thread) and target.parent is not None:
+        return f"#{target.parent.name} › {target.name}"
+    return f"#{target.name}"
+
+
+async def collect_targets(guild: discord.Guild, after: datetime, thread_cache: ThreadCache = None,
+                          planner=None):
+    """
+    Devuelve la lista de canales e hilos del servidor a barrer.
+    Los hilos activos se piden en una sola llamada para todo el servidor;
+    los archivados se paginan por canal padre y se cachean.
+    Con un `planner` (preflight.PermissionPlanner) no se paginan los archivados
+    de los canales en los que el trabajo no podría hacer nada.
+    """
+    if thread_cache is None:
+        thread_cache = ThreadCache()
+
+    me = guild.me
+    targets = []
+    targets.extend(guild.text_channels)
+    targets.extend(guild.voice_channels)
+    targets.extend(guild.stage_channels)
+
+    # Canales que pueden tener hilos (texto/anuncios y foros)
+    parents = list(guild.text_channels) + list(guild.forums)
+    parent_ids = {p.id for p in parents}
+
+    seen = set()
+    try:
+        active = await guild.active_threads()
+    except discord.HTTPException:
+        active = list(guild.threads)
+    for thread in active:
+        if thread.parent_id in parent_ids and thread.id not in seen:
+            seen.add(thread.id)
+            targets.append(thread)
+
+    async def archived_for(parent):
+        if planner is not None:
+            if planner.blocker(parent) is not None:
+                return []
+            perms = planner.permissions(parent)
+        else:
+            perms = parent.permissions_for(me)
+        if not perms.read_message_history:
+            return []
+        try:
+            return await thread_cache.archived_threads(parent, after, private=perms.manage_threads)
+        except discord.HTTPException:
+            return []
+
+    results = await asyncio.gather(*(archived_for(p) for p in parents))
+    for threads in results:
+        for thread in threads:
+            if thread.id not in seen:
+                seen.add(thread.id)
+                targets.append(thread)
+
+    return targets
+
+
+async def run_sweep(targets, worker, concurrency: int = DEFAULT_CONCURRENCY):
+    """
+    Ejecuta `worker(target, index, total)` sobre cada canal/hilo con
+    como máximo `concurrency` tareas en vuelo.
+    """
+    total = len(targets)
+    queue = asyncio.Queue()
+    for idx, target in enumerate(targets, 1):
+        queue.put_nowait((idx, target))
+
+    async def consume():
+        while True:
+            try:
+                idx, target = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await worker(target, idx, total)
+
+    await asyncio.gather(*(consume() for _ in range(max(1, min(concurrency, total)))))